@@ -5,7 +5,10 @@ import io
 import datetime
 import json
 import os
-from utils import parsing, standardize, geocode, ocr
+import pathlib
+import shutil
+import tempfile
+from utils import parsing, standardize, geocode, ocr, schema, email_ingest, pipeline, case_store, case_export, case_view, case_ids, case_index, case_map, power_lines, territory, metrics
 
 # Page Config
 st.set_page_config(
@@ -121,16 +124,20 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize Session State with schema
-SCHEMA_KEYS = [
-    'customer_name', 'phone', 'email', 'street_address', 'city', 'state', 'zip',
-    'initial_contact_datetime', 'contact_channel', 'work_order_summary', 
-    'raw_comments', 'risk_flags', 'gps_lat', 'gps_lng'
-]
-
-if 'cases_db' not in st.session_state:
-    st.session_state.cases_db = []
-if 'case_counter' not in st.session_state:
-    st.session_state.case_counter = 1
+SCHEMA_KEYS = schema.SCHEMA_KEYS
+
+# Saved cases live in a SQLite store shared by all sessions and app workers
+cases_db = case_store.get_default_store()
+
+# Case IDs are unique across sessions and app workers
+case_id_allocator = case_ids.get_default_allocator()
+
+# Power-line layer (BLOOM_POWER_LINES) is indexed once per process, not per case
+power_lines.get_default_network()
+
+# Stage timings/counters are off unless BLOOM_METRICS, BLOOM_METRICS_PORT
+# or BLOOM_METRICS_FILE is set
+metrics.configure_from_env()
 if 'current_case' not in st.session_state:
     st.session_state.current_case = {k: None for k in SCHEMA_KEYS}
 if 'extraction_done' not in st.session_state:
@@ -175,7 +182,7 @@ with st.sidebar.expander("📖 How This Works", expanded=True):
 
 
 with st.sidebar:
-    if st.button("Reset Session", type="secondary", help="Clear all data"):
+    if st.button("Reset Session", type="secondary", help="Clear the current session (saved cases are kept)"):
         for key in list(st.session_state.keys()):
             del st.session_state[key]
         st.rerun()
@@ -278,8 +285,18 @@ with tab1:
                                 if not ocr.is_tesseract_installed():
                                     st.warning("⚠️ Tesseract not installed. OCR unavailable. Please enter data manually in Review tab.")
                                     raw_text = "LOG: Tesseract not available"
+                                elif is_pdf:
+                                    # OCR every page, not just the previewed first page
+                                    page_texts, err = ocr.extract_text_from_pdf(pdf_bytes)
+                                    if err:
+                                        st.warning(err)
+                                        raw_text = err
+                                    else:
+                                        if len(page_texts) > 1:
+                                            st.caption(f"📑 OCR'd {len(page_texts)} pages")
+                                        raw_text = "\n\n".join(t for t in page_texts if not t.startswith("LOG:")) or page_texts[0]
                                 else:
-                                    raw_text = ocr.extract_text_from_image(image)
+                                    raw_text = ocr.extract_text_from_bytes(uploaded_file.getvalue())
                                 
                                 if debug_mode:
                                     with st.expander("🔍 Debug: Raw OCR Text", expanded=True):
@@ -358,8 +375,9 @@ with tab1:
                     if not ocr.is_tesseract_installed():
                         st.warning("⚠️ Tesseract not installed. Please paste text manually.")
                     else:
-                        image = Image.open(uploaded_file)
-                        raw_text = ocr.extract_text_from_image(image)
+                        # Cached on the upload's bytes, so pressing the button
+                        # again (or re-uploading the same scan) skips Tesseract
+                        raw_text = ocr.extract_text_from_bytes(uploaded_file.getvalue())
             
             if raw_text:
                 if debug_mode:
@@ -406,8 +424,7 @@ with tab1:
         
         if st.button("🚀 Extract Data from Email", type="primary", key="extract_email_btn", use_container_width=True):
             if email_content:
-                extracted_data = parsing.parse_messy_text(email_content)
-                extracted_data['contact_channel'] = 'Email'
+                extracted_data = email_ingest.parse_email(email_content)
                 
                 for key in SCHEMA_KEYS:
                     if key not in extracted_data:
@@ -430,6 +447,31 @@ with tab1:
             else:
                 st.error("❌ Please paste email content.")
 
+        with st.expander("📦 Bulk import from an email export (.eml / mbox)"):
+            st.caption("Every message becomes a saved case. Addresses are not geocoded here; "
+                       "use `batch_intake.py` for geocoded bulk runs.")
+            archive = st.file_uploader("Email export", type=['eml', 'mbox', 'mbx'], key="email_archive_uploader")
+            if archive is not None and st.button("📥 Import All Messages", key="import_emails_btn"):
+                suffix = os.path.splitext(archive.name)[1]
+                with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+                    shutil.copyfileobj(archive, tmp)
+
+                def imported_cases():
+                    for case in email_ingest.ingest([tmp.name]):
+                        case = pipeline.standardize_fields(dict(schema.empty_case(), **case))
+                        case['case_id'] = case_id_allocator.next_id()
+                        case['recommended_filename'] = standardize.generate_filename(
+                            case['case_id'], case.get('street_address'), case.get('city'), case.get('state'))
+                        case['timestamp_added'] = datetime.datetime.now().isoformat()
+                        yield case
+
+                try:
+                    with st.spinner("Parsing messages..."):
+                        imported = cases_db.add_many(imported_cases())
+                finally:
+                    os.unlink(tmp.name)
+                st.success(f"✅ Imported {imported} cases from {archive.name}")
+
 # --- TAB 2: REVIEW & EDIT ---
 with tab2:
     st.markdown("""
@@ -469,7 +511,7 @@ with tab2:
                      
                 contact_date = st.text_input("Contact Date", value=str(d_val), help="Date of initial contact")
                 
-                channels = ["Form", "Text", "Email", "Phone Call"]
+                channels = schema.CHANNELS
                 curr_channel = current.get('contact_channel', 'Form')
                 idx = channels.index(curr_channel) if curr_channel in channels else 0
                 channel = st.selectbox("Channel", channels, index=idx, help="How the customer contacted us")
@@ -543,7 +585,7 @@ with tab3:
         std_name = standardize.normalize_text(case.get('customer_name'))
         std_date = standardize.standardize_date(case.get('initial_contact_datetime'))
         
-        full_addr_str = f"{case.get('street_address')}, {case.get('city')}, {case.get('state')} {case.get('zip')}"
+        full_addr_str = standardize.format_full_address(case)
         if 'gps_lat' not in case or not case['gps_lat']:
             with st.spinner(f"🌍 Geocoding address: {full_addr_str}..."):
                 lat, lng, formatted_addr = geocode.get_lat_long(full_addr_str)
@@ -551,10 +593,10 @@ with tab3:
             lat, lng = case['gps_lat'], case['gps_lng']
             formatted_addr = "Previously Geocoded"
 
-        if 'case_id' not in case:
-            new_id = standardize.generate_case_id(st.session_state.case_counter)
-        else:
-            new_id = case['case_id']
+        if not case.get('case_id'):
+            # Allocated once per case, so reruns of this step keep the same ID
+            case['case_id'] = case_id_allocator.next_id()
+        new_id = case['case_id']
             
         rec_filename = standardize.generate_filename(new_id, case.get('street_address'), case.get('city'), case.get('state'))
 
@@ -581,13 +623,37 @@ with tab3:
                 if m_lat != 0.0:
                     lat, lng = m_lat, m_lng
 
+            service_area = territory.get_default_territory()
+            if service_area is not None and lat and lng and not service_area.contains(lat, lng):
+                st.warning("⚠️ This location is outside the service territory — check the address or enter coordinates manually.")
+
+            # Saved cases at (nearly) the same spot are often repeat reports of one outage
+            nearby = case_index.get_index(cases_db).duplicates(lat, lng, case_id=new_id)
+            if nearby:
+                st.warning(f"⚠️ {len(nearby)} saved case(s) within {case_index.DUPLICATE_RADIUS_M} m — possibly the same report")
+                rows = []
+                for n in nearby[:10]:
+                    saved = cases_db.get(n['case_id']) or {}
+                    rows.append({
+                        'case_id': n['case_id'],
+                        'distance_m': round(n['distance_m']),
+                        'address': saved.get('formatted_address'),
+                        'contact': saved.get('initial_contact_datetime'),
+                        'risk_flags': saved.get('risk_flags'),
+                    })
+                st.dataframe(pd.DataFrame(rows), hide_index=True, width='stretch')
+
+        # Nearest primary/secondary line distances join the keyword risk flags
+        located = power_lines.add_proximity_flags({'risk_flags': case.get('risk_flags'), 'gps_lat': lat, 'gps_lng': lng})
+        risk_flags = located['risk_flags']
+
         with col2:
             st.subheader("📄 Standardized Record")
             
             st.text_input("🆔 Case ID", value=new_id, disabled=True, help="Unique identifier for this case")
             st.text_input("📞 Standardized Phone", value=std_phone, disabled=True, help="Formatted phone number")
             st.text_input("📅 Standardized Date", value=std_date, disabled=True, help="ISO 8601 format")
-            st.text_input("⚠️ Risk Flags", value=case.get('risk_flags'), disabled=True, help="Safety concerns identified")
+            st.text_input("⚠️ Risk Flags", value=risk_flags, disabled=True, help="Safety concerns identified")
             
             st.markdown("**📁 Recommended Filename:**")
             st.code(rec_filename, language="text")
@@ -604,12 +670,15 @@ with tab3:
                     'gps_lat': lat,
                     'gps_lng': lng,
                     'formatted_address': formatted_addr,
+                    'risk_flags': risk_flags,
+                    'primary_line_m': located.get('primary_line_m'),
+                    'secondary_line_m': located.get('secondary_line_m'),
                     'recommended_filename': rec_filename,
+                    'possible_duplicates': [n['case_id'] for n in nearby],
                     'timestamp_added': datetime.datetime.now().isoformat()
                 })
                 
-                st.session_state.cases_db.append(final_record)
-                st.session_state.case_counter += 1
+                cases_db.add(final_record)
                 st.session_state.current_case = {k: None for k in SCHEMA_KEYS}
                 st.session_state.extraction_done = False
                 st.session_state.standardization_done = False
@@ -624,38 +693,152 @@ with tab3:
                 st.balloons()
                 st.rerun()
 
-# --- BOTTOM: SESSION DB ---
+# --- BOTTOM: CASES DB ---
 st.markdown("---")
 st.markdown("""
 <div class="info-box">
-    <h3 style="margin-top: 0;">📚 Session Cases Database</h3>
-    <p>All cases created in this session. Export to CSV for permanent storage.</p>
+    <h3 style="margin-top: 0;">📚 Cases Database</h3>
+    <p>All saved cases, newest first. Export to CSV or Parquet for use in other tools.</p>
 </div>
 """, unsafe_allow_html=True)
 
-if st.session_state.cases_db:
-    df = pd.DataFrame(st.session_state.cases_db)
-    
+# Metrics and table pages are memoized on the store version, so reruns
+# triggered elsewhere in the app don't re-query or rebuild them
+summary = case_view.get_summary(cases_db)
+total_cases = summary.total
+if total_cases:
     # Show metrics
     metric_col1, metric_col2, metric_col3 = st.columns(3)
     with metric_col1:
-        st.metric("Total Cases", len(df))
+        st.metric("Total Cases", total_cases)
     with metric_col2:
-        st.metric("Latest Case ID", df.iloc[-1]['case_id'] if len(df) > 0 else "N/A")
+        st.metric("Latest Case ID", summary.latest_case_id or "N/A")
     with metric_col3:
-        channels = df['contact_channel'].value_counts()
-        st.metric("Most Common Channel", channels.index[0] if len(channels) > 0 else "N/A")
-    
-    st.dataframe(df, width='stretch')
+        st.metric("Most Common Channel", summary.most_common_channel() or "N/A")
+
+    table = case_view.get_table()
+    page_count = table.page_count(total_cases)
+    page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1,
+                           help=f"{page_count} pages of {table.page_size} cases")
+    st.dataframe(table.page(cases_db, page - 1, version=summary.version), width='stretch')
     
-    csv = df.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        label="📥 Download All Cases as CSV",
-        data=csv,
-        file_name=f'bloom_spatial_cases_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.csv',
-        mime='text/csv',
-        type="primary",
-        use_container_width=True
-    )
+    # Exports are only built when asked for, then reused until new cases are saved
+    with st.expander("Export filters", expanded=False):
+        filter_col1, filter_col2, filter_col3 = st.columns(3)
+        with filter_col1:
+            export_channel = st.selectbox("Channel", ["All"] + schema.CHANNELS, key="export_channel")
+        with filter_col2:
+            export_dates = st.date_input("Contact date range", value=[], key="export_dates")
+        with filter_col3:
+            export_in_view = st.checkbox("Only the area shown on the map", key="export_in_view",
+                                         disabled='map_view' not in st.session_state)
+    # Filters run in the store's query; date_to is exclusive, so it is the day after the range
+    export_filters = {
+        'channel': None if export_channel == "All" else export_channel,
+        'date_from': export_dates[0].isoformat() if export_dates else None,
+        'date_to': (export_dates[-1] + datetime.timedelta(days=1)).isoformat() if export_dates else None,
+        'bbox': (case_map.view_bbox(*st.session_state.map_view)
+                 if export_in_view and 'map_view' in st.session_state else None),
+    }
+    export_col1, export_col2 = st.columns([1, 2])
+    with export_col1:
+        export_format = st.selectbox("Export format", list(case_export.FORMATS), key="export_format",
+                                     format_func=lambda f: {"csv": "CSV", "csv.gz": "CSV (gzip)", "parquet": "Parquet",
+                                                            "geojsonl": "GeoJSON (lines)", "geoparquet": "GeoParquet"}[f])
+    with export_col2:
+        if st.button("📦 Prepare Export", use_container_width=True):
+            with st.spinner("Preparing export..."):
+                st.session_state.export_path = case_export.get_default_cache().get(cases_db, export_format,
+                                                                                   **export_filters)
+                st.session_state.export_ready_format = export_format
+                st.session_state.export_filtered = any(v is not None for v in export_filters.values())
+                st.session_state.export_version = summary.version
+    # An export prepared before new cases were saved is stale: prepare it again
+    if st.session_state.get('export_version') != summary.version:
+        st.session_state.pop('export_path', None)
+    export_path = st.session_state.get('export_path')
+    if export_path and os.path.exists(export_path):
+        fmt = st.session_state.export_ready_format
+        # The file is only read when the button is clicked, not on every rerun
+        # (callable data needs streamlit >= 1.52)
+        st.download_button(
+            label=f"📥 Download {'Filtered' if st.session_state.get('export_filtered') else 'All'} Cases ({os.path.basename(export_path)})",
+            data=pathlib.Path(export_path).read_bytes,
+            file_name=f'bloom_spatial_cases_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.{fmt}',
+            mime=case_export.MIME_TYPES[fmt],
+            type="primary",
+            use_container_width=True
+        )
+
+    # Geocodes that landed outside the service territory (BLOOM_TERRITORY)
+    if territory.get_default_territory() is not None:
+        if st.button("🧭 Check Locations Against Service Territory", use_container_width=True):
+            with st.spinner("Checking case locations..."):
+                st.session_state.territory_check = territory.validate_store(cases_db)
+        check = st.session_state.get('territory_check')
+        if check:
+            if check["outside"]:
+                st.warning(f"⚠️ {len(check['outside'])} of {check['checked']} geocoded cases are outside the service territory")
+                st.dataframe(pd.DataFrame({'case_id': check["outside"][:1000]}), hide_index=True, width='stretch')
+            else:
+                st.success(f"✅ All {check['checked']} geocoded cases are inside the service territory")
+
+    # Every saved case on one map. Clusters are kept per zoom level and updated
+    # as cases are saved, so a rerun only sends the clusters in view
+    with st.expander("🗺️ Map of All Cases", expanded=False):
+        overview = case_map.get_clusters(cases_db).center()
+        if overview is None:
+            st.info("No geocoded cases yet.")
+        else:
+            if 'map_view' not in st.session_state:
+                st.session_state.map_view = overview
+            view_lat, view_lng, view_zoom = st.session_state.map_view
+            shown = case_map.visible(cases_db, view_lat, view_lng, view_zoom)
+            biggest = sorted(shown, key=lambda c: -c['count'])[:20]
+
+            nav_col1, nav_col2, nav_col3, nav_col4 = st.columns([3, 1, 1, 1])
+            with nav_col1:
+                target = st.selectbox("Cluster", range(len(biggest)), key="map_cluster",
+                                      format_func=lambda i: f"{biggest[i]['count']} case(s) near {biggest[i]['lat']:.4f}, {biggest[i]['lng']:.4f}")
+            with nav_col2:
+                if st.button("🔍 Zoom In", use_container_width=True, disabled=not biggest):
+                    cluster = biggest[target]
+                    st.session_state.map_view = (cluster['lat'], cluster['lng'], min(case_map.MAX_ZOOM, view_zoom + 2))
+            with nav_col3:
+                if st.button("➖ Zoom Out", use_container_width=True):
+                    st.session_state.map_view = (view_lat, view_lng, max(0, view_zoom - 2))
+            with nav_col4:
+                if st.button("↺ All Cases", use_container_width=True):
+                    st.session_state.map_view = overview
+            if st.session_state.map_view != (view_lat, view_lng, view_zoom):
+                view_lat, view_lng, view_zoom = st.session_state.map_view
+                shown = case_map.visible(cases_db, view_lat, view_lng, view_zoom)
+
+            if shown:
+                top = max(c['count'] for c in shown)
+                cell_m = case_map.cell_size_m(view_lat, view_zoom)
+                st.map(pd.DataFrame({
+                    'lat': [c['lat'] for c in shown],
+                    'lon': [c['lng'] for c in shown],
+                    'size': [cell_m * (0.15 + 0.35 * (c['count'] / top) ** 0.5) for c in shown],
+                }), size='size', zoom=view_zoom)
+            st.caption(f"Zoom {view_zoom}: {len(shown)} marker(s) for {sum(c['count'] for c in shown)} case(s) in view")
 else:
     st.info("📭 No cases created yet. Start by uploading a document in the **Upload & Extract** tab!")
+
+# Rendered last so the panel includes this run's work
+if metrics.enabled():
+    with st.sidebar.expander("📈 Stage Metrics", expanded=False):
+        snap = metrics.REGISTRY.snapshot()
+        if snap["stages"]:
+            st.dataframe(pd.DataFrame([
+                {"stage": stage, "calls": s["count"], "mean_ms": round(s["mean_ms"], 2),
+                 "total_s": round(s["total_s"], 2), "errors": s["errors"]}
+                for stage, s in sorted(snap["stages"].items())
+            ]), hide_index=True, width='stretch')
+        for name, labels, value in snap["counters"]:
+            st.caption(f"{name} {' '.join(f'{k}={v}' for k, v in labels.items())}: {value}")
+        st.download_button("Download (Prometheus)", metrics.render_prometheus(),
+                           file_name="bloom_metrics.prom", mime="text/plain")
+
+metrics.export_file()
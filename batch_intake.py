@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Headless batch intake: OCR, parse, standardize and geocode a folder (or
+manifest) of scanned forms, text files and email (.eml/mbox) exports
+without the Streamlit UI.
+
+    python batch_intake.py scans/ --output cases.jsonl
+    python batch_intake.py --manifest files.txt --output cases.csv --resume
+"""
+
+import argparse
+import json
+import sys
+
+from utils import metrics, pipeline
+
+
+def print_progress(summary):
+    stages = "  ".join(f"{s['stage']}={s['items']}" for s in summary["stages"])
+    total = summary['total'] if summary['total'] is not None else "?"
+    print(f"\r📄 {summary['written']}/{total} written  {stages}",
+          end="", file=sys.stderr, flush=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("inputs", nargs="*", help="files or directories to process")
+    parser.add_argument("--manifest", help="text file listing one input path per line")
+    parser.add_argument("--output", "-o", required=True, help="output file (.jsonl or .csv)")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip inputs already in the checkpoint and append to the output")
+    parser.add_argument("--ocr-workers", type=int, default=None, help="OCR processes (default: CPU count)")
+    parser.add_argument("--geocode-workers", type=int, default=4, help="geocoding threads")
+    parser.add_argument("--no-geocode", action="store_true", help="skip geocoding")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="record per-stage timings and counters and write them here (Prometheus text)")
+    parser.add_argument("--quiet", "-q", action="store_true", help="no progress output")
+    args = parser.parse_args(argv)
+
+    if args.metrics:
+        metrics.enable()
+    paths = pipeline.discover_inputs(args.inputs, args.manifest)
+    if not paths:
+        parser.error("no supported input files found")
+
+    runner = pipeline.IntakePipeline(
+        args.output,
+        checkpoint=args.checkpoint,
+        resume=args.resume,
+        ocr_workers=args.ocr_workers,
+        geocode_workers=args.geocode_workers,
+        do_geocode=not args.no_geocode,
+        progress=None if args.quiet else print_progress,
+    )
+    summary = runner.run(paths)
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+    if args.metrics:
+        metrics.write_prometheus(args.metrics)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Contention benchmark for utils/case_ids.py: several processes allocate
+case IDs from one database file at once, for a range of block sizes.
+Reports total IDs/s and database reservations, and checks that every ID
+is unique.
+
+Usage: python benchmarks/bench_case_ids.py [--processes 4] [--ids 2000] [--blocks 1,10,50,500] [--json out.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import case_ids
+
+
+def worker(path, count, block_size, start_event):
+    allocator = case_ids.CaseIdAllocator(path, block_size=block_size)
+    start_event.wait()
+    ids = [allocator.next_id() for _ in range(count)]
+    reservations = allocator.reservations
+    allocator.close()
+    return ids, reservations
+
+def run(processes, count, block_size):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ids.sqlite")
+        case_ids.CaseIdAllocator(path).close()  # create the table up front
+        manager = multiprocessing.Manager()
+        start_event = manager.Event()
+        with multiprocessing.Pool(processes) as pool:
+            pending = pool.starmap_async(worker, [(path, count, block_size, start_event)] * processes)
+            time.sleep(0.5)  # let every worker open its connection
+            start = time.perf_counter()
+            start_event.set()
+            results = pending.get()
+            elapsed = time.perf_counter() - start
+        manager.shutdown()
+    all_ids = [i for ids, _ in results for i in ids]
+    return {
+        "block_size": block_size,
+        "ids_per_s": round(len(all_ids) / elapsed),
+        "reservations": sum(r for _, r in results),
+        "unique": len(set(all_ids)) == len(all_ids),
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--processes", type=int, default=4)
+    ap.add_argument("--ids", type=int, default=2000, help="IDs allocated by each process")
+    ap.add_argument("--blocks", default="1,10,50,500", help="block sizes to compare")
+    ap.add_argument("--json", help="also write results to this file")
+    args = ap.parse_args()
+
+    print("=" * 60)
+    print(f"CASE ID ALLOCATION: {args.processes} processes x {args.ids} IDs")
+    print("=" * 60)
+    print(f"{'block':>8}{'IDs/s':>12}{'reservations':>14}  unique")
+    results = []
+    for block_size in [int(b) for b in args.blocks.split(",")]:
+        row = run(args.processes, args.ids, block_size)
+        results.append(row)
+        print(f"{block_size:>8}{row['ids_per_s']:>12}{row['reservations']:>14}  {'✅' if row['unique'] else '❌'}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
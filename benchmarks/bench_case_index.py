@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Query cost of utils/case_index.py as the number of saved cases grows:
+index build rate, the 200 m duplicate check, a 1 km radius query and
+5-nearest. Cases are spread uniformly over a 2 x 2 degree service area
+(about 1M cases is ~25 per grid cell). Queries should stay well under
+1 ms at 1,000,000 cases.
+
+Usage: python benchmarks/bench_case_index.py [--sizes 1000,100000,1000000] [--queries 2000] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import case_index
+
+CENTER = (38.3, -87.5)
+SPREAD = 1.0  # degrees either side of CENTER
+
+
+def random_point(rnd):
+    return CENTER[0] + rnd.uniform(-SPREAD, SPREAD), CENTER[1] + rnd.uniform(-SPREAD, SPREAD)
+
+def per_query_us(fn, points):
+    start = time.perf_counter()
+    for lat, lng in points:
+        fn(lat, lng)
+    return 1e6 * (time.perf_counter() - start) / len(points)
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="1000,100000,1000000", help="index sizes to measure")
+    ap.add_argument("--queries", type=int, default=2000, help="queries per measurement")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", help="also write results to this file")
+    args = ap.parse_args()
+
+    rnd = random.Random(args.seed)
+    queries = [random_point(rnd) for _ in range(args.queries)]
+
+    print("=" * 60)
+    print("CASE LOCATION INDEX: mean µs per query")
+    print("=" * 60)
+    print(f"{'cases':>10}{'build/s':>12}{'dup 200m':>10}{'r 1km':>10}{'5-NN':>10}")
+    results = []
+    index = case_index.CaseLocationIndex()
+    have = 0
+    for size in [int(s) for s in args.sizes.split(",")]:
+        start = time.perf_counter()
+        for n in range(have, size):
+            index.add(f"RPC-{n:07d}", *random_point(rnd))
+        build_rate = (size - have) / (time.perf_counter() - start)
+        have = size
+        row = {
+            "cases": size,
+            "build_per_s": round(build_rate),
+            "duplicates_us": round(per_query_us(index.duplicates, queries), 1),
+            "radius_1km_us": round(per_query_us(lambda lat, lng: index.radius(lat, lng, 1000), queries), 1),
+            "nearest_5_us": round(per_query_us(lambda lat, lng: index.nearest(lat, lng, k=5), queries), 1),
+        }
+        results.append(row)
+        print(f"{size:>10}{row['build_per_s']:>12}{row['duplicates_us']:>10.1f}"
+              f"{row['radius_1km_us']:>10.1f}{row['nearest_5_us']:>10.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
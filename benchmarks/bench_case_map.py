@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Cost of the all-cases map (utils/case_map.py): building the zoom-level
+clusters for N cases, merging in one newly saved case (what a rerun after
+a save pays), and answering one view at several zoom levels, with the
+number of markers that view sends to the browser.
+
+Usage: python benchmarks/bench_case_map.py [--cases 1000000] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import case_map
+
+CENTER = (38.3, -87.5)
+SPREAD = 1.0  # degrees either side of CENTER
+
+
+def timed_ms(fn, repeat=20):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return 1000 * sorted(times)[len(times) // 2], result
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--cases", type=int, default=1000000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", help="also write results to this file")
+    args = ap.parse_args()
+
+    import numpy as np
+
+    gen = np.random.default_rng(args.seed)
+    lats = CENTER[0] + gen.uniform(-SPREAD, SPREAD, args.cases)
+    lngs = CENTER[1] + gen.uniform(-SPREAD, SPREAD, args.cases)
+    ids = [f"RPC-{n:07d}" for n in range(args.cases)]
+
+    index = case_map.ClusterIndex()
+    start = time.perf_counter()
+    index.add_many(ids, lats, lngs)
+    build_s = time.perf_counter() - start
+    add_ms, _ = timed_ms(lambda: index.add_many(["RPC-new"], [CENTER[0]], [CENTER[1]]))
+
+    print("=" * 60)
+    print(f"CASE MAP: {args.cases} cases, built in {build_s:.2f} s, one new case merged in {add_ms:.2f} ms")
+    print("=" * 60)
+    print(f"{'zoom':>6}{'view ms':>10}{'markers':>10}{'cases':>10}")
+    views = []
+    for zoom in (4, 7, 9, 11, 13):
+        ms, shown = timed_ms(lambda: index.clusters(zoom, case_map.view_bbox(*CENTER, zoom)))
+        views.append({"zoom": zoom, "view_ms": round(ms, 3), "markers": len(shown),
+                      "cases": sum(c["count"] for c in shown)})
+        print(f"{zoom:>6}{ms:>10.2f}{len(shown):>10}{views[-1]['cases']:>10}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"cases": args.cases, "build_s": round(build_s, 2), "add_one_ms": round(add_ms, 3),
+                       "views": views}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Cost of what the cases section of the app does on each rerun (total count,
+latest case, channel breakdown, one page of the table) as the case store
+grows, plus batched insert throughput. The per-rerun cost should stay
+roughly flat from 100 to 1,000,000 cases.
+
+Usage: python benchmarks/bench_case_store.py [--sizes 100,10000,1000000] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import case_store
+
+CHANNELS = ["Form", "Text", "Email", "Phone Call"]
+
+
+def make_cases(start, count):
+    for n in range(start, start + count):
+        yield {
+            'case_id': f"RPC-{20260101 + n // 100000}-{n % 100000:05d}",
+            'customer_name': f"Customer {n}",
+            'contact_channel': CHANNELS[n % 4],
+            'zip': f"{47000 + n % 900}",
+            'initial_contact_datetime': f"2026-{1 + n % 12:02d}-{1 + n % 28:02d} 10:00:00",
+            'street_address': f"{n % 9000} Main St",
+            'gps_lat': 38.0 + (n % 1000) / 1000,
+            'gps_lng': -87.0 - (n % 1000) / 1000,
+            'raw_comments': "Tree limbs resting on the power lines behind the house.",
+        }
+
+def rerun(store):
+    store.count()
+    store.latest()
+    store.channel_counts()
+    store.page(0)
+
+def timed_ms(fn, repeat=20):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return 1000 * sorted(times)[len(times) // 2]
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="100,10000,1000000", help="store sizes to measure")
+    ap.add_argument("--json", help="also write results to this file")
+    args = ap.parse_args()
+
+    print("=" * 60)
+    print("CASE STORE: per-rerun cost by store size (median ms)")
+    print("=" * 60)
+    print(f"{'cases':>10}{'insert/s':>12}{'rerun':>10}{'page 100':>10}{'by zip':>10}")
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        store = case_store.CaseStore(os.path.join(tmp, "cases.sqlite"))
+        have = 0
+        for size in [int(s) for s in args.sizes.split(",")]:
+            start = time.perf_counter()
+            store.add_many(make_cases(have, size - have))
+            insert_rate = (size - have) / (time.perf_counter() - start)
+            have = size
+            row = {
+                "cases": size,
+                "insert_per_s": round(insert_rate),
+                "rerun_ms": round(timed_ms(lambda: rerun(store)), 3),
+                "page_100_ms": round(timed_ms(lambda: store.page(100)), 3),
+                "count_by_zip_ms": round(timed_ms(lambda: store.count(zip="47123")), 3),
+            }
+            results.append(row)
+            print(f"{size:>10}{row['insert_per_s']:>12}{row['rerun_ms']:>10.2f}"
+                  f"{row['page_100_ms']:>10.2f}{row['count_by_zip_ms']:>10.2f}")
+        store.close()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Messages per second for email_ingest.ingest on a generated mbox export:
+in-process vs. the process pool at several worker counts, against the
+naive approach (mailbox.mbox + email parsing + parse_messy_text on the
+whole message).
+
+Usage: python benchmarks/bench_email.py [--messages 20000] [--workers 1,2,4] [--json out.json]
+"""
+
+import argparse
+import email
+import email.policy
+import json
+import mailbox
+import os
+import sys
+import tempfile
+import time
+from email.message import EmailMessage
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import email_ingest, parsing
+from bench_parsing import make_document
+
+
+def write_mbox(path, count):
+    box = mailbox.mbox(path)
+    for i in range(count):
+        msg = EmailMessage()
+        msg["From"] = f"Customer {i} <customer{i}@example.com>"
+        msg["Date"] = "Mon, 16 Feb 2026 09:30:00 -0600"
+        msg["Subject"] = f"Tree trimming request #{i}"
+        msg.set_content(make_document(1, seed=i))
+        box.add(msg)
+    box.flush()
+    box.close()
+
+def naive(path):
+    for message in mailbox.mbox(path, factory=lambda f: email.message_from_binary_file(f, policy=email.policy.default)):
+        parsing.parse_messy_text(message.as_string())
+
+def rate(fn, count):
+    start = time.perf_counter()
+    fn()
+    return count / (time.perf_counter() - start)
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--messages", type=int, default=20000)
+    ap.add_argument("--workers", default="1,2,4", help="process pool sizes to try")
+    ap.add_argument("--json", help="also write results to this file")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "export.mbox")
+        write_mbox(path, args.messages)
+        size_mb = os.path.getsize(path) / 1e6
+
+        print("=" * 60)
+        print(f"EMAIL INGEST: {args.messages} messages, {size_mb:.1f} MB mbox")
+        print("=" * 60)
+        results = {"messages": args.messages, "mbox_mb": round(size_mb, 1)}
+        results["naive_msg_s"] = rate(lambda: naive(path), args.messages)
+        results["in_process_msg_s"] = rate(lambda: sum(1 for _ in email_ingest.ingest([path], max_workers=0)),
+                                           args.messages)
+        for workers in [int(w) for w in args.workers.split(",")]:
+            results[f"pool_{workers}_msg_s"] = rate(
+                lambda: sum(1 for _ in email_ingest.ingest([path], max_workers=workers)), args.messages)
+
+    for key, value in results.items():
+        if key.endswith("_msg_s"):
+            results[key] = round(value)
+            print(f"{key[:-6]:>14}: {value:>8.0f} msg/s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
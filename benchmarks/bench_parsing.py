@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Throughput of parsing.parse_messy_text against the original multi-search
+implementation (parse_multipass below), in MB/s, on
+email-thread-like documents of increasing size. Also checks that both
+return identical results.
+
+Usage: python benchmarks/bench_parsing.py [--sizes 10,100,1000] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import parsing
+
+FILLER = [
+    "I have a large dead oak across the road from my property.",
+    "It drops branches everywhere. Can someone take a look at it?",
+    "Sent from my iPhone",
+    "On Tue, Feb 10, 2026 at 4:12 PM John Johnson wrote:",
+    "> Thanks for reaching out, we will schedule a crew.",
+    "Meeting moved to 10:30 AM, see you then.",
+]
+TAIL = "\nProperty Owner: Jane Doe\nDate: 2-11-26\nService Address: 555 N CR 215 E\njanedoe221@gmail.com 555-812-5555\nworried about the power lines\n"
+
+
+def parse_multipass(text):
+    """The original parse_messy_text (one regex search per field), kept here as the reference."""
+    if not text:
+        return {}
+    email = re.search(parsing.email_regex, text)
+    phone = re.search(parsing.phone_regex, text)
+    return {
+        "email": email.group(0) if email else None,
+        "phone": phone.group(0) if phone else None,
+        "street_address": parsing.extract_potential_address(text),
+        "risk_flags": parsing.extract_risk_warnings(text),
+        "customer_name": parsing.extract_label_value(text, parsing.name_label_regex),
+        "initial_contact_datetime": parsing.extract_label_value(text, parsing.date_label_regex),
+        "raw_comments": text
+    }
+
+def make_document(kb, seed=0):
+    """Roughly `kb` KB of quoted email thread, with the labelled fields at the end."""
+    rnd = random.Random(seed)
+    lines, size = [], 0
+    while size < kb * 1024:
+        line = rnd.choice(FILLER)
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines) + TAIL
+
+def throughput(fn, text, min_time=0.5):
+    runs, start = 0, time.perf_counter()
+    while True:
+        fn(text)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return runs * len(text) / elapsed / 1e6
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="1,10,100,1000", help="document sizes in KB")
+    ap.add_argument("--json", help="also write results to this file")
+    args = ap.parse_args()
+
+    print("=" * 60)
+    print("PARSING THROUGHPUT (MB/s)")
+    print("=" * 60)
+    print(f"{'size KB':>8}{'multipass':>12}{'single':>12}{'speedup':>10}  same")
+    results = []
+    for kb in [int(s) for s in args.sizes.split(",")]:
+        text = make_document(kb)
+        same = parsing.parse_messy_text(text) == parse_multipass(text)
+        old = throughput(parse_multipass, text)
+        new = throughput(parsing.parse_messy_text, text)
+        results.append({"size_kb": kb, "multipass_mb_s": round(old, 2), "single_pass_mb_s": round(new, 2),
+                        "speedup": round(new / old, 2), "identical": same})
+        print(f"{kb:>8}{old:>12.1f}{new:>12.1f}{new / old:>9.1f}x  {'✅' if same else '❌'}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
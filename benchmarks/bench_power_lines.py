@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Nearest primary/secondary line distance (utils/power_lines.py) over a
+synthetic distribution network: a street grid with a line every ~200 m
+(every 5th one primary) across a 0.5 x 0.5 degree town, and case points
+scattered over it. Reports load time, segments indexed, mean µs per
+case and bulk cases/s. Per-case cost should be well under 1 ms.
+
+Usage: python benchmarks/bench_power_lines.py [--streets 250] [--cases 100000] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import power_lines
+
+ORIGIN = (38.05, -87.75)
+SIZE = 0.5  # degrees
+
+
+def street_grid(streets, rnd):
+    """GeoJSON-style features: `streets` east-west and `streets` north-south lines, with some wiggle."""
+    step = SIZE / streets
+    for n in range(streets):
+        props = {"LINE_CLASS": "Primary" if n % 5 == 0 else "Secondary"}
+        lat = ORIGIN[0] + n * step
+        row = [[ORIGIN[1] + k * SIZE / 20, lat + rnd.uniform(-step / 4, step / 4)] for k in range(21)]
+        lng = ORIGIN[1] + n * step
+        col = [[lng + rnd.uniform(-step / 4, step / 4), ORIGIN[0] + k * SIZE / 20] for k in range(21)]
+        yield {"properties": props, "geometry": {"type": "LineString", "coordinates": row}}
+        yield {"properties": props, "geometry": {"type": "LineString", "coordinates": col}}
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--streets", type=int, default=250, help="streets (lines) in each direction")
+    ap.add_argument("--cases", type=int, default=100000, help="case points to look up")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", help="also write results to this file")
+    args = ap.parse_args()
+
+    rnd = random.Random(args.seed)
+    features = list(street_grid(args.streets, rnd))
+    start = time.perf_counter()
+    network = power_lines.LineNetwork.from_features(features)
+    load_s = time.perf_counter() - start
+
+    points = [(ORIGIN[0] + rnd.uniform(0, SIZE), ORIGIN[1] + rnd.uniform(0, SIZE)) for _ in range(args.cases)]
+    start = time.perf_counter()
+    results = network.nearest_many(points)
+    bulk_s = time.perf_counter() - start
+    found = sum(r["primary"] is not None for r in results)
+
+    row = {
+        "lines": network.lines,
+        "segments": len(network),
+        "load_s": round(load_s, 2),
+        "cases": args.cases,
+        "per_case_us": round(1e6 * bulk_s / args.cases, 1),
+        "cases_per_s": round(args.cases / bulk_s),
+        "primary_within_500m": round(found / args.cases, 3),
+    }
+    print("=" * 60)
+    print("POWER-LINE PROXIMITY")
+    print("=" * 60)
+    for key, value in row.items():
+        print(f"{key:>22}: {value}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(row, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+OCR time vs. field-extraction accuracy for different preprocessing settings.
+Runs every configuration in CONFIGS over the images in tests/fixtures and
+scores the parsed fields against tests/fixtures/labels.json.
+
+Usage: python benchmarks/bench_preprocess.py [--repeat N] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image
+from utils import ocr, parsing, preprocess
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'tests', 'fixtures')
+
+CONFIGS = {
+    "none": False,
+    "default": {},
+    "gray_only": {"autocrop": False, "max_pixels": None, "target_dpi": None},
+    "binarize": {"binarize": True},
+    "deskew": {"deskew": True},
+    "all": {"binarize": True, "deskew": True},
+    "small_2mp": {"max_pixels": 2000000},
+}
+
+
+def _norm(value):
+    return re.sub(r'[^a-z0-9]', '', str(value).lower())
+
+def field_accuracy(parsed, labels):
+    """Fraction of labelled fields whose expected value was found."""
+    correct = 0
+    for field, expected in labels.items():
+        got = parsed.get(field)
+        if isinstance(expected, list):
+            ok = all(e in (got or []) for e in expected)
+        else:
+            ok = bool(got) and _norm(expected) in _norm(got)
+        correct += ok
+    return correct / len(labels) if labels else 1.0
+
+def run(repeat):
+    labels = json.load(open(os.path.join(FIXTURES, 'labels.json')))
+    ocr_available = ocr.is_tesseract_installed()
+    results = []
+    for name, options in CONFIGS.items():
+        settings = dict(ocr.DEFAULT_OCR_SETTINGS, preprocess=options)
+        prep_time = ocr_time = 0.0
+        accuracy = []
+        for fixture, expected in labels.items():
+            image = Image.open(os.path.join(FIXTURES, fixture))
+            image.load()
+            for _ in range(repeat):
+                start = time.perf_counter()
+                prepared = preprocess.preprocess_image(image, options)
+                prep_time += time.perf_counter() - start
+                if ocr_available:
+                    start = time.perf_counter()
+                    # Preprocessing already applied above
+                    text = ocr.extract_text_from_image(prepared, dict(settings, preprocess=False))
+                    ocr_time += time.perf_counter() - start
+            if ocr_available:
+                accuracy.append(field_accuracy(parsing.parse_messy_text(text), expected))
+        runs = repeat * len(labels)
+        results.append({
+            "config": name,
+            "preprocess_ms": round(1000 * prep_time / runs, 2),
+            "ocr_ms": round(1000 * ocr_time / runs, 2) if ocr_available else None,
+            "accuracy": round(sum(accuracy) / len(accuracy), 3) if accuracy else None,
+        })
+    return results, ocr_available
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=3, help="runs per image and setting (at least 1)")
+    ap.add_argument("--json", help="also write results to this file")
+    args = ap.parse_args()
+    if args.repeat < 1:
+        ap.error("--repeat must be at least 1")
+
+    results, ocr_available = run(args.repeat)
+    print("=" * 60)
+    print("PREPROCESSING BENCHMARK (per image)")
+    print("=" * 60)
+    print(f"{'config':<12}{'prep ms':>10}{'ocr ms':>10}{'accuracy':>10}")
+    for r in results:
+        ocr_ms = f"{r['ocr_ms']:.1f}" if r['ocr_ms'] is not None else "n/a"
+        acc = f"{r['accuracy']:.2f}" if r['accuracy'] is not None else "n/a"
+        print(f"{r['config']:<12}{r['preprocess_ms']:>10.1f}{ocr_ms:>10}{acc:>10}")
+    if not ocr_available:
+        print("\n⚠️  Tesseract not installed: only preprocessing time was measured.")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Scalar vs Series standardization over a column of synthetic values:
+standardize_phone, standardize_date and normalize_text called once per
+row, against their *_series versions on the whole column. Checks that
+both give the same values.
+
+Usage: python benchmarks/bench_standardize.py [--rows 1000000] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import standardize, synthetic
+
+
+def make_columns(rows, seed=0):
+    generator = synthetic.CorpusGenerator(seed)
+    rnd = random.Random(seed)
+    phones, dates, names = [], [], []
+    for i in range(rows):
+        phones.append(generator._phone(rnd)[0])
+        dates.append(generator._date(rnd)[0])
+        names.append(f"  {generator._name(rnd).lower()}  {i}")
+    return {"phone": phones, "date": dates, "name": names}
+
+def run(label, scalar, vectorized, values):
+    start = time.perf_counter()
+    expected = [scalar(v) for v in values]
+    scalar_s = time.perf_counter() - start
+
+    column = pd.Series(values)
+    start = time.perf_counter()
+    result = vectorized(column)
+    series_s = time.perf_counter() - start
+    return {
+        "function": label,
+        "rows": len(values),
+        "scalar_s": round(scalar_s, 3),
+        "series_s": round(series_s, 3),
+        "speedup": round(scalar_s / series_s, 1),
+        "identical": list(result) == expected,
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=1000000)
+    ap.add_argument("--json", help="also write results to this file")
+    args = ap.parse_args()
+
+    columns = make_columns(args.rows)
+    results = [
+        run("standardize_phone", standardize.standardize_phone, standardize.standardize_phone_series,
+            columns["phone"]),
+        run("standardize_date", standardize.standardize_date, standardize.standardize_date_series,
+            columns["date"]),
+        run("normalize_text", standardize.normalize_text, standardize.normalize_text_series,
+            columns["name"]),
+    ]
+
+    print("=" * 70)
+    print(f"STANDARDIZATION: {args.rows} rows")
+    print("=" * 70)
+    print(f"{'function':<20}{'scalar s':>10}{'series s':>10}{'speedup':>10}  identical")
+    for row in results:
+        print(f"{row['function']:<20}{row['scalar_s']:>10}{row['series_s']:>10}{row['speedup']:>9}x"
+              f"  {'✅' if row['identical'] else '❌'}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Service-territory checks (utils/territory.py) against a wiggly polygon
+with tens of thousands of boundary vertices: index build time, the
+per-geocode contains() cost, contains_many() over a whole column of
+points, and validate_store() over a case store (read + check).
+
+Usage: python benchmarks/bench_territory.py [--vertices 20000] [--points 1000000] [--store-cases 200000] [--json out.json]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import case_store, territory
+
+CENTER = (38.3, -87.5)
+
+
+def territory_ring(vertices, rnd):
+    """A roughly 100 km wide blob whose radius wanders like a county boundary."""
+    ring, r = [], 0.5
+    for n in range(vertices):
+        r = min(0.7, max(0.3, r + rnd.uniform(-0.01, 0.01)))
+        angle = 2 * math.pi * n / vertices
+        ring.append([CENTER[1] + r * math.cos(angle), CENTER[0] + r * math.sin(angle)])
+    return ring
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--vertices", type=int, default=20000)
+    ap.add_argument("--points", type=int, default=1000000, help="points for contains_many")
+    ap.add_argument("--store-cases", type=int, default=200000, help="cases for validate_store (0 to skip)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", help="also write results to this file")
+    args = ap.parse_args()
+
+    import numpy as np
+
+    rnd = random.Random(args.seed)
+    start = time.perf_counter()
+    area = territory.ServiceTerritory([[territory_ring(args.vertices, rnd)]])
+    row = {"vertices": args.vertices, "bands": area.band_count, "build_s": round(time.perf_counter() - start, 3)}
+
+    gen = np.random.default_rng(args.seed)
+    lats = CENTER[0] + gen.uniform(-0.8, 0.8, args.points)
+    lngs = CENTER[1] + gen.uniform(-0.8, 0.8, args.points)
+    sample = list(zip(lats[:20000].tolist(), lngs[:20000].tolist()))
+    start = time.perf_counter()
+    for lat, lng in sample:
+        area.contains(lat, lng)
+    row["contains_us"] = round(1e6 * (time.perf_counter() - start) / len(sample), 2)
+    start = time.perf_counter()
+    inside = area.contains_many(lats, lngs)
+    row["contains_many_s"] = round(time.perf_counter() - start, 3)
+    row["points"] = args.points
+    row["inside_share"] = round(float(inside.mean()), 3)
+
+    if args.store_cases:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = case_store.CaseStore(os.path.join(tmp, "cases.sqlite"))
+            store.add_many({"case_id": f"RPC-{n:07d}", "gps_lat": float(lats[n % args.points]),
+                            "gps_lng": float(lngs[n % args.points])} for n in range(args.store_cases))
+            start = time.perf_counter()
+            result = territory.validate_store(store, area)
+            row["validate_store_s"] = round(time.perf_counter() - start, 3)
+            row["store_cases"] = result["checked"]
+            store.close()
+
+    print("=" * 60)
+    print("SERVICE TERRITORY CHECKS")
+    print("=" * 60)
+    for key, value in row.items():
+        print(f"{key:>18}: {value}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(row, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Generate a reproducible synthetic intake corpus for load testing: forms,
+text-message transcripts and emails with ground-truth labels, streamed
+to JSON lines (optionally gzipped) so any size fits in constant memory.
+
+Usage:
+    python benchmarks/generate_corpus.py --count 1000000 --output corpus.jsonl.gz
+    python benchmarks/generate_corpus.py --count 500 --output corpus.jsonl --images images/
+    python benchmarks/generate_corpus.py --count 100000 --kinds email --mbox emails.mbox
+
+Each JSON line is {"id", "kind", "text", "labels"}; see utils/synthetic.py.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import synthetic
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--count", type=int, default=10000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--start", type=int, default=0, help="first record number (to generate a corpus in parts)")
+    ap.add_argument("--kinds", default=",".join(synthetic.KINDS), help="comma-separated: form,text,email")
+    ap.add_argument("--risk-rate", type=float, default=0.6, help="share of records mentioning a risk")
+    ap.add_argument("--output", "-o", help="JSON-lines output (.jsonl or .jsonl.gz)")
+    ap.add_argument("--mbox", help="also write email records to this mbox file")
+    ap.add_argument("--images", help="directory for rendered page images (PNG)")
+    ap.add_argument("--image-every", type=int, default=1, help="render every Nth record only")
+    args = ap.parse_args()
+    if not (args.output or args.mbox or args.images):
+        ap.error("give at least one of --output, --mbox, --images")
+
+    generator = synthetic.CorpusGenerator(args.seed, kinds=args.kinds.split(","), risk_rate=args.risk_rate)
+    if args.images:
+        os.makedirs(args.images, exist_ok=True)
+    mbox = open(args.mbox, "w", encoding="utf-8") if args.mbox else None
+    start = time.perf_counter()
+
+    def records():
+        for n, record in enumerate(generator.iter_records(args.count, args.start)):
+            if mbox is not None and record["kind"] == "email":
+                mbox.write(synthetic.mbox_message(record))
+            if args.images and n % args.image_every == 0:
+                path = os.path.join(args.images, f"{record['id']}.png")
+                synthetic.render_image(record).save(path)
+                record["image"] = path
+            yield record
+
+    try:
+        if args.output:
+            count = synthetic.write_jsonl(records(), args.output)
+        else:
+            count = sum(1 for _ in records())
+    finally:
+        if mbox is not None:
+            mbox.close()
+    elapsed = time.perf_counter() - start
+    print(f"✅ {count} records in {elapsed:.1f}s ({count / elapsed:.0f}/s)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
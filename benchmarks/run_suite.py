@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark suite for every stage of the intake pipeline: parsing,
+standardization, filename generation, OCR on the test fixtures and
+geocoding against an in-process stub of Nominatim (no network).
+
+Each benchmark times every input of a synthetic corpus separately and
+reports p50/p90/p99/max latency and throughput. Results are written as
+JSON; with --compare, p50 and p90 are checked against a stored baseline
+and the run exits with status 1 if any got slower than --threshold.
+Timings are absolute, so the checked-in baseline.json only holds for the
+machine it was recorded on (see its "meta"); re-record it with
+--save-baseline on the machine that runs the comparison, and after any
+change that is meant to move a stage's latency.
+
+Usage:
+    python benchmarks/run_suite.py [--scale 1] [--only parse,phone] [--json out.json]
+    python benchmarks/run_suite.py --save-baseline          # write benchmarks/baseline.json
+    python benchmarks/run_suite.py --compare benchmarks/baseline.json [--threshold 0.5]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image
+from utils import geocode, geocode_cache, local_geocoder, ocr, parsing, standardize
+from bench_parsing import make_document
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'tests', 'fixtures')
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+PERCENTILES = (50, 90, 99)
+# Differences smaller than this are timer noise, whatever the ratio
+MIN_REGRESSION_US = 5.0
+
+STREETS = ["Main St", "N CR 215 E", "Oak Avenue", "Elm Dr", "County Road 9", "W 5th Street"]
+CITIES = [("Baileyville", "IN", "47501"), ("Springfield", "IL", "62701"), ("Jasper", "IN", "47546")]
+DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%m-%d-%y", "%B %d, %Y", "%A, %B %d, %Y %I:%M %p",
+                "%d %b %Y %H:%M", "%Y-%m-%dT%H:%M:%S"]
+PHONE_FORMATS = ["({a}) {b}-{c}", "{a}-{b}-{c}", "{a}.{b}.{c}", "+1 {a} {b} {c}", "1{a}{b}{c}", "{a}{b}{c}"]
+
+
+# --- synthetic corpora -------------------------------------------------------
+
+def make_dates(n, rnd):
+    start = datetime.datetime(2020, 1, 1)
+    values = []
+    for _ in range(n):
+        dt = start + datetime.timedelta(minutes=rnd.randrange(6 * 365 * 24 * 60))
+        values.append(dt.strftime(rnd.choice(DATE_FORMATS)))
+    return values
+
+def make_phones(n, rnd):
+    return [rnd.choice(PHONE_FORMATS).format(a=rnd.randint(200, 999), b=rnd.randint(200, 999),
+                                             c=f"{rnd.randint(0, 9999):04d}") for _ in range(n)]
+
+def make_addresses(n, rnd):
+    addresses = []
+    for _ in range(n):
+        city, state, zip_code = rnd.choice(CITIES)
+        addresses.append((f"{rnd.randint(1, 9999)} {rnd.choice(STREETS)}", city, state, zip_code))
+    return addresses
+
+
+# --- stub geocoder -----------------------------------------------------------
+
+class StubLocation:
+    def __init__(self, lat, lng, address):
+        self.latitude = lat
+        self.longitude = lng
+        self.address = address
+
+class StubGeolocator:
+    """Answers instantly, so the benchmark measures our code rather than the network."""
+
+    def geocode(self, address, timeout=None, **kwargs):
+        h = zlib.crc32(address.encode("utf-8"))  # same in every run, unlike hash()
+        return StubLocation(38 + (h % 1000) / 1000, -87 - (h % 997) / 1000, address)
+
+def install_stub_geocoder(tmp):
+    geocode._geolocator = StubGeolocator()
+    geocode.nominatim_limiter = geocode.TokenBucket(rate=1e9, capacity=1e9)
+    local_geocoder.set_default_index(None)
+    fd, path = tempfile.mkstemp(suffix=".sqlite", dir=tmp)
+    os.close(fd)
+    cache = geocode_cache.GeocodeCache(path)
+    geocode_cache.get_default_cache = lambda: cache
+    return cache
+
+
+# --- benchmarks --------------------------------------------------------------
+# Each returns (inputs, fn); fn(input) is timed once per input.
+
+def bench_parse(scale, rnd, tmp):
+    docs = [make_document(kb, seed=i) for i, kb in enumerate([1, 4, 16] * (20 * scale))]
+    return docs, parsing.parse_messy_text
+
+def bench_standardize_date(scale, rnd, tmp):
+    return make_dates(2000 * scale, rnd), standardize.standardize_date
+
+def bench_standardize_phone(scale, rnd, tmp):
+    return make_phones(5000 * scale, rnd), standardize.standardize_phone
+
+def bench_generate_filename(scale, rnd, tmp):
+    inputs = [(f"RPC-20260215-{i:05d}", street, city, state)
+              for i, (street, city, state, _) in enumerate(make_addresses(5000 * scale, rnd))]
+    return inputs, lambda args: standardize.generate_filename(*args)
+
+def bench_ocr(scale, rnd, tmp):
+    if not ocr.is_tesseract_installed():
+        return None, "Tesseract not installed"
+    images = []
+    for name in sorted(os.listdir(FIXTURES)):
+        if name.endswith(".png"):
+            image = Image.open(os.path.join(FIXTURES, name))
+            image.load()
+            images.append(image)
+    return images * (2 * scale), ocr.extract_text_from_image
+
+def _full_addresses(scale, rnd):
+    return [f"{street}, {city}, {state} {zip_code}" for street, city, state, zip_code in
+            make_addresses(2000 * scale, rnd)]
+
+def bench_geocode_uncached(scale, rnd, tmp):
+    install_stub_geocoder(tmp)
+    return _full_addresses(scale, rnd), lambda a: geocode.get_lat_long(a, use_cache=False)
+
+def bench_geocode_cached(scale, rnd, tmp):
+    install_stub_geocoder(tmp)
+    addresses = _full_addresses(scale, rnd)
+    for address in addresses:
+        geocode.get_lat_long(address)  # warm the cache
+    return addresses, geocode.get_lat_long
+
+def bench_geocode_local_index(scale, rnd, tmp):
+    install_stub_geocoder(tmp)
+    points = make_addresses(2000 * scale, rnd)
+    index = local_geocoder.AddressPointIndex.from_records(
+        {"street": street, "city": city, "state": state, "zip": zip_code, "lat": 38.0, "lng": -87.0}
+        for street, city, state, zip_code in points)
+    local_geocoder.set_default_index(index)
+    return [f"{street}, {city}, {state} {zip_code}" for street, city, state, zip_code in points], \
+        geocode.get_lat_long
+
+BENCHMARKS = {
+    "parse": bench_parse,
+    "standardize_date": bench_standardize_date,
+    "standardize_phone": bench_standardize_phone,
+    "generate_filename": bench_generate_filename,
+    "ocr": bench_ocr,
+    "geocode_uncached": bench_geocode_uncached,
+    "geocode_cached": bench_geocode_cached,
+    "geocode_local_index": bench_geocode_local_index,
+}
+
+
+# --- measurement -------------------------------------------------------------
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-p * len(sorted_values) // 100))  # ceil(p/100 * n)
+    return sorted_values[int(rank) - 1]
+
+def measure(inputs, fn, rounds=5, warmup=20):
+    """
+    Latency stats over `rounds` passes through the inputs. Each round's
+    latencies are sorted, and the fastest round's value is kept for every
+    percentile, which filters out passes disturbed by other load on the machine.
+    """
+    for item in inputs[:warmup]:
+        fn(item)
+    clock = time.perf_counter
+    runs = []
+    for _ in range(rounds):
+        latencies = []
+        for item in inputs:
+            start = clock()
+            fn(item)
+            latencies.append(clock() - start)
+        latencies.sort()
+        runs.append(latencies)
+    latencies = [min(values) for values in zip(*runs)]
+    total = sum(latencies)
+    result = {"n": len(latencies), "rounds": rounds}
+    for p in PERCENTILES:
+        result[f"p{p}_us"] = round(1e6 * percentile(latencies, p), 2)
+    result["max_us"] = round(1e6 * latencies[-1], 2)
+    result["mean_us"] = round(1e6 * total / len(latencies), 2)
+    result["per_s"] = round(len(latencies) / total, 1) if total else None
+    return result
+
+def run_suite(names, scale, seed=0, rounds=5):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in names:
+            inputs, fn = BENCHMARKS[name](scale, random.Random(seed), tmp)
+            if inputs is None:
+                results[name] = {"skipped": fn}
+                continue
+            results[name] = measure(inputs, fn, rounds)
+    return results
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(results, baseline, threshold):
+    """
+    Regressions against a baseline: benchmarks whose p50 or p90 grew by
+    more than `threshold` (0.5 = 50%) and by more than MIN_REGRESSION_US.
+    """
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before or "skipped" in current or "skipped" in before:
+            continue
+        for metric in ("p50_us", "p90_us"):
+            old, new = before.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            if new > old * (1 + threshold) and new - old > MIN_REGRESSION_US:
+                regressions.append({"benchmark": name, "metric": metric, "baseline": round(old, 2),
+                                    "current": new, "change": round(new / old - 1, 3)})
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scale", type=int, default=1, help="multiplies the size of every corpus")
+    ap.add_argument("--only", help="comma-separated benchmark names (default: all)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--rounds", type=int, default=5, help="passes over each corpus")
+    ap.add_argument("--json", help="write results to this file")
+    ap.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+                    help="write results as the baseline (default: benchmarks/baseline.json)")
+    ap.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+                    help="compare against a baseline (default: benchmarks/baseline.json)")
+    ap.add_argument("--threshold", type=float, default=0.5, help="allowed slowdown before flagging (0.5 = 50%%)")
+    args = ap.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        ap.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    results = run_suite(names, args.scale, args.seed, args.rounds)
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": args.scale,
+            "seed": args.seed,
+            "rounds": args.rounds,
+        },
+        "results": results,
+    }
+
+    print("=" * 72)
+    print(f"INTAKE BENCHMARK SUITE (scale {args.scale}, latencies in µs)")
+    print("=" * 72)
+    print(f"{'benchmark':<22}{'n':>7}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>11}{'per s':>11}")
+    for name, r in results.items():
+        if "skipped" in r:
+            print(f"{name:<22}  skipped: {r['skipped']}")
+            continue
+        print(f"{name:<22}{r['n']:>7}{r['p50_us']:>10.1f}{r['p90_us']:>10.1f}{r['p99_us']:>10.1f}"
+              f"{r['max_us']:>11.1f}{r['per_s']:>11.0f}")
+
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.threshold)
+        report["regressions"] = regressions
+        print()
+        if regressions:
+            status = 1
+            print(f"❌ {len(regressions)} regression(s) vs {args.compare} "
+                  f"(baseline commit {baseline['meta'].get('commit')}):")
+            for r in regressions:
+                print(f"   {r['benchmark']} {r['metric']}: {r['baseline']} -> {r['current']} µs "
+                      f"(+{100 * r['change']:.0f}%)")
+        else:
+            print(f"✅ No regressions vs {args.compare} (threshold {100 * args.threshold:.0f}%)")
+
+    for path in filter(None, [args.json, args.save_baseline]):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
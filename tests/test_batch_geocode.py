@@ -0,0 +1,93 @@
+import pytest
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from geopy.exc import GeocoderTimedOut
+
+from utils import batch_geocode, geocode, geocode_cache
+
+FAST_LIMITER = geocode.TokenBucket(rate=10000, capacity=100)
+
+
+class StubLookup:
+    """Local stand-in for nominatim_lookup that fails the first N calls per address."""
+
+    def __init__(self, flaky=0):
+        self.flaky = flaky
+        self.calls = {}
+
+    def __call__(self, address):
+        n = self.calls.get(address, 0)
+        self.calls[address] = n + 1
+        if n < self.flaky:
+            raise GeocoderTimedOut("stub timeout")
+        if "nowhere" in address.lower():
+            return None
+        return 38.0, -87.0, address.upper()
+
+
+def run(addresses, lookup, **kwargs):
+    kwargs.setdefault("use_cache", False)
+    kwargs.setdefault("limiter", FAST_LIMITER)
+    return sorted(batch_geocode.geocode_batch(addresses, lookup=lookup, backoff=0, **kwargs))
+
+def test_batch_deduplicates_normalized_addresses():
+    """Test that spelling variants of one address cost a single lookup."""
+    lookup = StubLookup()
+    addresses = ["12 Main Street, Jasper IN", "12 main st jasper in", "5 Oak Ave", "", "12 MAIN ST, JASPER, IN"]
+    results = run(addresses, lookup)
+
+    assert [r[0] for r in results] == [0, 1, 2, 3, 4]
+    assert sum(lookup.calls.values()) == 2
+    assert results[3][2] == (None, None, "No address provided")
+    assert results[0][2] == results[1][2] == results[4][2]
+
+def test_batch_retries_transient_errors():
+    """Test that timeouts are retried and reported."""
+    lookup = StubLookup(flaky=2)
+    seen = []
+    results = run(["12 Main St"], lookup, retries=3, progress=lambda s: seen.append(s.as_dict()))
+
+    assert results[0][2][0] == 38.0
+    assert seen[-1]["retries"] == 2
+    assert seen[-1]["done"] == 1
+
+def test_batch_gives_up_after_retries():
+    """Test that persistent failures yield an error instead of raising."""
+    results = run(["12 Main St"], StubLookup(flaky=10), retries=1)
+    lat, lng, message = results[0][2]
+    assert lat is None and "timed out" in message
+
+def test_batch_uses_and_fills_cache(tmp_path, monkeypatch):
+    """Test that found and not-found results are cached, errors are not."""
+    cache = geocode_cache.GeocodeCache(str(tmp_path / "c.sqlite"))
+    monkeypatch.setattr(geocode_cache, "get_default_cache", lambda: cache)
+    lookup = StubLookup()
+
+    run(["12 Main St", "1 Nowhere Rd"], lookup, use_cache=True)
+    run(["12 Main St", "1 Nowhere Rd"], lookup, use_cache=True)
+
+    assert sum(lookup.calls.values()) == 2
+    assert cache.get("1 Nowhere Rd") == (None, None, "Address not found")
+
+def test_batch_stops_when_consumer_stops():
+    """Test that closing the generator early does not run the remaining lookups."""
+    calls = []
+
+    def slow_lookup(address):
+        calls.append(address)
+        time.sleep(0.05)
+        return 38.0, -87.0, address
+
+    results = batch_geocode.geocode_batch([f"{n} Main St" for n in range(1, 41)], lookup=slow_lookup,
+                                          limiter=FAST_LIMITER, max_workers=2, use_cache=False)
+    next(results)
+    started = time.monotonic()
+    results.close()
+    assert time.monotonic() - started < 1
+    time.sleep(0.2)
+    assert len(calls) <= 2 * 2 + 2  # the bounded window, not all 40
@@ -0,0 +1,153 @@
+import pytest
+import sys
+import os
+import csv
+import gzip
+import io
+import json
+import struct
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import case_export, case_store
+
+
+def make_case(n):
+    return {
+        'case_id': f"RPC-20260215-{n:03d}",
+        'customer_name': f"Customer {n}",
+        'contact_channel': "Form",
+        'zip': "47501",
+        'gps_lat': 38.5,
+        'gps_lng': -87.1,
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = case_store.CaseStore(str(tmp_path / "cases.sqlite"))
+    store.add_many(make_case(n) for n in range(1, 11))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return case_export.ExportCache(str(tmp_path / "exports"))
+
+
+def read_csv(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, 'rt', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def read_parquet(path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    return pq.read_table(path).to_pylist()
+
+
+def test_iter_csv_streams_chunks(store):
+    """Test that CSV comes out in chunks that join into one valid file."""
+    chunks = list(case_export.iter_csv(store, chunk_size=3))
+    assert len(chunks) == 4
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+    assert [r['case_id'] for r in rows] == [f"RPC-20260215-{n:03d}" for n in range(1, 11)]
+
+@pytest.mark.parametrize("fmt", ["csv", "csv.gz", "parquet"])
+def test_rows_saved_during_export_are_not_duplicated(store, cache, fmt, monkeypatch):
+    """Test that an export holds exactly the rows up to the version it records."""
+    # Rows 6-10 land after the version was read, while the export runs
+    monkeypatch.setattr(store, "version", lambda: 5)
+    path = cache.get(store, fmt)
+    monkeypatch.undo()
+    read = read_parquet if fmt == "parquet" else read_csv
+    assert len(read(path)) == 5
+    path = cache.get(store, fmt)
+    assert [r['case_id'] for r in read(path)] == [f"RPC-20260215-{n:03d}" for n in range(1, 11)]
+
+@pytest.mark.parametrize("fmt", ["csv", "csv.gz"])
+def test_csv_artifact_is_reused_then_appended(store, cache, fmt):
+    """Test that unchanged stores reuse the file and new cases are appended."""
+    path = cache.get(store, fmt)
+    assert len(read_csv(path)) == 10
+    assert cache.get(store, fmt) == path
+    assert cache.stats() == {"builds": 1, "appends": 0, "hits": 1}
+
+    store.add_many(make_case(n) for n in range(11, 16))
+    rows = read_csv(cache.get(store, fmt))
+    assert [r['case_id'] for r in rows] == [f"RPC-20260215-{n:03d}" for n in range(1, 16)]
+    assert cache.stats()["appends"] == 1
+
+def test_interrupted_append_is_discarded(store, cache):
+    """Test that bytes written after the last recorded version are dropped."""
+    path = cache.get(store, "csv")
+    with open(path, 'a') as f:
+        f.write("half a row from a crashed run")
+    store.add(make_case(11))
+    rows = read_csv(cache.get(store, "csv"))
+    assert len(rows) == 11
+    assert rows[-1]['case_id'] == "RPC-20260215-011"
+
+def test_parquet_export(store, cache):
+    """Test the Parquet export and that it is rebuilt when cases are added."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = cache.get(store, "parquet")
+    table = pq.read_table(path)
+    assert table.num_rows == 10
+    assert table.column("gps_lat").to_pylist()[0] == 38.5
+
+    store.add(make_case(11))
+    assert pq.read_table(cache.get(store, "parquet")).num_rows == 11
+    assert cache.stats()["builds"] == 2
+
+def test_unknown_format(store, cache):
+    with pytest.raises(ValueError):
+        cache.get(store, "xlsx")
+
+def test_geojsonl_export_with_filters(store):
+    """Test GeoJSON features and that filters are applied by the store."""
+    store.add({'case_id': "no-location", 'contact_channel': "Email"})
+    store.add({'case_id': "far", 'contact_channel': "Form", 'gps_lat': 40.0, 'gps_lng': -80.0})
+    features = [json.loads(line) for line in b"".join(case_export.iter_geojsonl(store, chunk_size=4)).splitlines()]
+    assert len(features) == 12
+    assert features[0]["geometry"] == {"type": "Point", "coordinates": [-87.1, 38.5]}
+    assert features[0]["properties"]["case_id"] == "RPC-20260215-001"
+    assert features[10]["geometry"] is None
+
+    near = b"".join(case_export.iter_geojsonl(store, bbox=(38, -88, 39, -87), channel="Form")).splitlines()
+    assert len(near) == 10
+    assert b"".join(case_export.iter_geojsonl(store, channel="Email")).count(b"\n") == 1
+
+def test_geoparquet_export(store, tmp_path):
+    """Test the WKB geometry column and the GeoParquet metadata."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    store.add({'case_id': "no-location"})
+    path = str(tmp_path / "cases.geoparquet")
+    case_export.write_export(store, path, "geoparquet", chunk_size=4)
+    table = pq.read_table(path)
+    assert table.num_rows == 11
+    geometry = table.column("geometry").to_pylist()
+    assert struct.unpack("<BIdd", geometry[0]) == (1, 1, -87.1, 38.5)
+    assert geometry[-1] is None
+    meta = json.loads(pq.read_schema(path).metadata[b"geo"])
+    assert meta["primary_column"] == "geometry"
+    assert meta["columns"]["geometry"]["encoding"] == "WKB"
+    assert meta["columns"]["geometry"]["bbox"] == [-87.1, 38.5, -87.1, 38.5]
+
+def test_geojsonl_artifact_is_appended_and_filtered_exports_are_fresh(store, cache):
+    """Test that GeoJSON-lines is extended like CSV and filtered exports bypass the cache."""
+    path = cache.get(store, "geojsonl")
+    store.add(make_case(11))
+    with open(cache.get(store, "geojsonl")) as f:
+        assert len(f.readlines()) == 11
+    assert cache.stats()["appends"] == 1
+
+    filtered = cache.get(store, "geojsonl", channel="Email", date_from=None)
+    assert filtered != path
+    assert os.path.getsize(filtered) == 0
+    # Each filtered request gets its own file
+    other = cache.get(store, "geojsonl", channel="Form")
+    assert other != filtered
+    assert os.path.getsize(filtered) == 0 and os.path.getsize(other) > 0
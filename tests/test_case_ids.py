@@ -0,0 +1,76 @@
+import pytest
+import sys
+import os
+import multiprocessing
+import threading
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import case_ids
+
+
+def allocate_ids(path, count, block_size):
+    allocator = case_ids.CaseIdAllocator(path, block_size=block_size)
+    ids = [allocator.next_id() for _ in range(count)]
+    allocator.close()
+    return ids
+
+
+def test_ids_are_sequential_within_a_block(tmp_path):
+    """Test the ID format and that only one reservation is made per block."""
+    allocator = case_ids.CaseIdAllocator(str(tmp_path / "ids.sqlite"), block_size=10,
+                                         clock=lambda: "20260215")
+    ids = [allocator.next_id() for _ in range(25)]
+    assert ids[0] == "RPC-20260215-00001"
+    assert ids[-1] == "RPC-20260215-00025"
+    assert ids == sorted(ids)
+    assert allocator.stats() == {"allocated": 25, "reservations": 3, "block_size": 10}
+    allocator.close()
+
+def test_numbering_restarts_each_day(tmp_path):
+    """Test that a new day gets its own sequence."""
+    day = ["20260215"]
+    allocator = case_ids.CaseIdAllocator(str(tmp_path / "ids.sqlite"), clock=lambda: day[0])
+    allocator.next_id()
+    allocator.next_id()
+    day[0] = "20260216"
+    assert allocator.next_id() == "RPC-20260216-00001"
+    allocator.close()
+
+def test_more_than_999_per_day(tmp_path):
+    """Test that the sequence does not overflow past 999 or 99999."""
+    allocator = case_ids.CaseIdAllocator(str(tmp_path / "ids.sqlite"), block_size=1000)
+    ids = [allocator.next_id() for _ in range(1500)]
+    assert len(set(ids)) == 1500
+    assert ids[1499].endswith("-01500")
+    assert case_ids.CaseIdAllocator(":memory:").width == 5
+    allocator.close()
+
+def test_allocators_sharing_a_file_never_collide(tmp_path):
+    """Test that separate allocators (as in separate workers) get disjoint blocks."""
+    path = str(tmp_path / "ids.sqlite")
+    allocators = [case_ids.CaseIdAllocator(path, block_size=7) for _ in range(4)]
+    results = [[] for _ in allocators]
+
+    def work(i):
+        results[i].extend(allocators[i].next_id() for _ in range(200))
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    all_ids = [i for r in results for i in r]
+    assert len(set(all_ids)) == 800
+    assert all(r == sorted(r) for r in results)
+    for a in allocators:
+        a.close()
+
+def test_unique_across_processes(tmp_path):
+    """Test uniqueness when several processes allocate at once."""
+    path = str(tmp_path / "ids.sqlite")
+    with multiprocessing.Pool(3) as pool:
+        results = pool.starmap(allocate_ids, [(path, 300, 25)] * 3)
+    all_ids = [i for r in results for i in r]
+    assert len(set(all_ids)) == 900
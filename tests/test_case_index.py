@@ -0,0 +1,94 @@
+import pytest
+import sys
+import os
+import random
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import case_index, case_store, geo
+
+CENTER = (38.2975, -87.5311)
+
+
+def random_points(n, seed=0, spread=0.2):
+    rnd = random.Random(seed)
+    return [(f"RPC-{i:05d}", CENTER[0] + rnd.uniform(-spread, spread), CENTER[1] + rnd.uniform(-spread, spread))
+            for i in range(n)]
+
+def brute_force(points, lat, lng):
+    return sorted((geo.haversine_m(lat, lng, plat, plng), case_id) for case_id, plat, plng in points)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = case_store.CaseStore(str(tmp_path / "cases.sqlite"))
+    yield store
+    store.close()
+
+
+def test_radius_matches_brute_force():
+    """Test radius queries against a linear scan, including across cell edges."""
+    points = random_points(5000)
+    index = case_index.CaseLocationIndex()
+    for point in points:
+        index.add(*point)
+    rnd = random.Random(1)
+    for _ in range(50):
+        lat, lng = CENTER[0] + rnd.uniform(-0.2, 0.2), CENTER[1] + rnd.uniform(-0.2, 0.2)
+        for radius in (50, 200, 1500):
+            expected = [case_id for d, case_id in brute_force(points, lat, lng) if d <= radius]
+            assert [n["case_id"] for n in index.radius(lat, lng, radius)] == expected
+
+def test_nearest_matches_brute_force():
+    """Test k-nearest queries, dense and sparse."""
+    for n in (5000, 30):
+        points = random_points(n, seed=n)
+        index = case_index.CaseLocationIndex()
+        for point in points:
+            index.add(*point)
+        rnd = random.Random(2)
+        for _ in range(30):
+            lat, lng = CENTER[0] + rnd.uniform(-0.3, 0.3), CENTER[1] + rnd.uniform(-0.3, 0.3)
+            expected = [case_id for d, case_id in brute_force(points, lat, lng)[:7]]
+            assert [r["case_id"] for r in index.nearest(lat, lng, k=7)] == expected
+
+def test_nearest_max_distance():
+    """Test that max_distance_m bounds the nearest search."""
+    index = case_index.CaseLocationIndex()
+    index.add("near", CENTER[0] + 0.001, CENTER[1])
+    index.add("far", CENTER[0] + 0.1, CENTER[1])
+    assert [r["case_id"] for r in index.nearest(*CENTER, k=2, max_distance_m=1000)] == ["near"]
+    assert index.nearest(*CENTER, k=2, max_distance_m=10) == []
+
+def test_missing_coordinates_are_skipped():
+    """Test that cases without a usable location are not indexed."""
+    index = case_index.CaseLocationIndex()
+    assert not index.add("a", None, None)
+    assert not index.add("b", 0.0, 0.0)
+    assert index.add("c", *CENTER)
+    assert len(index) == 1
+
+def test_refresh_is_incremental(store):
+    """Test that refresh only reads cases saved since the last one."""
+    store.add_many({"case_id": case_id, "gps_lat": lat, "gps_lng": lng} for case_id, lat, lng in random_points(100))
+    store.add({"case_id": "no-location"})
+    index = case_index.CaseLocationIndex().refresh(store)
+    assert len(index) == 100
+    assert index.version == store.version()
+
+    store.add({"case_id": "new", "gps_lat": CENTER[0], "gps_lng": CENTER[1]})
+    index.refresh(store)
+    assert len(index) == 101
+    assert index.radius(*CENTER, 1)[0]["case_id"] == "new"
+
+def test_duplicates_exclude_the_case_itself(store):
+    """Test duplicate flagging within 200 m."""
+    store.add({"case_id": "first", "gps_lat": CENTER[0], "gps_lng": CENTER[1]})
+    store.add({"case_id": "other", "gps_lat": CENTER[0] + 0.01, "gps_lng": CENTER[1]})
+    index = case_index.get_index(store)
+    near = index.duplicates(CENTER[0] + 0.001, CENTER[1], case_id="second")
+    assert [n["case_id"] for n in near] == ["first"]
+    assert 100 < near[0]["distance_m"] < 120
+    assert index.duplicates(CENTER[0], CENTER[1], case_id="first") == []
+    assert index.duplicates(None, None) == []
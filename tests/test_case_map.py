@@ -0,0 +1,74 @@
+import pytest
+import sys
+import os
+import random
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import case_map, case_store
+
+CENTER = (38.2975, -87.5311)
+
+
+def random_cases(n, seed=0, spread=0.5):
+    rnd = random.Random(seed)
+    return [{"case_id": f"RPC-{i:05d}", "gps_lat": CENTER[0] + rnd.uniform(-spread, spread),
+             "gps_lng": CENTER[1] + rnd.uniform(-spread, spread)} for i in range(n)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = case_store.CaseStore(str(tmp_path / "cases.sqlite"))
+    yield store
+    store.close()
+
+
+def test_every_level_accounts_for_every_case():
+    """Test that cluster counts add up at each zoom level and fewer clusters show zoomed out."""
+    cases = random_cases(2000)
+    index = case_map.ClusterIndex()
+    index.add_many([c["case_id"] for c in cases], [c["gps_lat"] for c in cases], [c["gps_lng"] for c in cases])
+    sizes = []
+    for zoom in range(index.max_zoom + 1):
+        clusters = index.clusters(zoom)
+        assert sum(c["count"] for c in clusters) == 2000
+        sizes.append(len(clusters))
+    assert sizes == sorted(sizes)
+    assert sizes[0] == 1
+    only = index.clusters(0)[0]
+    assert only["lat"] == pytest.approx(sum(c["gps_lat"] for c in cases) / 2000)
+
+def test_bbox_query_matches_filtering_all_clusters():
+    """Test that a view only gets the clusters whose cell overlaps it."""
+    cases = random_cases(5000, seed=1)
+    index = case_map.ClusterIndex()
+    index.add_many([c["case_id"] for c in cases], [c["gps_lat"] for c in cases], [c["gps_lng"] for c in cases])
+    bbox = case_map.view_bbox(*CENTER, 11)
+    for zoom in (8, 11, 14):
+        shown = index.clusters(zoom, bbox)
+        assert 0 < len(shown) < len(index.clusters(zoom))
+        inside = [c for c in cases if bbox[0] <= c["gps_lat"] <= bbox[2] and bbox[1] <= c["gps_lng"] <= bbox[3]]
+        # Cells overlapping the edge may also hold cases just outside it
+        assert sum(c["count"] for c in shown) >= len(inside)
+
+def test_refresh_is_incremental(store):
+    """Test that refresh merges only newly saved cases."""
+    store.add_many(random_cases(300))
+    store.add({"case_id": "no-location"})
+    index = case_map.get_clusters(store)
+    assert index.count == 300
+    store.add({"case_id": "new", "gps_lat": 0.0, "gps_lng": 0.0})  # 0/0 is not a location
+    store.add({"case_id": "new2", "gps_lat": CENTER[0], "gps_lng": CENTER[1]})
+    assert case_map.get_clusters(store) is index
+    assert index.count == 301
+    assert sum(c["count"] for c in index.clusters(5)) == 301
+
+def test_visible_switches_to_cases_when_zoomed_in(store):
+    """Test that zooming in past the cluster levels returns individual cases."""
+    store.add_many(random_cases(500, spread=0.01))
+    lat, lng, zoom = case_map.get_clusters(store).center()
+    assert 10 <= zoom <= 14
+    near = case_map.visible(store, lat, lng, case_map.MAX_CLUSTER_ZOOM + 2)
+    assert near and all(c["count"] == 1 for c in near)
+    assert sum(c["count"] for c in case_map.visible(store, lat, lng, 3)) == 500
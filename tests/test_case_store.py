@@ -0,0 +1,114 @@
+import pytest
+import sys
+import os
+import sqlite3
+import threading
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import case_store
+
+
+def make_case(n, channel="Form", zip="47501"):
+    return {
+        'case_id': f"RPC-20260215-{n:03d}",
+        'customer_name': f"Customer {n}",
+        'contact_channel': channel,
+        'zip': zip,
+        'initial_contact_datetime': f"2026-02-{1 + n % 28:02d} 10:00:00",
+        'gps_lat': 38.5 + n / 1000,
+        'gps_lng': -87.1,
+        'risk_flags': ["power lines", "pole"],
+        'source_file': f"scan_{n}.png",
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = case_store.CaseStore(str(tmp_path / "cases.sqlite"))
+    yield store
+    store.close()
+
+
+def test_round_trip(store):
+    """Test that a saved case comes back with its fields and extra keys."""
+    store.add(make_case(1))
+    case = store.get("RPC-20260215-001")
+    assert case['customer_name'] == "Customer 1"
+    assert case['gps_lat'] == pytest.approx(38.501)
+    assert case['risk_flags'] == "power lines,pole"
+    assert case['source_file'] == "scan_1.png"
+    assert store.get("RPC-20260215-999") is None
+
+def test_duplicate_case_id_is_rejected(store):
+    """Test that case IDs are unique."""
+    store.add(make_case(1))
+    with pytest.raises(sqlite3.IntegrityError):
+        store.add(make_case(1))
+    assert store.count() == 1
+
+def test_add_many_and_counts(store):
+    """Test batched inserts, the maintained totals and filtered counts."""
+    cases = [make_case(n, channel="Email" if n % 3 == 0 else "Form", zip=str(47500 + n % 2))
+             for n in range(1, 101)]
+    assert store.add_many(cases, batch_size=7) == 100
+    assert store.count() == 100
+    assert store.channel_counts() == {"Form": 67, "Email": 33}
+    assert store.count(channel="Email") == 33
+    assert store.count(zip="47501") == 50
+    assert store.count(date_from="2026-02-01", date_to="2026-02-02") == 3
+    assert store.count(bbox=(38.5, -87.2, 38.5105, -87.0)) == 10  # gps_lat 38.501 .. 38.510
+    assert store.version() == 100
+
+def test_failed_batch_is_rolled_back(store):
+    """Test that a batch with a duplicate saves nothing."""
+    store.add(make_case(5))
+    with pytest.raises(sqlite3.IntegrityError):
+        store.add_many([make_case(4), make_case(5), make_case(6)])
+    assert store.count() == 1
+    assert store.get("RPC-20260215-004") is None
+
+def test_pagination_newest_first(store):
+    """Test that pages and before_id seeks return the same rows."""
+    store.add_many(make_case(n) for n in range(1, 26))
+    first = store.page(0, 10)
+    second = store.page(1, 10)
+    assert [c['case_id'] for c in first][:2] == ["RPC-20260215-025", "RPC-20260215-024"]
+    assert store.page(before_id=first[-1]['id'], page_size=10) == second
+    assert len(store.page(2, 10)) == 5
+    assert store.latest()['case_id'] == "RPC-20260215-025"
+
+def test_iter_cases_in_chunks(store):
+    """Test that iteration returns every case once, oldest first."""
+    store.add_many(make_case(n, channel="Text" if n % 2 else "Form") for n in range(1, 52))
+    assert [c['case_id'] for c in store.iter_cases(chunk_size=10)] == \
+        [f"RPC-20260215-{n:03d}" for n in range(1, 52)]
+    assert len(list(store.iter_cases(chunk_size=10, channel="Text"))) == 26
+
+def test_count_case_ids_by_prefix(store):
+    """Test counting today's IDs."""
+    store.add_many([make_case(1), make_case(2), dict(make_case(3), case_id="RPC-20260216-001")])
+    assert store.count_case_ids("RPC-20260215-") == 2
+
+def test_concurrent_writers(tmp_path):
+    """Test that separate connections (as in separate app workers) can all write."""
+    path = str(tmp_path / "shared.sqlite")
+    stores = [case_store.CaseStore(path) for _ in range(4)]
+    errors = []
+
+    def write(i, store):
+        try:
+            store.add_many(make_case(i * 1000 + n) for n in range(200))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(i, s)) for i, s in enumerate(stores)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert stores[0].count() == 800
+    for s in stores:
+        s.close()
@@ -0,0 +1,89 @@
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import case_store, case_view
+
+
+def make_case(n, channel):
+    return {'case_id': f"RPC-20260215-{n:03d}", 'contact_channel': channel, 'zip': "47501"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = case_store.CaseStore(str(tmp_path / "cases.sqlite"))
+    store.add_many(make_case(n, "Email" if n % 3 == 0 else "Form") for n in range(1, 31))
+    yield store
+    store.close()
+
+
+def test_summary_updates_incrementally(store, monkeypatch):
+    """Test that only cases added since the last refresh are read."""
+    summary = case_view.CaseSummary().refresh(store)
+    assert (summary.total, summary.latest_case_id) == (30, "RPC-20260215-030")
+    assert summary.most_common_channel() == "Form"
+
+    read = []
+    original = store.iter_cases
+
+    def counting_iter_cases(**kwargs):
+        for case in original(**kwargs):
+            read.append(case)
+            yield case
+
+    monkeypatch.setattr(store, "iter_cases", counting_iter_cases)
+    summary.refresh(store)
+    assert read == []  # unchanged store: nothing read
+
+    store.add_many(make_case(n, "Text") for n in range(31, 61))
+    summary.refresh(store)
+    assert len(read) == 30
+    assert summary.total == 60
+    assert summary.channels["Text"] == 30
+    assert summary.most_common_channel() == "Text"
+    assert summary.latest_case_id == "RPC-20260215-060"
+
+def test_cases_saved_during_refresh_are_counted_once(store, monkeypatch):
+    """Test that a refresh reads only up to the version it records."""
+    summary = case_view.CaseSummary().refresh(store)
+    store.add_many(make_case(n, "Text") for n in range(31, 41))
+    # Cases 36-40 land after the version was read
+    monkeypatch.setattr(store, "version", lambda: 35)
+    summary.refresh(store)
+    assert (summary.total, summary.channels["Text"]) == (35, 5)
+    monkeypatch.undo()
+    summary.refresh(store)
+    assert (summary.total, summary.channels["Text"]) == (40, 10)
+    assert summary.latest_case_id == "RPC-20260215-040"
+
+def test_table_pages_are_memoized_per_version(store):
+    """Test that a page is reused until a case is added."""
+    table = case_view.CaseTableView(page_size=10)
+    first = table.page(store, 0)
+    assert table.page(store, 0) is first
+    assert list(first['case_id'])[0] == "RPC-20260215-030"
+    assert 'id' not in first.columns
+    assert (table.hits, table.misses) == (1, 1)
+
+    store.add(make_case(31, "Form"))
+    assert list(table.page(store, 0)['case_id'])[0] == "RPC-20260215-031"
+    assert table.misses == 2
+    assert table.page_count(31) == 4
+
+def test_page_cached_under_a_version_holds_only_its_cases(store):
+    """Test that cases saved after the version was read stay out of the cached page."""
+    table = case_view.CaseTableView(page_size=10)
+    version = store.version()
+    store.add(make_case(31, "Form"))
+    assert list(table.page(store, 0, version=version)['case_id'])[0] == "RPC-20260215-030"
+    assert list(table.page(store, 0)['case_id'])[0] == "RPC-20260215-031"
+
+def test_empty_page_keeps_columns(tmp_path):
+    store = case_store.CaseStore(str(tmp_path / "empty.sqlite"))
+    df = case_view.CaseTableView().page(store, 0)
+    assert len(df) == 0
+    assert 'case_id' in df.columns
+    store.close()
@@ -0,0 +1,97 @@
+import pytest
+import sys
+import os
+import datetime
+
+from dateutil import parser as dateutil_parser
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import date_parser, standardize, synthetic
+
+SAMPLES = ["2024-02-03", "2024-02-03 14:05:09", "2/3/2024", "02/03/2024", "13/02/2024", "12-05-2024",
+           "Feb 3, 2024", "February 3, 2024", "3 Feb 2024", "Mon, 16 Feb 2026 09:30:00 -0600",
+           "Monday, February 15, 2026 9:12 AM", "2-11-26", "02/11/75", "Feb 3", "9:30 AM", "  2024-02-03 "]
+
+
+@pytest.fixture
+def parser():
+    return date_parser.FormatLearningParser()
+
+
+def test_agrees_with_dateutil(parser):
+    """Test that learned formats, memo hits and fallbacks all give dateutil's answer."""
+    for _ in range(3):
+        for text in SAMPLES:
+            assert parser.parse(text) == dateutil_parser.parse(text), text
+
+def test_learns_formats_per_shape(parser):
+    """Test that the second string of a shape takes the strptime fast path."""
+    parser.parse("2/3/2024")
+    parser.parse("4/5/2024")
+    stats = parser.stats()
+    assert stats["fallbacks"] == 1
+    assert stats["format_hits"] == 1
+    assert parser.learned_formats() == {"9/9/9999": "%m/%d/%Y"}
+
+def test_two_digit_years_never_use_strptime(parser):
+    """Test that %y shapes stay on dateutil (different century pivot)."""
+    for text in ["2-11-26", "3-12-27", "02/11/75"]:
+        assert parser.parse(text) == dateutil_parser.parse(text)
+    assert parser.learned_formats() == {}
+    assert parser.stats()["format_hits"] == 0
+
+def test_defaults_from_today_are_not_learned(parser):
+    """Test that a shape dateutil completes from today's date gets no format."""
+    assert parser.parse("Feb 3").year == datetime.date.today().year
+    assert parser.parse("Mar 4") == dateutil_parser.parse("Mar 4")
+    assert parser.learned_formats() == {}
+
+def test_strptime_miss_falls_back(parser):
+    """Test a string of a learned shape that only dateutil can read."""
+    parser.parse("02/03/2024")
+    assert parser.parse("13/02/2024") == datetime.datetime(2024, 2, 13)
+
+def test_memo_is_bounded_and_reset_daily():
+    """Test LRU eviction and the per-day memo reset."""
+    day = [datetime.date(2026, 1, 1)]
+    parser = date_parser.FormatLearningParser(max_memo=2, today=lambda: day[0])
+    for text in ["2024-01-01", "2024-01-02", "2024-01-03", "2024-01-03"]:
+        parser.parse(text)
+    assert parser.stats()["memo_size"] == 2
+    assert parser.stats()["memo_hits"] == 1
+    day[0] = datetime.date(2026, 1, 2)
+    parser.parse("2024-01-03")
+    assert parser.stats()["memo_hits"] == 1
+
+def test_failures_return_none(parser):
+    """Test that unparseable strings return None (and are memoized)."""
+    assert parser.parse("not a date") is None
+    assert parser.parse("not a date") is None
+    assert parser.stats()["failures"] == 1
+    assert parser.stats()["memo_hits"] == 1
+
+def test_only_parse_errors_are_caught(parser, monkeypatch):
+    """Test that unexpected exceptions from dateutil are not swallowed."""
+    def boom(text):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(date_parser.dateutil_parser, "parse", boom)
+    with pytest.raises(KeyboardInterrupt):
+        parser.parse("Feb 3, 2024")
+
+def test_hit_rates_on_corpus(parser):
+    """Test that a realistic corpus mostly avoids dateutil."""
+    records = synthetic.CorpusGenerator(seed=9).iter_records(3000)
+    dates = [r["labels"]["initial_contact_datetime"] for r in records if r["labels"]["initial_contact_datetime"]]
+    for text in dates:
+        assert parser.parse(text) == dateutil_parser.parse(text)
+    stats = parser.stats()
+    assert stats["fast_path_rate"] > 0.5
+    assert stats["fast_path_rate"] + stats["fallback_rate"] == pytest.approx(1.0)
+
+def test_standardize_date_uses_default_parser():
+    """Test that standardize_date goes through the shared parser."""
+    before = date_parser.DEFAULT_PARSER.stats()["calls"]
+    assert standardize.standardize_date("Feb 3, 2024") == "2024-02-03 00:00:00"
+    assert date_parser.DEFAULT_PARSER.stats()["calls"] == before + 1
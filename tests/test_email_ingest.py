@@ -0,0 +1,140 @@
+import pytest
+import sys
+import os
+import json
+import mailbox
+from email.message import EmailMessage
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import case_ids, email_ingest, pipeline
+
+BODY = """Hello,
+
+Service Address: 42 Oak Avenue, Springfield, IL
+Phone: 555-987-6543
+A branch is resting on the power lines behind the garage.
+From now on I will call first.
+"""
+
+
+def make_message(i, body=BODY, subtype="plain"):
+    msg = EmailMessage()
+    msg["From"] = f"Pat Customer{i} <pat{i}@example.com>"
+    msg["To"] = "intake@example.com"
+    msg["Date"] = "Mon, 16 Feb 2026 09:30:00 -0600"
+    msg["Subject"] = f"Tree trimming request #{i}"
+    msg.set_content(body, subtype=subtype)
+    return msg
+
+
+@pytest.fixture(autouse=True)
+def allocator(tmp_path, monkeypatch):
+    # Keep case IDs out of the real case database
+    allocator = case_ids.CaseIdAllocator(str(tmp_path / "ids.sqlite"))
+    monkeypatch.setattr(case_ids, "get_default_allocator", lambda: allocator)
+    yield allocator
+    allocator.close()
+
+
+@pytest.fixture
+def mbox_path(tmp_path):
+    path = str(tmp_path / "export.mbox")
+    box = mailbox.mbox(path)
+    for i in range(25):
+        box.add(make_message(i))
+    box.flush()
+    box.close()
+    return path
+
+
+def test_headers_come_from_fast_path():
+    """Test that sender, date and subject are taken from the headers."""
+    case = email_ingest.parse_message(bytes(make_message(1)))
+    assert case["email"] == "pat1@example.com"
+    assert case["customer_name"] == "Pat Customer1"
+    assert case["initial_contact_datetime"] == "2026-02-16 09:30:00"
+    assert case["work_order_summary"] == "Tree trimming request #1"
+    assert case["contact_channel"] == "Email"
+    assert case["street_address"] == "42 Oak Avenue, Springfield, IL"
+    assert case["phone"] == "555-987-6543"
+    assert "power lines" in case["risk_flags"]
+
+def test_encoded_and_html_bodies_are_decoded():
+    """Test quoted-printable, RFC 2047 subjects and HTML-only messages."""
+    msg = make_message(2, body=BODY.replace("Hello", "Hällo " + "x" * 80))
+    del msg["Subject"]
+    msg["Subject"] = "Réparation"
+    case = email_ingest.parse_message(bytes(msg))
+    assert case["raw_comments"].startswith("Hällo")
+    assert case["work_order_summary"] == "Réparation"
+
+    html = "<html><body><p>Service Address: 42 Oak Avenue, Springfield, IL</p>" \
+           "<p>Sparks near the pole &amp; wires</p></body></html>"
+    case = email_ingest.parse_message(bytes(make_message(3, body=html, subtype="html")))
+    assert case["street_address"] == "42 Oak Avenue, Springfield, IL"
+    assert "<p>" not in case["raw_comments"]
+    assert "&amp;" not in case["raw_comments"]
+
+def test_multipart_prefers_plain_text():
+    """Test that the plain part of a multipart/alternative message is used."""
+    msg = make_message(4)
+    msg.add_alternative("<p>HTML version</p>", subtype="html")
+    case = email_ingest.parse_message(bytes(msg))
+    assert "HTML version" not in case["raw_comments"]
+    assert case["phone"] == "555-987-6543"
+
+def test_pasted_outlook_email():
+    """Test a pasted email with Outlook-style headers."""
+    text = ("From: customer@example.com\nSent: Monday, February 15, 2026 9:12 AM\n"
+            "Subject: Tree trimming request\n\nName: Sam Smith\nThe tree is near wires.")
+    case = email_ingest.parse_email(text)
+    assert case["email"] == "customer@example.com"
+    assert case["customer_name"] == "Sam Smith"
+    assert case["initial_contact_datetime"] == "2026-02-15 09:12:00"
+    assert case["work_order_summary"] == "Tree trimming request"
+
+def test_labels_after_headers_stay_in_body():
+    """Test that "Name:"-style lines right after the headers are parsed, not dropped."""
+    text = "From: jane@x.com\nName: Jane Doe\nPhone: 812-555-1234\nAddress: 12 Main St\n\nTree on line"
+    headers, body = email_ingest.split_headers(text)
+    assert headers == {"from": "jane@x.com"}
+    assert body.startswith("Name: Jane Doe")
+    case = email_ingest.parse_email(text)
+    assert case["customer_name"] == "Jane Doe"
+    assert case["phone"] == "812-555-1234"
+    assert case["raw_comments"] == text
+
+def test_text_without_headers_is_all_body():
+    """Test that a body starting with "Label:" is not mistaken for headers."""
+    headers, body = email_ingest.split_headers("Note: call first\nName: Sam\n")
+    assert headers == {}
+    assert body.startswith("Note: call first")
+
+def test_mbox_is_streamed_and_unescaped(mbox_path):
+    """Test that every message is found and ">From " escaping is undone."""
+    raws = list(email_ingest.iter_mbox(mbox_path))
+    assert len(raws) == 25
+    assert b"\nFrom now on I will call first." in raws[0]
+
+def test_parallel_ingest_matches_serial(mbox_path):
+    """Test that the process pool returns the same cases, in archive order."""
+    serial = list(email_ingest.ingest([mbox_path], max_workers=0))
+    parallel = list(email_ingest.ingest([mbox_path], max_workers=2, chunk_size=4))
+    assert parallel == serial
+    assert [c["email"] for c in serial] == [f"pat{i}@example.com" for i in range(25)]
+
+def test_pipeline_checkpoints_each_message(tmp_path, mbox_path):
+    """Test that the batch pipeline writes one case per message and resumes per message."""
+    out = str(tmp_path / "cases.jsonl")
+    with open(out + ".checkpoint", "w") as f:
+        f.write("".join(f"{mbox_path}#{n}\n" for n in range(10)))
+
+    summary = pipeline.IntakePipeline(out, resume=True, ocr_workers=2, do_geocode=False).run([mbox_path])
+    with open(out) as f:
+        records = [json.loads(line) for line in f]
+    assert summary["written"] == 15
+    assert records[0]["source_file"] == f"{mbox_path}#10"
+    assert records[0]["contact_channel"] == "Email"
+    assert records[0]["phone"] == "555-987-6543"
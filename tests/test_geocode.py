@@ -0,0 +1,98 @@
+import pytest
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import geocode, geocode_cache, standardize
+
+
+class StubLocation:
+    def __init__(self, lat, lng, address):
+        self.latitude = lat
+        self.longitude = lng
+        self.address = address
+
+
+class StubGeolocator:
+    """Stands in for Nominatim; counts calls and knows one address."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def geocode(self, address, timeout=None, **kwargs):
+        self.calls += 1
+        if "main" in address.lower():
+            return StubLocation(38.3, -87.1, "123 Main St, Baileyville, IN")
+        return None
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = geocode_cache.GeocodeCache(str(tmp_path / "geocode.sqlite"))
+    monkeypatch.setattr(geocode_cache, "get_default_cache", lambda: cache)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    stub = StubGeolocator()
+    monkeypatch.setattr(geocode, "_geolocator", stub)
+    monkeypatch.setattr(geocode, "nominatim_limiter", geocode.TokenBucket(rate=1000, capacity=10))
+    return stub
+
+
+def test_normalize_address_folds_spelling_variants():
+    """Test that equivalent spellings share one key."""
+    a = standardize.normalize_address("123 North Main Street, Baileyville, IN 47567")
+    b = standardize.normalize_address("123  n. main st,baileyville,in 47567")
+    assert a == b
+    assert standardize.normalize_address("None, None, None None") == ""
+
+def test_repeat_lookup_served_from_cache(cache, stub):
+    """Test that the second lookup of an address does not hit Nominatim."""
+    first = geocode.get_lat_long("123 Main Street, Baileyville, IN")
+    second = geocode.get_lat_long("123 main st, baileyville, in")
+
+    assert first == second == (38.3, -87.1, "123 Main St, Baileyville, IN")
+    assert stub.calls == 1
+    assert cache.stats()["hits"] == 1
+
+def test_not_found_is_cached(cache, stub):
+    """Test that a negative result is remembered."""
+    assert geocode.get_lat_long("1 Nowhere Rd")[0] is None
+    assert geocode.get_lat_long("1 Nowhere Rd") == (None, None, "Address not found")
+    assert stub.calls == 2  # both retry attempts on the first lookup only
+    assert cache.stats()["negative_hits"] == 1
+
+def test_placeholder_address_skips_network(cache, stub):
+    """Test that an address made only of empty parts is rejected up front."""
+    assert geocode.get_lat_long("None, None, None None") == (None, None, "No address provided")
+    assert stub.calls == 0
+
+def test_expired_entries_are_refetched(tmp_path):
+    """Test that entries older than the TTL are treated as misses."""
+    cache = geocode_cache.GeocodeCache(str(tmp_path / "c.sqlite"), ttl=0.01)
+    cache.set("123 Main St", 1.0, 2.0, "x")
+    assert cache.get("123 Main St") == (1.0, 2.0, "x")
+    time.sleep(0.02)
+    assert cache.get("123 Main St") is None
+
+def test_eviction_bounds_size(tmp_path):
+    """Test that the cache trims itself once past max_entries."""
+    cache = geocode_cache.GeocodeCache(str(tmp_path / "c.sqlite"), max_entries=50)
+    for i in range(200):
+        cache.set(f"{i} Main St", 1.0, 2.0, "x")
+    assert len(cache) <= 50
+
+def test_token_bucket_limits_rate():
+    """Test that the limiter spaces requests at the configured rate."""
+    bucket = geocode.TokenBucket(rate=50, capacity=1)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    # First token is free, the remaining five wait ~20ms each
+    assert time.monotonic() - start >= 0.09
@@ -0,0 +1,59 @@
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import geocode, local_geocoder
+
+POINTS_CSV = """street,city,state,zip,lat,lng
+555 County Road 215 E,Baileyville,IN,47567,38.4501,-87.2210
+12 Main Street,Jasper,IN,47546,38.3914,-86.9311
+12 Main Street,Oakland City,IN,47660,38.3387,-87.3450
+"""
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = tmp_path / "points.csv"
+    path.write_text(POINTS_CSV)
+    return local_geocoder.AddressPointIndex.from_file(str(path))
+
+
+def test_exact_address_match(index):
+    """Test that a full address resolves via the normalized-key hash."""
+    lat, lng, label = index.lookup("555 County Rd 215 East, Baileyville, IN 47567")
+    assert (lat, lng) == (38.4501, -87.2210)
+    assert label == "555 County Road 215 E, Baileyville, IN 47567"
+
+def test_partial_address_uses_street_index(index):
+    """Test that a missing zip or city still matches through the street index."""
+    assert index.lookup("555 County Road 215 E, None, IN 47567")[0] == 38.4501
+    assert index.lookup("12 Main St, Oakland City")[0] == 38.3387
+
+def test_ambiguous_or_unknown_returns_none(index):
+    """Test that the index never guesses between candidates."""
+    assert index.lookup("12 Main St, IN") is None
+    assert index.lookup("99 Elm St, Jasper, IN") is None
+
+def test_state_alone_is_not_a_match():
+    """Test that a street in another city of the same state is not returned."""
+    index = local_geocoder.AddressPointIndex.from_records(
+        [{"street": "12 Main St", "city": "Jasper", "state": "IN", "zip": "47546", "lat": 38.39, "lng": -86.93}])
+    assert index.lookup("12 Main St, Evansville, IN 47708") is None
+    assert index.lookup("12 Main St, Evansville, IN") is None
+    assert index.lookup("12 Main St, None, IN None") is None
+    assert index.lookup("12 Main St, Evansville, IN 47546") is None  # right zip, other city
+    assert index.lookup("12 Main St, IN 47546")[0] == 38.39
+
+def test_get_lat_long_prefers_local_index(index, monkeypatch):
+    """Test that get_lat_long answers from the local index without the network."""
+    def fail(*args, **kwargs):
+        raise AssertionError("Nominatim should not be called")
+    monkeypatch.setattr(geocode, "nominatim_lookup", fail)
+    local_geocoder.set_default_index(index)
+    try:
+        assert geocode.get_lat_long("12 Main Street, Jasper, IN 47546")[:2] == (38.3914, -86.9311)
+    finally:
+        local_geocoder.set_default_index(None)
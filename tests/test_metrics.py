@@ -0,0 +1,113 @@
+import pytest
+import sys
+import os
+import urllib.request
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import geocode_cache, metrics, ocr, ocr_engine, parsing, standardize
+
+
+@pytest.fixture
+def enabled():
+    metrics.REGISTRY.reset()
+    metrics.enable()
+    yield metrics.REGISTRY
+    metrics.enable(False)
+    metrics.REGISTRY.reset()
+
+
+def test_disabled_records_nothing():
+    """Test that instrumented calls leave the registry empty while disabled."""
+    metrics.REGISTRY.reset()
+    assert not metrics.enabled()
+    standardize.standardize_phone("5551234567")
+    metrics.inc("retries", stage="geocode")
+    with metrics.span("block") as span:
+        span.error = True
+    assert metrics.REGISTRY.snapshot() == {"stages": {}, "counters": []}
+
+def test_stage_spans(enabled):
+    """Test that traced functions are timed per stage and errors are counted."""
+    standardize.standardize_phone("5551234567")
+    standardize.standardize_phone("555-123-4567")
+    parsing.parse_messy_text("Name: Jane Doe")
+    with pytest.raises(ZeroDivisionError):
+        with metrics.span("block"):
+            1 / 0
+
+    stages = enabled.snapshot()["stages"]
+    assert stages["standardize_phone"]["count"] == 2
+    assert stages["parse"]["count"] == 1
+    assert stages["block"]["errors"] == 1
+    assert sum(stages["standardize_phone"]["buckets"]) == 2
+
+def test_traced_error_predicate(enabled):
+    """Test that a returned error message counts as a failed call."""
+    @metrics.traced("lookup", error=lambda result: result.startswith("LOG:"))
+    def lookup(ok):
+        return "found" if ok else "LOG: failed"
+
+    lookup(True)
+    lookup(False)
+    assert enabled.snapshot()["stages"]["lookup"]["errors"] == 1
+
+def test_ocr_engine_calls_are_timed_here(enabled, monkeypatch):
+    """Test that OCR run by the worker pool still shows up as an "ocr" stage in this process."""
+    import io
+    from PIL import Image
+
+    class StubEngine:
+        def ocr(self, image):
+            return "Name: Jane Doe"
+
+    monkeypatch.setattr(ocr, "is_tesseract_installed", lambda: True)
+    monkeypatch.setattr(ocr_engine, "get_engine", lambda: StubEngine())
+    buf = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(buf, format="PNG")
+    assert ocr.extract_text_from_bytes(buf.getvalue(), use_cache=False) == "Name: Jane Doe"
+    standardize.normalize_text("jane  doe")
+    stages = enabled.snapshot()["stages"]
+    assert stages["ocr"]["count"] == 1
+    assert stages["normalize_text"]["count"] == 1
+
+def test_cache_counters(enabled, tmp_path):
+    """Test geocode cache hit/miss counters."""
+    cache = geocode_cache.GeocodeCache(str(tmp_path / "geo.sqlite"))
+    cache.get("1 Main St, Springfield, IL")
+    cache.set("1 Main St, Springfield, IL", 39.8, -89.6, "1 Main St")
+    cache.get("1 Main St, Springfield, IL")
+    cache.close()
+    counters = {(name, labels.get("result")): value
+                for name, labels, value in enabled.snapshot()["counters"]}
+    assert counters[("cache_requests", "miss")] == 1
+    assert counters[("cache_requests", "hit")] == 1
+
+def test_prometheus_text(enabled, tmp_path):
+    """Test the exposition format and the file export."""
+    standardize.standardize_date("2026-02-16")
+    metrics.inc("retries", 2, stage="geocode")
+    text = metrics.render_prometheus()
+    assert "# TYPE bloom_stage_seconds histogram" in text
+    assert 'bloom_stage_seconds_bucket{stage="standardize_date",le="+Inf"} 1' in text
+    assert 'bloom_stage_seconds_count{stage="standardize_date"} 1' in text
+    assert 'bloom_retries_total{stage="geocode"} 2' in text
+
+    path = str(tmp_path / "metrics.prom")
+    metrics.write_prometheus(path)
+    with open(path) as f:
+        assert f.read() == text
+
+def test_http_endpoint(enabled):
+    """Test GET /metrics."""
+    metrics.inc("errors", stage="ocr")
+    server = metrics.serve(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            body = response.read().decode()
+        assert 'bloom_errors_total{stage="ocr"} 1' in body
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,41 @@
+import pytest
+import sys
+import os
+import random
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import ocr
+
+
+def slow_square(n):
+    # Later inputs finish first, so ordering has to be restored
+    time.sleep(random.uniform(0, 0.02))
+    return n * n
+
+
+def test_ordered_pool_map_preserves_input_order():
+    """Test that results come back in input order."""
+    results = list(ocr.ordered_pool_map(slow_square, ((n,) for n in range(20)), max_workers=4))
+    assert results == [n * n for n in range(20)]
+
+def test_ordered_pool_map_bounds_in_flight_inputs():
+    """Test that inputs are pulled lazily, never more than max_in_flight ahead."""
+    pulled = []
+
+    def inputs():
+        for n in range(30):
+            pulled.append(n)
+            yield (n,)
+
+    for i, _ in enumerate(ocr.ordered_pool_map(slow_square, inputs(), max_workers=2, max_in_flight=3)):
+        # The i-th result has been yielded, so at most 3 more can be outstanding
+        assert len(pulled) <= i + 3
+
+def test_extract_text_from_pdf_reports_errors():
+    """Test that an unreadable PDF returns an error message instead of raising."""
+    pages, err = ocr.extract_text_from_pdf(b"not a pdf")
+    assert pages is None
+    assert err.startswith("LOG:")
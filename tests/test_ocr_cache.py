@@ -0,0 +1,68 @@
+import pytest
+import sys
+import os
+import io
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image
+
+from utils import ocr, ocr_cache
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), 'fixtures', 'sample_text.png')
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    """Count OCR calls and return fixed text instead of running Tesseract."""
+    calls = []
+
+    def extract(image, settings=None):
+        calls.append(settings)
+        return "Name: Jane Doe"
+
+    monkeypatch.setattr(ocr, "extract_text_from_image", extract)
+    monkeypatch.setattr(ocr_cache, "_default_cache", ocr_cache.OCRCache())
+    return calls
+
+
+def test_same_bytes_are_ocrd_once(fake_ocr):
+    """Test that identical uploads hit the cache."""
+    data = open(FIXTURE_PATH, 'rb').read()
+    assert ocr.extract_text_from_bytes(data) == ocr.extract_text_from_bytes(data)
+    assert len(fake_ocr) == 1
+
+def test_settings_are_part_of_the_key(fake_ocr):
+    """Test that changing OCR settings forces a fresh OCR."""
+    data = open(FIXTURE_PATH, 'rb').read()
+    ocr.extract_text_from_bytes(data)
+    ocr.extract_text_from_bytes(data, settings={"lang": "eng", "config": "--psm 6"})
+    assert len(fake_ocr) == 2
+
+def test_errors_are_not_cached(monkeypatch):
+    """Test that 'LOG:' results are retried on the next call."""
+    monkeypatch.setattr(ocr_cache, "_default_cache", ocr_cache.OCRCache())
+    buf = io.BytesIO()
+    Image.new("RGB", (10, 10)).save(buf, format="PNG")
+    ocr.extract_text_from_bytes(buf.getvalue())
+    assert ocr_cache.get_default_cache().stats()["entries"] == 0
+
+def test_lru_tier_is_bounded():
+    """Test that the in-memory tier evicts least recently used entries."""
+    cache = ocr_cache.OCRCache(max_items=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Test that a new cache instance reads entries written by an old one."""
+    key = ocr_cache.make_key(b"scan", {"lang": "eng"})
+    ocr_cache.OCRCache(disk_dir=str(tmp_path)).set(key, "hello")
+
+    fresh = ocr_cache.OCRCache(disk_dir=str(tmp_path))
+    assert fresh.get(key) == "hello"
+    assert fresh.stats()["disk_hits"] == 1
@@ -0,0 +1,66 @@
+import pytest
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image
+
+from utils import ocr_engine
+
+
+def describe_batch(images):
+    # Stand-in for ocr_batch: one text per image, tagged with the batch size
+    time.sleep(0.01)
+    return [f"{image.width}/{len(images)}" for image in images]
+
+
+@pytest.fixture
+def engine():
+    engine = ocr_engine.OCREngine(workers=2, batch_size=4, batch_wait=0.05, batch_fn=describe_batch)
+    yield engine
+    engine.shutdown()
+
+
+def test_engine_returns_texts_in_order(engine):
+    """Test that map() returns one result per image, in order."""
+    images = [Image.new("L", (w, 10)) for w in range(1, 11)]
+    texts = engine.map(images)
+    assert [int(t.split("/")[0]) for t in texts] == list(range(1, 11))
+
+def test_engine_batches_queued_images(engine):
+    """Test that images queued together are sent to workers in batches."""
+    engine.map([Image.new("L", (5, 5)) for _ in range(8)])
+    metrics = engine.metrics()
+    assert metrics["completed"] == 8
+    assert metrics["batches"] < 8
+    assert metrics["queue_depth"] == 0 and metrics["in_flight"] == 0
+    assert metrics["latency_ms"]["p50"] is not None
+
+def test_engine_without_tesseract_reports_log(monkeypatch):
+    """Test that the real worker task degrades like extract_text_from_image."""
+    from utils import ocr
+    monkeypatch.setattr(ocr, "is_tesseract_installed", lambda: False)
+    texts = ocr_engine.ocr_batch([Image.new("L", (5, 5))] * 2)
+    assert texts == ["LOG: Tesseract binary not found in PATH. OCR unavailable."] * 2
+
+def test_tesserocr_options_follow_cli_config():
+    """Test that the tesseract config string is carried over to the tesserocr API."""
+    options = ocr_engine._tesserocr_options({"lang": "eng", "config": "--psm 6 --oem 1 -c preserve_interword_spaces=1 digits"})
+    assert options == {"lang": "eng", "psm": 6, "oem": 1,
+                       "variables": {"preserve_interword_spaces": "1"}, "configs": ["digits"]}
+    assert ocr_engine._tesserocr_options({"lang": "deu"}) == {"lang": "deu"}
+    # Anything the API can't express leaves the worker on the CLI
+    assert ocr_engine._tesserocr_options({"config": "--user-words words.txt"}) is None
+    assert ocr_engine._tesserocr_options({"config": "--psm"}) is None
+
+@pytest.mark.parametrize("value", ["four", "-2"])
+def test_invalid_worker_count_is_ignored(monkeypatch, value):
+    """Test that a bad BLOOM_OCR_WORKERS falls back to the default pool size."""
+    monkeypatch.setenv("BLOOM_OCR_WORKERS", value)
+    with pytest.warns(UserWarning):
+        assert ocr_engine._env_workers() is None
+    monkeypatch.setenv("BLOOM_OCR_WORKERS", " 0 ")
+    assert ocr_engine.get_engine() is None
@@ -0,0 +1,28 @@
+import pytest
+import sys
+import os
+import json
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import parsing
+
+# Texts and what the original multi-search parser returned for each
+with open(os.path.join(os.path.dirname(__file__), 'fixtures', 'parsed_samples.json'), encoding='utf-8') as f:
+    SAMPLES = json.load(f)
+
+
+@pytest.mark.parametrize("sample", SAMPLES)
+def test_single_pass_matches_original(sample):
+    """Test that the single-pass parser returns exactly what the original did."""
+    assert parsing.parse_messy_text(sample["text"]) == sample["expected"]
+
+def test_label_value_on_next_line():
+    """Test that a label with its value on the following line is picked up."""
+    labels = parsing.extract_labels("Customer Name:\n\n  Bob Smith  \nDate: today")
+    assert labels == {"customer_name": "Bob Smith", "initial_contact_datetime": "today"}
+
+def test_email_skips_invalid_candidates():
+    """Test that an '@' without a valid email before the real one is skipped."""
+    assert parsing.extract_email("@home, reach me at jane.doe@example.org") == "jane.doe@example.org"
@@ -0,0 +1,154 @@
+import pytest
+import sys
+import os
+import csv
+import json
+import mailbox
+import threading
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import case_ids, pipeline
+
+MESSAGE = """Customer Name: Jane Doe
+Date: 2024-03-05
+Service Address: 123 Main Street, Springfield, IL
+Phone: (555) 123-4567
+There is a tree touching the power lines.
+"""
+
+
+@pytest.fixture(autouse=True)
+def allocator(tmp_path, monkeypatch):
+    # Keep case IDs out of the real case database
+    allocator = case_ids.CaseIdAllocator(str(tmp_path / "ids.sqlite"))
+    monkeypatch.setattr(case_ids, "get_default_allocator", lambda: allocator)
+    yield allocator
+    allocator.close()
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    folder = tmp_path / "inbox"
+    folder.mkdir()
+    for i in range(5):
+        (folder / f"msg_{i}.txt").write_text(MESSAGE.replace("Jane", f"Jane{i}"))
+    (folder / "notes.docx").write_text("not an input")
+    return folder
+
+
+def run(tmp_path, paths, output="out.jsonl", **kwargs):
+    out = str(tmp_path / output)
+    runner = pipeline.IntakePipeline(out, ocr_workers=2, do_geocode=False, **kwargs)
+    return out, runner.run(paths)
+
+
+def test_discover_inputs_walks_directories_and_manifest(tmp_path, inputs):
+    """Test that directories are searched, unsupported files skipped and duplicates dropped."""
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("# comment\ninbox/msg_0.txt\n\ninbox/msg_1.txt\n")
+
+    paths = pipeline.discover_inputs([str(inputs)], str(manifest))
+    assert len(paths) == 5
+    assert all(p.endswith(".txt") for p in paths)
+
+def test_pipeline_writes_jsonl(tmp_path, inputs):
+    """Test that every input produces one parsed, standardized record."""
+    paths = pipeline.discover_inputs([str(inputs)])
+    out, summary = run(tmp_path, paths)
+
+    with open(out) as f:
+        records = [json.loads(line) for line in f]
+    assert summary["written"] == 5
+    assert len(records) == 5
+    assert len({r["case_id"] for r in records}) == 5
+    assert {r["source_file"] for r in records} == set(paths)
+    record = records[0]
+    assert record["phone"] == "555-123-4567"
+    assert record["contact_channel"] == "Text"
+    assert "power lines" in record["risk_flags"]
+    assert record["error"] is None
+    assert [s["stage"] for s in summary["stages"]] == ["extract", "standardize", "geocode", "write"]
+
+def test_pipeline_writes_csv(tmp_path, inputs):
+    """Test that a .csv output gets a header and one row per input."""
+    out, _ = run(tmp_path, pipeline.discover_inputs([str(inputs)]), output="out.csv")
+    with open(out, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 5
+    assert rows[0]["street_address"].startswith("123 Main Street")
+
+def test_resume_skips_checkpointed_inputs(tmp_path, inputs):
+    """Test that a resumed run only processes inputs missing from the checkpoint."""
+    paths = pipeline.discover_inputs([str(inputs)])
+    out, _ = run(tmp_path, paths[:2])
+
+    out, summary = run(tmp_path, paths, resume=True)
+    assert summary["skipped_from_checkpoint"] == 2
+    assert summary["written"] == 3
+    with open(out) as f:
+        records = [json.loads(line) for line in f]
+    assert sorted(r["source_file"] for r in records) == sorted(paths)
+    assert len({r["case_id"] for r in records}) == 5
+
+def test_resume_skips_checkpointed_messages_alongside_new_files(tmp_path, inputs):
+    """Test that a resume with a new document does not rewrite checkpointed mbox messages."""
+    mbox_path = str(tmp_path / "m.mbox")
+    box = mailbox.mbox(mbox_path)
+    for i in range(2):
+        box.add(f"From: Pat{i} <pat{i}@example.com>\nSubject: Tree #{i}\n\n{MESSAGE}")
+    box.flush()
+    box.close()
+    paths = pipeline.discover_inputs([str(inputs)])
+    out, _ = run(tmp_path, paths[:1] + [mbox_path])
+
+    out, summary = run(tmp_path, paths[:2] + [mbox_path], resume=True)
+    assert summary["written"] == 1
+    with open(out) as f:
+        sources = [json.loads(line)["source_file"] for line in f]
+    assert len(sources) == len(set(sources)) == 4
+    assert f"{mbox_path}#0" in sources and f"{mbox_path}#1" in sources
+
+def test_geocode_stage_uses_full_address(tmp_path, inputs, monkeypatch):
+    """Test that the geocoding stage fills coordinates for each case."""
+    seen = []
+
+    def fake_lookup(address, use_cache=True):
+        seen.append(address)
+        return 39.78, -89.65, "Springfield, IL"
+
+    monkeypatch.setattr(pipeline.geocode, "get_lat_long", fake_lookup)
+    out = str(tmp_path / "geo.jsonl")
+    pipeline.IntakePipeline(out, ocr_workers=1).run(pipeline.discover_inputs([str(inputs)]))
+
+    with open(out) as f:
+        records = [json.loads(line) for line in f]
+    assert all(r["gps_lat"] == 39.78 for r in records)
+    assert seen and seen[0].startswith("123 Main Street")
+
+def test_standardize_errors_are_recorded_not_fatal(tmp_path, inputs, monkeypatch):
+    """Test that a case failing to standardize is written with its error and the run still ends."""
+    real = pipeline.standardize.standardize_phone
+    calls = []
+
+    def flaky(phone):
+        calls.append(phone)
+        if len(calls) == 2:
+            raise ValueError("bad phone")
+        return real(phone)
+    monkeypatch.setattr(pipeline.standardize, "standardize_phone", flaky)
+
+    paths = pipeline.discover_inputs([str(inputs)])
+    result = {}
+    # A queue of one fills at once, so a stage that stopped reading would hang the run
+    worker = threading.Thread(target=lambda: result.update(run(tmp_path, paths, queue_size=1)[1]), daemon=True)
+    worker.start()
+    worker.join(timeout=60)
+    assert not worker.is_alive()
+    assert result["written"] == 5
+    with open(tmp_path / "out.jsonl") as f:
+        records = [json.loads(line) for line in f]
+    assert [r["error"] for r in records if r["error"]] == ["Error: bad phone"]
+    assert {r["source_file"] for r in records} == set(paths)
+    assert result["stages"][1]["errors"] == 1
@@ -0,0 +1,97 @@
+import pytest
+import sys
+import os
+import json
+import random
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import geo, pipeline, power_lines
+
+# Along 38.3 N, one primary feeder running east and a secondary drop off it
+LINES = {
+    "type": "FeatureCollection",
+    "features": [
+        {"type": "Feature", "properties": {"LINE_CLASS": "Primary OH"},
+         "geometry": {"type": "LineString", "coordinates": [[-87.60, 38.30], [-87.50, 38.30]]}},
+        {"type": "Feature", "properties": {"voltage": 240},
+         "geometry": {"type": "MultiLineString", "coordinates": [[[-87.55, 38.30], [-87.55, 38.302]]]}},
+    ],
+}
+
+
+@pytest.fixture
+def network(tmp_path):
+    path = tmp_path / "lines.geojson"
+    path.write_text(json.dumps(LINES))
+    return power_lines.LineNetwork.from_file(str(path))
+
+
+def test_load_geojson_and_classify(network):
+    """Test that both geometry types load, long lines are split and classes are read."""
+    assert network.lines == 2
+    assert len(network) > 2  # the 0.1 degree feeder is split into cell-sized pieces
+    assert power_lines.classify({"type": "SEC"}) == "secondary"
+    assert power_lines.classify({"kv": 12.47}) == "primary"
+    assert power_lines.classify({}, default_class="secondary") == "secondary"
+
+def test_nearest_distances(network):
+    """Test distances to a line beside and past the end of a segment."""
+    north = network.nearest(38.3005, -87.56)
+    assert north["primary"] == pytest.approx(0.0005 * geo.METERS_PER_DEGREE, rel=1e-3)
+    assert north["secondary"] is None  # 870 m away, past the default search distance
+    north = network.nearest(38.3005, -87.56, max_distance_m=1000)
+    assert north["secondary"] == pytest.approx(geo.haversine_m(38.3005, -87.56, 38.3005, -87.55), rel=1e-3)
+    far = network.nearest(38.40, -87.55)
+    assert far == {"primary": None, "secondary": None}
+
+def test_nearest_matches_brute_force():
+    """Test the ring search against a scan of every segment."""
+    rnd = random.Random(0)
+    network = power_lines.LineNetwork()
+    lines = []
+    for n in range(300):
+        lat, lng = 38.3 + rnd.uniform(-0.05, 0.05), -87.5 + rnd.uniform(-0.05, 0.05)
+        coords = [[lng, lat], [lng + rnd.uniform(-0.01, 0.01), lat + rnd.uniform(-0.01, 0.01)]]
+        line_class = power_lines.LINE_CLASSES[n % 2]
+        network.add_line(coords, line_class)
+        lines.append((coords, line_class))
+
+    def densified(coords):
+        (lng1, lat1), (lng2, lat2) = coords
+        return [(lat1 + (lat2 - lat1) * t / 300, lng1 + (lng2 - lng1) * t / 300) for t in range(301)]
+
+    samples = [(cls, p) for coords, cls in lines for p in densified(coords)]
+    for _ in range(10):
+        lat, lng = 38.3 + rnd.uniform(-0.05, 0.05), -87.5 + rnd.uniform(-0.05, 0.05)
+        found = network.nearest(lat, lng, max_distance_m=2000)
+        for cls in power_lines.LINE_CLASSES:
+            expected = min(geo.haversine_m(lat, lng, *p) for c, p in samples if c == cls)
+            if expected <= 2000:
+                assert found[cls] == pytest.approx(expected, abs=3.0)
+
+def test_add_proximity_flags(network):
+    """Test that flags are merged into the risk flags and replaced on a second call."""
+    case = {"risk_flags": "spark", "gps_lat": 38.3005, "gps_lng": -87.56}
+    power_lines.add_proximity_flags(case, network)
+    assert case["risk_flags"] == "spark,primary line 56 m"
+    assert case["secondary_line_m"] is None
+    case["gps_lat"] = 38.3001
+    power_lines.add_proximity_flags(case, network)
+    assert case["risk_flags"].split(",")[:2] == ["spark", "primary line 11 m"]
+    assert case["primary_line_m"] == pytest.approx(11.1, abs=0.1)
+
+    listed = power_lines.add_proximity_flags({"risk_flags": ["pole"], "gps_lat": 38.3, "gps_lng": -87.55}, network)
+    assert listed["risk_flags"] == ["pole", "primary line 0 m", "secondary line 0 m"]
+    assert power_lines.add_proximity_flags({"risk_flags": "pole"}, network) == {"risk_flags": "pole"}
+
+def test_pipeline_geocode_adds_flags(network, monkeypatch):
+    """Test that the batch pipeline flags line proximity after geocoding."""
+    monkeypatch.setattr(pipeline.geocode, "get_lat_long", lambda address: (38.3001, -87.55, "Stub"))
+    power_lines.set_default_network(network)
+    try:
+        case = pipeline.geocode_case({"street_address": "1 Main St", "risk_flags": ""})
+    finally:
+        power_lines.set_default_network(None)
+    assert case["risk_flags"] == "primary line 11 m,secondary line 0 m"
@@ -0,0 +1,49 @@
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image, ImageDraw
+
+from utils import preprocess
+
+
+def lined_page(width=600, height=800):
+    """White page with black 'text lines' and wide blank margins."""
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    for y in range(200, 600, 20):
+        draw.rectangle((150, y, 450, y + 6), fill=0)
+    return image
+
+
+def test_downscale_caps_pixel_count():
+    """Test that large photos are shrunk below max_pixels."""
+    image = Image.new("RGB", (6000, 4000), "white")
+    out = preprocess.downscale(image, max_pixels=4000000)
+    assert out.width * out.height <= 4000000
+    assert preprocess.downscale(Image.new("L", (100, 100)), max_pixels=4000000).size == (100, 100)
+
+def test_downscale_respects_dpi():
+    """Test that a 600 dpi scan is brought down to the target DPI."""
+    image = Image.new("L", (5100, 6600), 255)
+    image.info["dpi"] = (600, 600)
+    assert preprocess.downscale(image, target_dpi=300).size == (2550, 3300)
+
+def test_autocrop_trims_margins():
+    """Test that blank margins are removed, keeping a little padding."""
+    out = preprocess.autocrop(lined_page())
+    assert out.size == (300 + 1 + 2 * preprocess.CROP_PADDING, 386 + 1 + 2 * preprocess.CROP_PADDING)
+
+def test_deskew_undoes_rotation():
+    """Test that skew estimation recovers a small rotation."""
+    skewed = lined_page().rotate(3, fillcolor=255)
+    assert preprocess.estimate_skew(skewed) == pytest.approx(-3, abs=preprocess.DESKEW_STEP)
+
+def test_binarize_is_two_tone():
+    """Test that binarization leaves only black and white pixels."""
+    image = Image.linear_gradient("L")
+    hist = preprocess.binarize(image).histogram()
+    assert [i for i, count in enumerate(hist) if count] == [0, 255]
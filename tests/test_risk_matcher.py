@@ -0,0 +1,80 @@
+import pytest
+import sys
+import os
+import json
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import parsing, risk_matcher
+
+
+@pytest.fixture
+def matcher():
+    return risk_matcher.RiskMatcher({"power lines": 3, "line": 1, "high voltage": 3, "pole": 1})
+
+
+def test_whole_words_only(matcher):
+    """Test that keywords inside longer words are not flagged."""
+    assert matcher.keywords_found("Call before the deadline, or apply online.") == []
+    assert parsing.extract_risk_warnings("the deadline is friday") == []
+
+def test_inflected_forms():
+    """Test that plurals and suffixed forms of a keyword are still flagged."""
+    assert parsing.extract_risk_warnings("Sparks from the poles near the electrical box") == ["pole", "electric", "spark"]
+    assert parsing.extract_risk_warnings("Wire sparking, no electricity, two lines down") == ["line", "electric", "spark"]
+
+def test_every_reading_of_a_word_is_followed():
+    """Test that a word matches both as itself and as an inflected keyword, alone and inside a phrase."""
+    matcher = risk_matcher.RiskMatcher({"lines": 1, "power line": 2})
+    assert matcher.keywords_found("power lines") == ["lines", "power line"]
+    assert parsing.extract_risk_warnings("power lines down") == parsing.extract_risk_warnings("the power lines") \
+        == ["power lines", "line"]
+
+def test_phrase_positions_and_score(matcher):
+    """Test that phrase matches report offsets and a weighted score."""
+    text = "Tree on the Power Lines near the pole"
+    matches = matcher.match(text)
+    assert [(m.keyword, text[m.start:m.end]) for m in matches] == [
+        ("power lines", "Power Lines"), ("line", "Lines"), ("pole", "pole")]
+    assert matcher.score(text) == 5
+
+def test_phrase_separators(matcher):
+    """Test that hyphens join phrase words but sentence punctuation does not."""
+    assert matcher.keywords_found("a high-voltage line") == ["line", "high voltage"]
+    assert matcher.keywords_found("the power. Lines are fine") == ["line"]
+
+def test_score_counts_each_keyword_once(matcher):
+    """Test that repeating a keyword does not inflate the score."""
+    assert matcher.score("pole pole pole") == 1
+
+def test_keyword_file_hot_reload(tmp_path, monkeypatch):
+    """Test that edits to the keyword file are picked up without a restart."""
+    path = tmp_path / "keywords.json"
+    path.write_text(json.dumps({"downed wire": 5}))
+    monkeypatch.setenv("BLOOM_RISK_KEYWORDS", str(path))
+    monkeypatch.setattr(risk_matcher, "_matcher", None)
+    monkeypatch.setattr(risk_matcher, "RELOAD_CHECK_INTERVAL", 0)
+
+    first = risk_matcher.get_matcher()
+    assert first.keywords_found("a downed wire") == ["downed wire"]
+    assert risk_matcher.get_matcher() is first  # unchanged file: no rebuild
+
+    path.write_text(json.dumps(["tree on house"]))
+    os.utime(path, (1, 1))  # make sure the mtime differs
+    assert risk_matcher.get_matcher().keywords_found("a tree on house") == ["tree on house"]
+
+def test_set_weights_keeps_file_reload(tmp_path, monkeypatch):
+    """Test that an override from set_weights gives way to a later keyword file edit."""
+    path = tmp_path / "keywords.json"
+    path.write_text(json.dumps(["downed wire"]))
+    monkeypatch.setenv("BLOOM_RISK_KEYWORDS", str(path))
+    monkeypatch.setattr(risk_matcher, "_matcher", None)
+    monkeypatch.setattr(risk_matcher, "RELOAD_CHECK_INTERVAL", 0)
+
+    risk_matcher.set_weights(["gas smell"])
+    assert risk_matcher.get_matcher().keywords_found("a gas smell") == ["gas smell"]
+
+    path.write_text(json.dumps(["tree on house"]))
+    os.utime(path, (1, 1))
+    assert risk_matcher.get_matcher().keywords_found("a tree on house") == ["tree on house"]
@@ -0,0 +1,48 @@
+import pytest
+import sys
+import os
+import subprocess
+
+# Add parent directory (and the benchmarks) to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+BENCHMARKS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from utils import geocode, geocode_cache, local_geocoder
+import run_suite
+
+
+@pytest.fixture
+def restore_geocoding(monkeypatch):
+    # The geocode benchmarks install a stub geocoder and cache process-wide
+    monkeypatch.setattr(geocode, "_geolocator", geocode._geolocator)
+    monkeypatch.setattr(geocode, "nominatim_limiter", geocode.nominatim_limiter)
+    monkeypatch.setattr(geocode_cache, "get_default_cache", geocode_cache.get_default_cache)
+    monkeypatch.setattr(local_geocoder, "_default_index", local_geocoder._default_index)
+    monkeypatch.setattr(local_geocoder, "_default_index_loaded", local_geocoder._default_index_loaded)
+
+
+def test_one_round_smoke(restore_geocoding):
+    """Test that one round of a few benchmarks runs and reports latencies."""
+    results = run_suite.run_suite(["standardize_phone", "geocode_uncached", "geocode_cached"], scale=1, rounds=1)
+    for name in ("standardize_phone", "geocode_uncached", "geocode_cached"):
+        assert results[name]["n"] > 0
+        assert 0 < results[name]["p50_us"] <= results[name]["p90_us"] <= results[name]["max_us"]
+
+def test_stub_geocoder_is_stable():
+    """Test that stub coordinates do not depend on the process's hash seed."""
+    code = ("import run_suite; l = run_suite.StubGeolocator().geocode('12 Main St, Jasper, IN 47546'); "
+            "print(l.latitude, l.longitude)")
+    outputs = set()
+    for seed in ("1", "2"):
+        env = dict(os.environ, PYTHONHASHSEED=seed)
+        outputs.add(subprocess.run([sys.executable, "-c", code], cwd=BENCHMARKS_DIR, env=env,
+                                   capture_output=True, text=True, check=True).stdout)
+    assert len(outputs) == 1
+
+def test_compare_flags_slower_stages():
+    """Test that only slowdowns past both the ratio and the absolute floor are reported."""
+    baseline = {"a": {"p50_us": 10.0, "p90_us": 20.0}, "b": {"p50_us": 1.0, "p90_us": 2.0}}
+    current = {"a": {"p50_us": 30.0, "p90_us": 21.0}, "b": {"p50_us": 3.0, "p90_us": 4.0}}
+    regressions = run_suite.compare(current, baseline, threshold=0.5)
+    assert [(r["benchmark"], r["metric"]) for r in regressions] == [("a", "p50_us")]
@@ -0,0 +1,76 @@
+import pytest
+import sys
+import os
+import datetime
+
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import standardize, synthetic
+
+PHONES = ["(555) 123-4567", "555.123.4567", "+1 555-123-4567", "15551234567", "25551234567",
+          "555-1234", "call me", "", "555 123 4567 ext 9", "٥٥٥١٢٣٤٥٦٧", "555１２３4567"]
+DATES = ["2024-02-03", "2024-2-3", "2024-02-03 14:05:09", "2024-02-03T14:05:09", "2024-02-03 14:05",
+         "2024/2/3", "2/3/2024", "13/02/2024", "12-05-2024", "13-05-2024", "2-11-26", "Feb 3, 2024",
+         "February 3, 2024", "Sept 3, 2024", "MAR 5, 2024", "3 Feb 2024", " 2024-02-03",
+         datetime.date(2024, 1, 2), datetime.datetime(2024, 1, 2, 3, 4, 5)]
+UNPARSEABLE = ["garbage", "2024-02-30", "2024-02-03 25:00:00", ""]
+
+
+def test_phone_series_matches_scalar():
+    """Test that every phone shape (including Unicode digits) matches standardize_phone."""
+    result = standardize.standardize_phone_series(pd.Series(PHONES, index=range(10, 10 + len(PHONES))))
+    assert list(result) == [standardize.standardize_phone(p) for p in PHONES]
+    assert list(result.index) == list(range(10, 10 + len(PHONES)))
+
+def test_phone_series_missing_values():
+    """Test that None/NaN become "" like an empty phone."""
+    result = standardize.standardize_phone_series(pd.Series([None, float("nan"), "5551234567"], dtype=object))
+    assert list(result) == ["", "", "555-123-4567"]
+
+def test_strings_blank_missing_values():
+    """Test that missing values are blanked before the str conversion, not spelled "None"/"nan"."""
+    assert list(standardize._strings(pd.Series(["a", None, float("nan")], dtype=object))) == ["a", "", ""]
+
+def test_date_series_matches_scalar():
+    """Test that vectorized shapes and the dateutil fallback give standardize_date's results."""
+    values = DATES * 3
+    result = standardize.standardize_date_series(pd.Series(values, dtype=object))
+    assert list(result) == [standardize.standardize_date(v) for v in values]
+
+def test_date_series_unparseable_is_now():
+    """Test that missing and unparseable values get the current time."""
+    before = datetime.datetime.now().replace(microsecond=0)
+    result = standardize.standardize_date_series(pd.Series(UNPARSEABLE + [None], dtype=object))
+    for value in result:
+        assert before <= datetime.datetime.strptime(value, standardize.DATETIME_FORMAT) <= datetime.datetime.now()
+
+def test_date_series_datetime_column():
+    """Test a datetime64 column."""
+    series = pd.Series([datetime.datetime(2024, 2, 3, 14, 5, 9), datetime.datetime(2025, 12, 31)])
+    assert list(standardize.standardize_date_series(series)) == ["2024-02-03 14:05:09", "2025-12-31 00:00:00"]
+
+def test_normalize_text_series_matches_scalar():
+    """Test spacing and title case, including non-ASCII letters."""
+    values = ["  jane   DOE ", "o'neil", "3rd\tst", "a\x1cb", "ǆemal", "ﬁsh", "ßtraße", "", None]
+    result = standardize.normalize_text_series(pd.Series(values, dtype=object))
+    assert list(result) == [standardize.normalize_text(v) for v in values]
+
+def test_series_match_scalar_on_corpus():
+    """Test agreement over a synthetic corpus."""
+    labels = [r["labels"] for r in synthetic.CorpusGenerator(seed=6).iter_records(500)]
+    frame = pd.DataFrame(labels)
+    assert list(standardize.standardize_phone_series(frame["phone"])) == \
+        [standardize.standardize_phone(p) for p in frame["phone"]]
+    assert list(standardize.standardize_date_series(frame["contact_date"])) == \
+        [standardize.standardize_date(d) for d in frame["contact_date"]]
+    assert list(standardize.normalize_text_series(frame["customer_name"])) == \
+        [standardize.normalize_text(n if isinstance(n, str) else None) for n in frame["customer_name"]]
+
+def test_phone_series_scalar_fallback(monkeypatch):
+    """Test the per-value path used for columns that are not all strings."""
+    monkeypatch.setattr(standardize, "_strings", lambda series: None)
+    result = standardize.standardize_phone_series(pd.Series(PHONES + [None], dtype=object))
+    assert list(result) == [standardize.standardize_phone(p) for p in PHONES] + [""]
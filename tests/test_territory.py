@@ -0,0 +1,129 @@
+import pytest
+import sys
+import os
+import json
+import math
+import random
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import batch_geocode, case_store, geocode, geocode_cache, territory
+
+# A 1 x 1 degree square around Evansville with a hole in the middle
+SQUARE = {
+    "type": "FeatureCollection",
+    "features": [{"type": "Feature", "properties": {}, "geometry": {"type": "Polygon", "coordinates": [
+        [[-88.0, 38.0], [-87.0, 38.0], [-87.0, 39.0], [-88.0, 39.0], [-88.0, 38.0]],
+        [[-87.6, 38.4], [-87.4, 38.4], [-87.4, 38.6], [-87.6, 38.6], [-87.6, 38.4]],
+    ]}}],
+}
+INSIDE = (38.2, -87.5)
+OUT_OF_STATE = (39.7, -104.9)  # same street name, Denver
+
+
+def star(points=200, center=(38.5, -87.5)):
+    """A spiky polygon with many edges, so the index has many bands."""
+    ring = []
+    for n in range(points):
+        angle = 2 * math.pi * n / points
+        r = 0.5 if n % 2 else 0.2
+        ring.append([center[1] + r * math.cos(angle), center[0] + r * math.sin(angle)])
+    return territory.ServiceTerritory([[ring]])
+
+
+@pytest.fixture
+def square(tmp_path):
+    path = tmp_path / "territory.geojson"
+    path.write_text(json.dumps(SQUARE))
+    area = territory.ServiceTerritory.from_file(str(path))
+    territory.set_default_territory(area)
+    yield area
+    territory.set_default_territory(None)
+
+
+class StubGeolocator:
+    """Nominatim stand-in: the first match is out of state unless the viewbox is bounded."""
+
+    def __init__(self):
+        self.calls = []
+
+    def geocode(self, address, timeout=None, viewbox=None, bounded=False):
+        self.calls.append(viewbox)
+        lat, lng = INSIDE if bounded else OUT_OF_STATE
+        return type("Location", (), {"latitude": lat, "longitude": lng, "address": address})()
+
+
+def test_contains_with_hole(square):
+    """Test inside, outside, the hole and unusable coordinates."""
+    assert square.contains(*INSIDE)
+    assert not square.contains(38.5, -87.5)  # in the hole
+    assert not square.contains(*OUT_OF_STATE)
+    assert not square.contains(None, None)
+    assert not square.contains(0.0, 0.0)
+    assert square.viewbox() == [(38.0, -88.0), (39.0, -87.0)]
+
+def test_contains_many_matches_contains():
+    """Test the vectorized check against the scalar one on a many-edged polygon."""
+    area = star()
+    assert area.band_count > 1
+    rnd = random.Random(0)
+    lats = [38.5 + rnd.uniform(-0.6, 0.6) for _ in range(5000)] + [float("nan"), 0.0]
+    lngs = [-87.5 + rnd.uniform(-0.6, 0.6) for _ in range(5000)] + [-87.5, 0.0]
+    expected = [area.contains(lat, lng) for lat, lng in zip(lats, lngs)]
+    assert area.contains_many(lats, lngs).tolist() == expected
+    assert 0 < sum(expected) < len(expected)
+
+def test_get_lat_long_requeries_inside_territory(square, monkeypatch):
+    """Test that an out-of-territory match is retried with a bounded viewbox."""
+    stub = StubGeolocator()
+    monkeypatch.setattr(geocode, "_geolocator", stub)
+    monkeypatch.setattr(geocode, "nominatim_limiter", geocode.TokenBucket(rate=1000, capacity=10))
+    lat, lng, _ = geocode.get_lat_long("100 Main St, Evansville", use_cache=False)
+    assert (lat, lng) == INSIDE
+    assert stub.calls == [None, square.viewbox()]
+
+    territory.set_default_territory(None)
+    assert geocode.get_lat_long("100 Main St, Evansville", use_cache=False)[:2] == OUT_OF_STATE
+
+def test_batch_keeps_original_when_requery_finds_nothing(square):
+    """Test that the first match is kept if nothing inside the territory is found."""
+    def lookup(address, viewbox=None):
+        return None if viewbox else (*OUT_OF_STATE, address)
+
+    results = list(batch_geocode.geocode_batch(["100 Main St"], lookup=lookup, use_cache=False,
+                                               limiter=geocode.TokenBucket(rate=1000, capacity=10)))
+    assert results[0][2][:2] == OUT_OF_STATE
+
+def test_failed_requery_is_not_cached(square, tmp_path, monkeypatch):
+    """Test that a timeout on the bounded re-query keeps the result out of the cache."""
+    def lookup(address, viewbox=None):
+        if viewbox:
+            raise geocode.GeocoderTimedOut("slow")
+        return (*OUT_OF_STATE, address)
+
+    cache = geocode_cache.GeocodeCache(str(tmp_path / "geocode.sqlite"))
+    monkeypatch.setattr(geocode_cache, "get_default_cache", lambda: cache)
+    results = list(batch_geocode.geocode_batch(["100 Main St"], lookup=lookup,
+                                               limiter=geocode.TokenBucket(rate=1000, capacity=10)))
+    assert results[0][2][:2] == OUT_OF_STATE
+    assert cache.get("100 Main St") is None
+
+    def no_viewbox(address):
+        return (*OUT_OF_STATE, address)
+
+    with pytest.raises(TypeError):
+        geocode.check_territory("100 Main St", (*OUT_OF_STATE, ""), no_viewbox,
+                                geocode.TokenBucket(rate=1000, capacity=10))
+
+def test_validate_store(square, tmp_path):
+    """Test that batch validation lists the geocoded cases outside the territory."""
+    store = case_store.CaseStore(str(tmp_path / "cases.sqlite"))
+    store.add_many([
+        {"case_id": "in", "gps_lat": INSIDE[0], "gps_lng": INSIDE[1]},
+        {"case_id": "denver", "gps_lat": OUT_OF_STATE[0], "gps_lng": OUT_OF_STATE[1]},
+        {"case_id": "hole", "gps_lat": 38.5, "gps_lng": -87.5},
+        {"case_id": "not-geocoded"},
+    ])
+    assert territory.validate_store(store, chunk_size=2) == {"checked": 3, "outside": ["denver", "hole"]}
+    store.close()
@@ -0,0 +1,170 @@
+import random
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from geopy.exc import GeocoderServiceError
+
+from utils import geocode, geocode_cache, local_geocoder, metrics
+from utils.standardize import normalize_address
+
+
+class BatchStats:
+    """Running counters for one geocode_batch() call."""
+
+    def __init__(self, total):
+        self.total = total
+        self.unique = 0
+        self.local_hits = 0
+        self.cache_hits = 0
+        self.lookups = 0
+        self.retries = 0
+        self.errors = 0
+        self.done = 0
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def throughput(self):
+        """Input addresses resolved per second so far."""
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self):
+        return {
+            "total": self.total,
+            "unique": self.unique,
+            "done": self.done,
+            "local_hits": self.local_hits,
+            "cache_hits": self.cache_hits,
+            "lookups": self.lookups,
+            "retries": self.retries,
+            "errors": self.errors,
+            "elapsed": round(self.elapsed, 3),
+            "throughput": round(self.throughput, 2),
+        }
+
+
+def _resolve(address, lookup, limiter, retries, backoff):
+    """
+    Look up one address with retries and exponential backoff (with jitter)
+    on transient errors. Returns ((lat, lng, message), cacheable, attempts).
+    """
+    for attempt in range(retries + 1):
+        try:
+            limiter.acquire()
+            result = lookup(address)
+            if result:
+                # A failed bounded re-query leaves the result uncacheable
+                result, settled = geocode.check_territory(address, tuple(result), lookup, limiter)
+                return result, settled, attempt + 1
+            return (None, None, geocode_cache.NOT_FOUND_MESSAGE), True, attempt + 1
+        except geocode.TRANSIENT_ERRORS as e:
+            if attempt == retries:
+                return (None, None, f"Geocoding timed out: {str(e)}"), False, attempt + 1
+            time.sleep(backoff * (2 ** attempt) * (0.5 + random.random()))
+        except GeocoderServiceError as e:
+            return (None, None, f"Geocoding service error: {str(e)}"), False, attempt + 1
+        except Exception as e:
+            return (None, None, f"Error: {str(e)}"), False, attempt + 1
+
+
+def geocode_batch(addresses, lookup=None, limiter=None, max_workers=4, retries=3,
+                  backoff=1.0, use_cache=True, progress=None):
+    """
+    Geocode many addresses, streaming results as they finish.
+
+    Addresses are de-duplicated on their normalized form, so each distinct
+    address costs at most one (rate-limited) lookup. Matches from the local
+    address-point index and cached results are yielded first.
+
+    `lookup` takes an address and returns (lat, lng, formatted_address) or
+    None; it defaults to geocode.nominatim_lookup. Results outside the
+    service territory (if one is configured) are looked up once more with
+    a bounded viewbox, so `lookup` must accept a viewbox keyword.
+    Every lookup (including retries) first takes a token from `limiter`,
+    which defaults to the process-wide Nominatim limiter (1 req/s) shared
+    with get_lat_long. `progress`, if given, is called with a BatchStats
+    after every resolved address.
+
+    Yields (index, address, (lat, lng, message)) for every input address,
+    in completion order rather than input order.
+    """
+    addresses = list(addresses)
+    lookup = lookup or geocode.nominatim_lookup
+    limiter = limiter or geocode.nominatim_limiter
+    cache = geocode_cache.get_default_cache() if use_cache else None
+    local_index = local_geocoder.get_default_index()
+    stats = BatchStats(len(addresses))
+
+    groups = OrderedDict()
+    for i, address in enumerate(addresses):
+        key = normalize_address(address)
+        if not key:
+            stats.done += 1
+            yield i, address, (None, None, "No address provided")
+            continue
+        groups.setdefault(key, []).append(i)
+    stats.unique = len(groups)
+
+    def emit(indices, result):
+        for i in indices:
+            stats.done += 1
+            yield i, addresses[i], result
+        if progress:
+            progress(stats)
+
+    pending = []
+    for key, indices in groups.items():
+        local = local_index.lookup(addresses[indices[0]]) if local_index is not None else None
+        if local is not None:
+            stats.local_hits += 1
+            yield from emit(indices, local)
+            continue
+        cached = cache.get(addresses[indices[0]]) if cache is not None else None
+        if cached is not None:
+            stats.cache_hits += 1
+            yield from emit(indices, cached)
+        else:
+            pending.append(indices)
+
+    if not pending:
+        return
+
+    # Submit lazily, at most 2 lookups per worker ahead, so a consumer that
+    # stops early leaves only those to cancel rather than the whole batch
+    max_in_flight = 2 * max_workers
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    in_flight = {}
+    pending = iter(pending)
+    try:
+        while True:
+            while len(in_flight) < max_in_flight:
+                indices = next(pending, None)
+                if indices is None:
+                    break
+                future = pool.submit(_resolve, addresses[indices[0]], lookup, limiter, retries, backoff)
+                in_flight[future] = indices
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                indices = in_flight.pop(future)
+                result, cacheable, attempts = future.result()
+                stats.lookups += attempts
+                stats.retries += attempts - 1
+                if attempts > 1:
+                    metrics.inc("retries", attempts - 1, stage="geocode")
+                if cacheable and cache is not None:
+                    cache.set(addresses[indices[0]], *result)
+                if not cacheable:
+                    stats.errors += 1
+                    metrics.inc("errors", stage="geocode_batch")
+                yield from emit(indices, result)
+    finally:
+        # Don't wait for queued lookups nobody will read
+        for future in in_flight:
+            future.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,293 @@
+import contextlib
+import csv
+import glob
+import gzip
+import hashlib
+import io
+import json
+import math
+import os
+import struct
+import threading
+import time
+import uuid
+
+from utils import case_store, geo
+
+DEFAULT_EXPORT_DIR = os.path.join(".cache", "exports")
+CHUNK_SIZE = 5000
+EXPORT_FIELDS = case_store.COLUMNS
+
+# Export format -> file name of the cached artifact
+FORMATS = {
+    "csv": "cases.csv",
+    "csv.gz": "cases.csv.gz",
+    "parquet": "cases.parquet",
+    "geojsonl": "cases.geojsonl",
+    "geoparquet": "cases.geoparquet",
+}
+MIME_TYPES = {
+    "csv": "text/csv",
+    "csv.gz": "application/gzip",
+    "parquet": "application/vnd.apache.parquet",
+    "geojsonl": "application/x-ndjson",
+    "geoparquet": "application/vnd.apache.parquet",
+}
+# Formats whose cached file can be extended with new cases (the rest are rewritten)
+APPENDABLE = {"csv", "csv.gz", "geojsonl"}
+# Filtered exports are one file per request, deleted after this many seconds
+FILTERED_MAX_AGE = 3600
+
+
+def iter_csv(store, chunk_size=CHUNK_SIZE, header=True, after_id=0, **filters):
+    """
+    CSV of the store's cases as a stream of encoded chunks, one per
+    chunk_size rows, so the whole export is never built in memory.
+    Filters (channel, date_from, date_to, bbox; see CaseStore._where)
+    and through_id are applied by the store's query.
+    """
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+    if header:
+        writer.writeheader()
+    rows = 0
+    for case in store.iter_cases(chunk_size=chunk_size, after_id=after_id, **filters):
+        writer.writerow(case)
+        rows += 1
+        if rows % chunk_size == 0:
+            yield buf.getvalue().encode('utf-8')
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode('utf-8')
+
+def _point(case):
+    """(lng, lat) of a geocoded case, or None."""
+    lat, lng = case.get('gps_lat'), case.get('gps_lng')
+    return (float(lng), float(lat)) if geo.valid_point(lat, lng) else None
+
+def iter_geojsonl(store, chunk_size=CHUNK_SIZE, after_id=0, **filters):
+    """
+    Newline-delimited GeoJSON, streamed like iter_csv: one Feature per
+    case, with a Point geometry from gps_lat/gps_lng (null when the case
+    is not geocoded) and the export fields as properties.
+    """
+    lines = []
+    for case in store.iter_cases(chunk_size=chunk_size, after_id=after_id, **filters):
+        point = _point(case)
+        lines.append(json.dumps({
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": list(point)} if point else None,
+            "properties": {f: case.get(f) for f in EXPORT_FIELDS},
+        }, default=str))
+        if len(lines) >= chunk_size:
+            yield ("\n".join(lines) + "\n").encode('utf-8')
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode('utf-8')
+
+def _parquet_schema():
+    import pyarrow as pa
+    return pa.schema([(f, pa.float64() if f in case_store.REAL_COLUMNS else pa.string())
+                      for f in EXPORT_FIELDS])
+
+def _write_parquet(store, path, chunk_size, geometry, filters):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema()
+    out_schema = schema.append(pa.field("geometry", pa.binary())) if geometry else schema
+    bbox = [math.inf, math.inf, -math.inf, -math.inf]  # min lng, min lat, max lng, max lat
+
+    def table(chunk):
+        columns = pa.Table.from_pylist(chunk, schema=schema)
+        if not geometry:
+            return columns
+        wkb = []
+        for case in chunk:
+            point = _point(case)
+            if point is None:
+                wkb.append(None)
+                continue
+            lng, lat = point
+            bbox[:] = [min(bbox[0], lng), min(bbox[1], lat), max(bbox[2], lng), max(bbox[3], lat)]
+            wkb.append(struct.pack("<BIdd", 1, 1, lng, lat))  # little-endian WKB Point
+        return columns.append_column("geometry", pa.array(wkb, type=pa.binary()))
+
+    # Without the embedded Arrow schema, readers take the schema metadata
+    # from the file's key-value metadata, where "geo" (with the bbox, only
+    # known at the end) is added last
+    with pq.ParquetWriter(path, out_schema, compression="zstd", store_schema=not geometry) as writer:
+        chunk = []
+        for case in store.iter_cases(chunk_size=chunk_size, **filters):
+            chunk.append(case)
+            if len(chunk) >= chunk_size:
+                writer.write_table(table(chunk))
+                chunk = []
+        if chunk:
+            writer.write_table(table(chunk))
+        if geometry:
+            column = {"encoding": "WKB", "geometry_types": ["Point"]}  # CRS defaults to OGC:CRS84 (lng/lat)
+            if bbox[0] <= bbox[2]:
+                column["bbox"] = bbox
+            writer.add_key_value_metadata({"geo": json.dumps(
+                {"version": "1.0.0", "primary_column": "geometry", "columns": {"geometry": column}})})
+
+def write_parquet(store, path, chunk_size=CHUNK_SIZE, **filters):
+    """Write the store's cases to a Parquet file, one row group per chunk."""
+    _write_parquet(store, path, chunk_size, False, filters)
+
+def write_geoparquet(store, path, chunk_size=CHUNK_SIZE, **filters):
+    """
+    GeoParquet 1.0: the Parquet export plus a WKB Point `geometry` column
+    (null when not geocoded) and the "geo" file metadata GIS tools read.
+    """
+    _write_parquet(store, path, chunk_size, True, filters)
+
+def write_export(store, path, fmt="csv", **filters):
+    """Write the cases matching `filters` to `path` in format fmt (see FORMATS), streaming."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    tmp = path + ".tmp"
+    if fmt == "parquet":
+        write_parquet(store, tmp, **filters)
+    elif fmt == "geoparquet":
+        write_geoparquet(store, tmp, **filters)
+    else:
+        opener = gzip.open if fmt == "csv.gz" else open
+        chunks = iter_geojsonl(store, **filters) if fmt == "geojsonl" else iter_csv(store, **filters)
+        with opener(tmp, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+    os.replace(tmp, path)
+
+@contextlib.contextmanager
+def _file_lock(path):
+    """Exclusive lock between processes sharing the export directory (POSIX only)."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class ExportCache:
+    """
+    Export files of the case store, built only when asked for and kept on
+    disk. Each artifact records the store version (last row id) it covers:
+    when cases have been appended since, CSV and GeoJSON-lines exports get
+    just the new rows appended (a new gzip member for .csv.gz) and the
+    Parquet ones are rewritten; otherwise the existing file is returned as
+    is. Filtered exports are written fresh on every request, each to its
+    own file (so sessions with different filters never share one), and
+    removed after FILTERED_MAX_AGE seconds.
+    """
+
+    def __init__(self, directory=DEFAULT_EXPORT_DIR):
+        self.directory = directory
+        self.builds = 0
+        self.appends = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _meta_path(self, path):
+        return path + ".json"
+
+    def _read_meta(self, path):
+        try:
+            with open(self._meta_path(path), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, path, meta):
+        tmp = self._meta_path(path) + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path(path))
+
+    def get(self, store, fmt="csv", **filters):
+        """
+        Path of an up-to-date export of `store` in format fmt (see FORMATS),
+        limited to the cases matching `filters` (see CaseStore._where).
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        filters = {k: v for k, v in filters.items() if v is not None}
+        if filters:
+            self._prune_filtered()
+            key = hashlib.sha1(json.dumps(filters, sort_keys=True, default=str).encode()).hexdigest()[:12]
+            path = os.path.join(self.directory, f"filtered-{key}-{uuid.uuid4().hex[:8]}-{FORMATS[fmt]}")
+            write_export(store, path, fmt, **filters)
+            with self._lock:
+                self.builds += 1
+            return path
+        path = os.path.join(self.directory, FORMATS[fmt])
+        with self._lock, _file_lock(path + ".lock"):
+            version = store.version()
+            meta = self._read_meta(path)
+            usable = (meta is not None and meta.get("store") == os.path.abspath(store.path)
+                      and meta.get("version", 0) <= version and os.path.exists(path)
+                      and os.path.getsize(path) >= meta.get("size", 0))
+            if usable and meta["version"] == version:
+                self.hits += 1
+                return path
+            # Only rows up to `version` go in, so the recorded version is
+            # exactly what the file holds even while others keep saving cases
+            if usable and fmt in APPENDABLE:
+                self._append(store, path, meta, fmt, version)
+                self.appends += 1
+            else:
+                write_export(store, path, fmt, through_id=version)
+                self.builds += 1
+            self._write_meta(path, {"store": os.path.abspath(store.path), "version": version,
+                                    "size": os.path.getsize(path)})
+            return path
+
+    def _prune_filtered(self):
+        cutoff = time.time() - FILTERED_MAX_AGE
+        for path in glob.glob(os.path.join(self.directory, "filtered-*")):
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass  # already removed by another worker
+
+    def _append(self, store, path, meta, fmt, version):
+        with open(path, 'r+b') as f:
+            # Drop anything written after the last recorded append (e.g. by
+            # a run that died before updating the metadata)
+            f.truncate(meta["size"])
+            f.seek(0, os.SEEK_END)
+            out = gzip.GzipFile(fileobj=f, mode='wb') if fmt == "csv.gz" else f
+            if fmt == "geojsonl":
+                chunks = iter_geojsonl(store, after_id=meta["version"], through_id=version)
+            else:
+                chunks = iter_csv(store, header=False, after_id=meta["version"], through_id=version)
+            for chunk in chunks:
+                out.write(chunk)
+            if fmt == "csv.gz":
+                out.close()
+
+    def stats(self):
+        return {"builds": self.builds, "appends": self.appends, "hits": self.hits}
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_default_cache():
+    """Process-wide export cache; the directory comes from BLOOM_EXPORT_DIR."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = ExportCache(os.environ.get("BLOOM_EXPORT_DIR", DEFAULT_EXPORT_DIR))
+    return _default_cache
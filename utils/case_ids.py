@@ -0,0 +1,105 @@
+import datetime
+import os
+import sqlite3
+import threading
+
+from utils import case_store, standardize
+
+DEFAULT_BLOCK_SIZE = 50
+# Digits in the daily sequence number: RPC-20260215-00042. Numbers past
+# 99999 in a day simply get longer rather than wrapping or colliding.
+CASE_NUMBER_WIDTH = 5
+
+
+def _today():
+    return datetime.datetime.now().strftime('%Y%m%d')
+
+
+class CaseIdAllocator:
+    """
+    Unique case IDs across threads, processes and app workers sharing one
+    database file (by default the case store's).
+
+    Each allocator reserves a block of block_size sequence numbers for the
+    day with a single short write transaction, then hands them out from
+    memory, so only one in block_size IDs touches the database. IDs are
+    increasing within a process; across processes they are unique and
+    ordered by block. Numbers left in a block when a process exits are
+    skipped, never reused.
+    """
+
+    def __init__(self, path=case_store.DEFAULT_STORE_PATH, block_size=DEFAULT_BLOCK_SIZE,
+                 width=CASE_NUMBER_WIDTH, clock=_today):
+        self.path = path
+        self.block_size = block_size
+        self.width = width
+        self.clock = clock
+        self.reservations = 0
+        self.allocated = 0
+        self._lock = threading.Lock()
+        self._day = None
+        self._next = 0
+        self._end = 0  # first number past the current block
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS case_id_blocks (day TEXT PRIMARY KEY, next INTEGER NOT NULL)"
+        )
+
+    def _reserve(self, day):
+        """Claim the next block for `day`; returns its first number."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute("INSERT OR IGNORE INTO case_id_blocks (day, next) VALUES (?, 1)", (day,))
+            start = self._conn.execute("SELECT next FROM case_id_blocks WHERE day = ?", (day,)).fetchone()[0]
+            self._conn.execute("UPDATE case_id_blocks SET next = ? WHERE day = ?",
+                               (start + self.block_size, day))
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self.reservations += 1
+        return start
+
+    def next_number(self):
+        """(day, sequence number) for a new case."""
+        with self._lock:
+            day = self.clock()
+            if day != self._day or self._next >= self._end:
+                self._next = self._reserve(day)
+                self._end = self._next + self.block_size
+                self._day = day
+            number = self._next
+            self._next += 1
+            self.allocated += 1
+            return day, number
+
+    def next_id(self):
+        day, number = self.next_number()
+        return standardize.generate_case_id(number, width=self.width, day=day)
+
+    def stats(self):
+        return {"allocated": self.allocated, "reservations": self.reservations,
+                "block_size": self.block_size}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_allocator = None
+_default_allocator_lock = threading.Lock()
+
+def get_default_allocator():
+    """Process-wide allocator on the case store database (BLOOM_CASE_DB)."""
+    global _default_allocator
+    if _default_allocator is None:
+        with _default_allocator_lock:
+            if _default_allocator is None:
+                _default_allocator = CaseIdAllocator(
+                    os.environ.get("BLOOM_CASE_DB", case_store.DEFAULT_STORE_PATH))
+    return _default_allocator
@@ -0,0 +1,196 @@
+import heapq
+import math
+import threading
+from array import array
+
+from utils import geo
+
+# Grid cell size in degrees: about 550 m north-south (less east-west)
+DEFAULT_CELL_DEG = 0.005
+# Saved cases this close to a new one are shown as possible duplicates
+DUPLICATE_RADIUS_M = 200
+
+
+class CaseLocationIndex:
+    """
+    Grid index of saved case locations for radius and nearest-case queries.
+
+    Points are bucketed in cell_deg x cell_deg cells. radius() only looks
+    at the cells overlapping the circle's bounding box; nearest() searches
+    rings of cells outward until nothing unseen can be closer. refresh()
+    adds only the cases saved since the last refresh (the store is
+    append-only), so keeping the index current costs one version check.
+    """
+
+    def __init__(self, cell_deg=DEFAULT_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.version = 0  # largest store row id already indexed
+        self.case_ids = []
+        self.lats = array('d')
+        self.lngs = array('d')
+        self.cells = {}
+        self._bounds = None  # (min_i, min_j, max_i, max_j) of occupied cells
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.case_ids)
+
+    def _cell(self, lat, lng):
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def add(self, case_id, lat, lng):
+        """Index one location; returns False (and skips it) for missing or 0/0 coordinates."""
+        if not geo.valid_point(lat, lng):
+            return False
+        lat, lng = float(lat), float(lng)
+        key = self._cell(lat, lng)
+        with self._lock:
+            row = len(self.case_ids)
+            self.case_ids.append(case_id)
+            self.lats.append(lat)
+            self.lngs.append(lng)
+            cell = self.cells.get(key)
+            if cell is None:
+                cell = self.cells[key] = array('i')
+            cell.append(row)
+            i, j = key
+            if self._bounds is None:
+                self._bounds = (i, j, i, j)
+            else:
+                a, b, c, d = self._bounds
+                self._bounds = (min(a, i), min(b, j), max(c, i), max(d, j))
+        return True
+
+    def refresh(self, store):
+        """Index the cases added to `store` since the last refresh."""
+        with self._refresh_lock:
+            version = store.version()
+            if version == self.version:
+                return self
+            last = self.version
+            for row_id, case_id, lat, lng in store.iter_points(after_id=self.version):
+                self.add(case_id, lat, lng)
+                last = row_id
+            self.version = max(version, last)
+            return self
+
+    def _result(self, row, distance):
+        return {"case_id": self.case_ids[row], "lat": self.lats[row], "lng": self.lngs[row],
+                "distance_m": distance}
+
+    def radius(self, lat, lng, radius_m, limit=None):
+        """Cases within radius_m metres, nearest first: [{case_id, lat, lng, distance_m}]."""
+        min_lat, min_lng, max_lat, max_lng = geo.bbox_around(lat, lng, radius_m)
+        i0, j0 = self._cell(min_lat, min_lng)
+        i1, j1 = self._cell(max_lat, max_lng)
+        lats, lngs, cells = self.lats, self.lngs, self.cells
+        found = []
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                for row in cells.get((i, j), ()):
+                    plat, plng = lats[row], lngs[row]
+                    if min_lat <= plat <= max_lat and min_lng <= plng <= max_lng:
+                        distance = geo.haversine_m(lat, lng, plat, plng)
+                        if distance <= radius_m:
+                            found.append((distance, row))
+        found.sort()
+        return [self._result(row, d) for d, row in found[:limit]]
+
+    def within(self, min_lat, min_lng, max_lat, max_lng, limit=None):
+        """Cases inside a lat/lng box (at most `limit`): [{case_id, lat, lng}]."""
+        i0, j0 = self._cell(min_lat, min_lng)
+        i1, j1 = self._cell(max_lat, max_lng)
+        lats, lngs, cells = self.lats, self.lngs, self.cells
+        found = []
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                for row in cells.get((i, j), ()):
+                    if min_lat <= lats[row] <= max_lat and min_lng <= lngs[row] <= max_lng:
+                        found.append({"case_id": self.case_ids[row], "lat": lats[row], "lng": lngs[row]})
+                        if limit is not None and len(found) >= limit:
+                            return found
+        return found
+
+    def nearest(self, lat, lng, k=5, max_distance_m=None):
+        """The k nearest cases (optionally within max_distance_m), nearest first."""
+        if not self.case_ids:
+            return []
+        ci, cj = self._cell(lat, lng)
+        bounds = self._bounds
+        a, b, c, d = bounds
+        # Rings closer than the occupied area are empty; rings past it too
+        first_ring = max(0, a - ci, ci - c, b - cj, cj - d)
+        last_ring = max(ci - a, c - ci, cj - b, d - cj)
+        # Few points spread thinly: stop walking (mostly empty) cells once
+        # that costs more than measuring every point
+        budget = 4 * len(self.case_ids) + 64
+
+        best = []  # max-heap of (-distance, row)
+        lats, lngs, cells = self.lats, self.lngs, self.cells
+        cell_h = self.cell_deg * geo.METERS_PER_DEGREE
+        for ring in range(first_ring, last_ring + 1):
+            for i, j in _ring_cells(ci, cj, ring, bounds):
+                budget -= 1
+                for row in cells.get((i, j), ()):
+                    distance = geo.haversine_m(lat, lng, lats[row], lngs[row])
+                    if max_distance_m is not None and distance > max_distance_m:
+                        continue
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, row))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, row))
+            # Anything in rings further out is at least `ring` cells away
+            cell_w = self.cell_deg * geo.meters_per_degree_lng(min(abs(lat) + (ring + 1) * self.cell_deg, 89.9))
+            reach = ring * min(cell_h, cell_w)
+            if len(best) == k and -best[0][0] <= reach:
+                break
+            if max_distance_m is not None and reach > max_distance_m:
+                break
+            if budget < 0:
+                return self._nearest_scan(lat, lng, k, max_distance_m)
+        return [self._result(row, -neg) for neg, row in sorted(best, reverse=True)]
+
+    def _nearest_scan(self, lat, lng, k, max_distance_m):
+        # Few points spread over a large area: a scan beats walking empty rings
+        distances = ((geo.haversine_m(lat, lng, self.lats[row], self.lngs[row]), row)
+                     for row in range(len(self.case_ids)))
+        if max_distance_m is not None:
+            distances = (item for item in distances if item[0] <= max_distance_m)
+        return [self._result(row, d) for d, row in heapq.nsmallest(k, distances)]
+
+    def duplicates(self, lat, lng, case_id=None, radius_m=DUPLICATE_RADIUS_M):
+        """Saved cases close enough to be the same report (excluding case_id itself)."""
+        if not geo.valid_point(lat, lng):
+            return []
+        return [n for n in self.radius(float(lat), float(lng), radius_m) if n["case_id"] != case_id]
+
+
+def _ring_cells(ci, cj, ring, bounds):
+    """Cells at Chebyshev distance `ring` from (ci, cj), clipped to bounds (min_i, min_j, max_i, max_j)."""
+    a, b, c, d = bounds
+    if ring == 0:
+        yield ci, cj
+        return
+    j_lo, j_hi = max(cj - ring, b), min(cj + ring, d)
+    for i in (ci - ring, ci + ring):
+        if a <= i <= c:
+            for j in range(j_lo, j_hi + 1):
+                yield i, j
+    i_lo, i_hi = max(ci - ring + 1, a), min(ci + ring - 1, c)
+    for j in (cj - ring, cj + ring):
+        if b <= j <= d:
+            for i in range(i_lo, i_hi + 1):
+                yield i, j
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_index(store):
+    """Process-wide location index of a store, brought up to date."""
+    with _indexes_lock:
+        index = _indexes.get(store.path)
+        if index is None:
+            index = _indexes[store.path] = CaseLocationIndex()
+    return index.refresh(store)
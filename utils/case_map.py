@@ -0,0 +1,181 @@
+import math
+import threading
+
+from utils import case_index
+
+# Zoom levels with precomputed clusters; closer in, the visible area is
+# small enough to show individual cases from the location index
+MAX_CLUSTER_ZOOM = 14
+MAX_ZOOM = 18
+# Clusters are cells of 2**CELL_BITS x 2**CELL_BITS per 256 px map tile (64 px)
+CELL_BITS = 2
+# Web Mercator stops short of the poles
+MAX_MERCATOR_LAT = 85.05112878
+# Cases returned for one view at most (individual points past MAX_CLUSTER_ZOOM)
+MAX_VISIBLE = 5000
+
+
+def _cell_xy(lats, lngs, level):
+    """Web Mercator cell coordinates (numpy int64 arrays) at 2**level cells per side."""
+    import numpy as np
+
+    scale = float(2 ** level)
+    phi = np.radians(np.clip(lats, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+    x = np.floor((lngs + 180.0) / 360.0 * scale)
+    y = np.floor((1.0 - np.log(np.tan(phi) + 1.0 / np.cos(phi)) / math.pi) / 2.0 * scale)
+    return np.clip(x, 0, scale - 1).astype(np.int64), np.clip(y, 0, scale - 1).astype(np.int64)
+
+def view_bbox(lat, lng, zoom, width=800, height=500):
+    """(min_lat, min_lng, max_lat, max_lng) seen by a width x height px map centered at lat/lng."""
+    deg_per_px = 360.0 / (256 * 2 ** zoom)
+    half_w = width / 2 * deg_per_px
+    # Mercator stretches latitude by 1/cos(lat)
+    half_h = height / 2 * deg_per_px * math.cos(math.radians(max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat))))
+    return (max(lat - half_h, -90.0), max(lng - half_w, -180.0),
+            min(lat + half_h, 90.0), min(lng + half_w, 180.0))
+
+def cell_size_m(lat, zoom):
+    """Ground size of one cluster cell at this latitude and zoom."""
+    return 2 ** (8 - CELL_BITS) * 156543.03 * math.cos(math.radians(lat)) / 2 ** zoom
+
+
+class ClusterIndex:
+    """
+    Case counts per map cell at every zoom level from 0 to max_zoom.
+
+    Each level is a dict from a packed Web Mercator cell key to
+    [count, sum of lats, sum of lngs, first case_id], so a cluster's
+    position is the mean of its cases. New cases are merged into every
+    level in one numpy pass per batch; refresh() reads only the cases
+    saved since the last refresh (the store is append-only). A view asks
+    for the cells of one level inside its bounding box, so what it
+    returns is bounded by the screen size, not the number of cases.
+    """
+
+    def __init__(self, max_zoom=MAX_CLUSTER_ZOOM):
+        self.max_zoom = max_zoom
+        self.levels = [{} for _ in range(max_zoom + 1)]
+        self.version = 0  # largest store row id already added
+        self.count = 0
+        self.bounds = None  # (min_lat, min_lng, max_lat, max_lng)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def add_many(self, case_ids, lats, lngs):
+        """Add cases; rows without usable coordinates (missing, 0/0, out of range) are skipped."""
+        import numpy as np
+
+        lats = np.asarray(lats, dtype=float)
+        lngs = np.asarray(lngs, dtype=float)
+        keep = np.flatnonzero((np.abs(lats) <= 90) & (np.abs(lngs) <= 180) & ~((lats == 0) & (lngs == 0)))
+        if not len(keep):
+            return 0
+        lats, lngs = lats[keep], lngs[keep]
+        x, y = _cell_xy(lats, lngs, self.max_zoom + CELL_BITS)
+        with self._lock:
+            for zoom, level in enumerate(self.levels):
+                shift = self.max_zoom - zoom
+                keys = ((x >> shift) << 32) | (y >> shift)
+                unique, first, inverse, counts = np.unique(keys, return_index=True, return_inverse=True,
+                                                           return_counts=True)
+                sum_lat = np.bincount(inverse, weights=lats)
+                sum_lng = np.bincount(inverse, weights=lngs)
+                for key, n, a, b, row in zip(unique.tolist(), counts.tolist(), sum_lat.tolist(),
+                                             sum_lng.tolist(), first.tolist()):
+                    cell = level.get(key)
+                    if cell is None:
+                        level[key] = [n, a, b, case_ids[keep[row]]]
+                    else:
+                        cell[0] += n
+                        cell[1] += a
+                        cell[2] += b
+            box = (float(lats.min()), float(lngs.min()), float(lats.max()), float(lngs.max()))
+            if self.bounds is not None:
+                box = (min(box[0], self.bounds[0]), min(box[1], self.bounds[1]),
+                       max(box[2], self.bounds[2]), max(box[3], self.bounds[3]))
+            self.bounds = box
+            self.count += len(keep)
+        return len(keep)
+
+    def refresh(self, store, chunk_size=100000):
+        """Add the cases saved to `store` since the last refresh."""
+        with self._refresh_lock:
+            version = store.version()
+            if version == self.version:
+                return self
+            last = self.version
+            ids, lats, lngs = [], [], []
+            for row_id, case_id, lat, lng in store.iter_points(after_id=self.version, chunk_size=chunk_size):
+                ids.append(case_id)
+                lats.append(lat)
+                lngs.append(lng)
+                last = row_id
+                if len(ids) >= chunk_size:
+                    self.add_many(ids, lats, lngs)
+                    ids, lats, lngs = [], [], []
+            if ids:
+                self.add_many(ids, lats, lngs)
+            self.version = max(version, last)
+            return self
+
+    def clusters(self, zoom, bbox=None):
+        """
+        Clusters at a zoom level (clamped to max_zoom), optionally only
+        those whose cell overlaps bbox (min_lat, min_lng, max_lat, max_lng):
+        [{lat, lng, count, case_id}], case_id being one case of the cluster.
+        """
+        import numpy as np
+
+        zoom = max(0, min(int(zoom), self.max_zoom))
+        level = self.levels[zoom]
+        with self._lock:
+            if bbox is None:
+                cells = list(level.values())
+            else:
+                min_lat, min_lng, max_lat, max_lng = bbox
+                (x0, x1), (y1, y0) = _cell_xy(np.array([min_lat, max_lat]), np.array([min_lng, max_lng]),
+                                              zoom + CELL_BITS)
+                x0, x1, y0, y1 = int(x0), int(x1), int(y0), int(y1)
+                if (x1 - x0 + 1) * (y1 - y0 + 1) <= len(level):
+                    cells = [level[key] for key in ((x << 32) | y for x in range(x0, x1 + 1)
+                                                    for y in range(y0, y1 + 1)) if key in level]
+                else:
+                    cells = [cell for key, cell in level.items()
+                             if x0 <= key >> 32 <= x1 and y0 <= key & 0xFFFFFFFF <= y1]
+            return [{"lat": a / n, "lng": b / n, "count": n, "case_id": case_id} for n, a, b, case_id in cells]
+
+    def center(self, width=800, height=500):
+        """(lat, lng, zoom) of a width x height px view showing every case, or None if empty."""
+        if self.bounds is None:
+            return None
+        min_lat, min_lng, max_lat, max_lng = self.bounds
+        lat = (min_lat + max_lat) / 2
+        # 2**zoom at which the cases just fill the view's width / height
+        fit_w = width * 360.0 / 256 / max(max_lng - min_lng, 1e-9)
+        fit_h = height * 360.0 / 256 * math.cos(math.radians(lat)) / max(max_lat - min_lat, 1e-9)
+        zoom = max(0, min(MAX_ZOOM, int(math.log2(min(fit_w, fit_h)))))
+        return lat, (min_lng + max_lng) / 2, zoom
+
+
+_maps = {}
+_maps_lock = threading.Lock()
+
+def get_clusters(store):
+    """Process-wide cluster index of a store, brought up to date."""
+    with _maps_lock:
+        index = _maps.get(store.path)
+        if index is None:
+            index = _maps[store.path] = ClusterIndex()
+    return index.refresh(store)
+
+def visible(store, lat, lng, zoom, width=800, height=500):
+    """
+    What a map view of the store should draw: clusters of the view's
+    zoom level inside its bounding box, or, zoomed in past
+    MAX_CLUSTER_ZOOM, the individual cases there (at most MAX_VISIBLE).
+    """
+    bbox = view_bbox(lat, lng, zoom, width, height)
+    if zoom > MAX_CLUSTER_ZOOM:
+        points = case_index.get_index(store).within(*bbox, limit=MAX_VISIBLE)
+        return [dict(point, count=1) for point in points]
+    return get_clusters(store).clusters(zoom, bbox)
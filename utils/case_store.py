@@ -0,0 +1,286 @@
+import json
+import os
+import sqlite3
+import threading
+
+from utils import schema
+
+DEFAULT_STORE_PATH = os.path.join("data", "cases.sqlite")
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_PAGE_SIZE = 50
+
+# One column per case field; anything else a case carries (source_file,
+# error, ...) is kept as JSON in the `extra` column.
+COLUMNS = ['case_id'] + schema.SCHEMA_KEYS + ['formatted_address', 'recommended_filename', 'timestamp_added']
+REAL_COLUMNS = {'gps_lat', 'gps_lng'}
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS cases ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+    " case_id TEXT NOT NULL UNIQUE,"
+    + "".join(f" {c} {'REAL' if c in REAL_COLUMNS else 'TEXT'}," for c in COLUMNS[1:])
+    + " extra TEXT)",
+    "CREATE INDEX IF NOT EXISTS idx_cases_contact_date ON cases (initial_contact_datetime)",
+    "CREATE INDEX IF NOT EXISTS idx_cases_channel ON cases (contact_channel)",
+    "CREATE INDEX IF NOT EXISTS idx_cases_zip ON cases (zip)",
+    # Running totals per channel, kept by a trigger so the unfiltered count
+    # and channel breakdown never scan the table
+    "CREATE TABLE IF NOT EXISTS case_counts (channel TEXT PRIMARY KEY, n INTEGER NOT NULL)",
+    "CREATE TRIGGER IF NOT EXISTS trg_cases_count AFTER INSERT ON cases BEGIN"
+    " INSERT INTO case_counts (channel, n) VALUES (COALESCE(NEW.contact_channel, ''), 1)"
+    " ON CONFLICT (channel) DO UPDATE SET n = n + 1; END",
+]
+
+_INSERT = (f"INSERT INTO cases ({', '.join(COLUMNS)}, extra) "
+           f"VALUES ({', '.join('?' * (len(COLUMNS) + 1))})")
+
+
+def _to_row(case):
+    values = []
+    for column in COLUMNS:
+        value = case.get(column)
+        if isinstance(value, (list, tuple)):
+            value = ",".join(str(v) for v in value)
+        elif value is not None and column not in REAL_COLUMNS and not isinstance(value, str):
+            value = str(value)
+        values.append(value)
+    extra = {k: v for k, v in case.items() if k not in COLUMNS}
+    values.append(json.dumps(extra, default=str) if extra else None)
+    return values
+
+def _from_row(row):
+    case = dict(zip(COLUMNS, row[1:-1]))
+    if row[-1]:
+        case.update(json.loads(row[-1]))
+    return case
+
+
+class CaseStore:
+    """
+    Saved cases in a SQLite database (WAL mode), indexed on case_id,
+    contact date, channel and zip. Rows are only ever appended, so the
+    largest row id doubles as a version number for caching.
+    Safe to share between threads; several app workers may use the same file.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for statement in _SCHEMA:
+                    self._conn.execute(statement)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def add(self, case):
+        """Save one case; raises sqlite3.IntegrityError if its case_id exists."""
+        with self._lock:
+            return self._conn.execute(_INSERT, _to_row(case)).lastrowid
+
+    def add_many(self, cases, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Save cases in transactions of batch_size rows, which is far faster
+        than one commit per row. Returns the number of cases saved.
+        """
+        saved = 0
+        batch = []
+        for case in cases:
+            batch.append(_to_row(case))
+            if len(batch) >= batch_size:
+                saved += self._insert_batch(batch)
+                batch = []
+        if batch:
+            saved += self._insert_batch(batch)
+        return saved
+
+    def _insert_batch(self, rows):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(_INSERT, rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def get(self, case_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM cases WHERE case_id = ?", (case_id,)).fetchone()
+        return _from_row(row) if row else None
+
+    @staticmethod
+    def _where(channel=None, zip=None, date_from=None, date_to=None, bbox=None):
+        """
+        WHERE clause for the filters; date_to is exclusive, bbox is
+        (min_lat, min_lng, max_lat, max_lng) and drops ungeocoded cases.
+        """
+        clauses, params = [], []
+        if channel is not None:
+            clauses.append("contact_channel = ?")
+            params.append(channel)
+        if zip is not None:
+            clauses.append("zip = ?")
+            params.append(zip)
+        if date_from is not None:
+            clauses.append("initial_contact_datetime >= ?")
+            params.append(str(date_from))
+        if date_to is not None:
+            clauses.append("initial_contact_datetime < ?")
+            params.append(str(date_to))
+        if bbox is not None:
+            min_lat, min_lng, max_lat, max_lng = bbox
+            clauses.append("gps_lat BETWEEN ? AND ? AND gps_lng BETWEEN ? AND ?")
+            params.extend([float(min_lat), float(max_lat), float(min_lng), float(max_lng)])
+        return clauses, params
+
+    def page(self, page=0, page_size=DEFAULT_PAGE_SIZE, before_id=None, through_id=None, **filters):
+        """
+        Newest-first page of cases matching the filters (see _where). For
+        long scrolls pass before_id (the `id` of the last row seen) instead of
+        a page number: it seeks straight to the position rather than skipping
+        page * page_size rows. through_id (e.g. a version() read earlier)
+        pages over the store as it was then, ignoring rows added since.
+        """
+        clauses, params = self._where(**filters)
+        offset = page * page_size
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+            offset = 0
+        if through_id is not None:
+            clauses.append("id <= ?")
+            params.append(through_id)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM cases{where} ORDER BY id DESC LIMIT ? OFFSET ?",
+                params + [page_size, offset]
+            ).fetchall()
+        return [dict(_from_row(row), id=row[0]) for row in rows]
+
+    def count(self, **filters):
+        """Number of cases matching the filters; O(1) when unfiltered."""
+        clauses, params = self._where(**filters)
+        with self._lock:
+            if not clauses:
+                return self._conn.execute("SELECT COALESCE(SUM(n), 0) FROM case_counts").fetchone()[0]
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM cases WHERE {' AND '.join(clauses)}", params
+            ).fetchone()[0]
+
+    def channel_counts(self):
+        """{channel: number of cases}, most common first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT channel, n FROM case_counts WHERE n > 0 ORDER BY n DESC, channel"
+            ).fetchall()
+        return {channel or None: n for channel, n in rows}
+
+    def latest(self):
+        rows = self.page(0, 1)
+        return rows[0] if rows else None
+
+    def snapshot(self):
+        """
+        (version, channel_counts(), latest case) read in one transaction,
+        so the three agree even while other workers save cases.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                version = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM cases").fetchone()[0]
+                rows = self._conn.execute(
+                    "SELECT channel, n FROM case_counts WHERE n > 0 ORDER BY n DESC, channel"
+                ).fetchall()
+                latest = self._conn.execute("SELECT * FROM cases ORDER BY id DESC LIMIT 1").fetchone()
+            finally:
+                self._conn.execute("COMMIT")
+        return version, {channel or None: n for channel, n in rows}, _from_row(latest) if latest else None
+
+    def version(self):
+        """Changes whenever a case is added (the largest row id)."""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM cases").fetchone()[0]
+
+    def count_case_ids(self, prefix):
+        """Number of case IDs starting with prefix (uses the case_id index)."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM cases WHERE case_id >= ? AND case_id < ?",
+                (prefix, prefix + "\uffff")
+            ).fetchone()[0]
+
+    def iter_cases(self, chunk_size=1000, after_id=0, through_id=None, **filters):
+        """
+        All matching cases added after row after_id (0: all of them) and,
+        if given, up to row through_id (e.g. a version() read earlier, so
+        rows appended meanwhile are left out), oldest first, fetched
+        chunk_size rows at a time.
+        """
+        last_id = after_id
+        while True:
+            clauses, params = self._where(**filters)
+            clauses.append("id > ?")
+            params.append(last_id)
+            if through_id is not None:
+                clauses.append("id <= ?")
+                params.append(through_id)
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT * FROM cases WHERE {' AND '.join(clauses)} ORDER BY id LIMIT ?",
+                    params + [chunk_size]
+                ).fetchall()
+            for row in rows:
+                yield _from_row(row)
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1][0]
+
+    def iter_points(self, after_id=0, chunk_size=10000):
+        """
+        (id, case_id, gps_lat, gps_lng) of the geocoded cases added after row
+        after_id, oldest first. Reads only those columns, for spatial indexes.
+        """
+        last_id = after_id
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, case_id, gps_lat, gps_lng FROM cases"
+                    " WHERE id > ? AND gps_lat IS NOT NULL AND gps_lng IS NOT NULL ORDER BY id LIMIT ?",
+                    (last_id, chunk_size)
+                ).fetchall()
+            yield from rows
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1][0]
+
+    def __len__(self):
+        return self.count()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_default_store():
+    """Process-wide store used by the app. The file location comes from BLOOM_CASE_DB."""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = CaseStore(os.environ.get("BLOOM_CASE_DB", DEFAULT_STORE_PATH))
+    return _default_store
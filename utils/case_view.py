@@ -0,0 +1,99 @@
+import threading
+from collections import Counter, OrderedDict
+
+from utils import case_store
+
+# Table pages kept per process; a page is only reused while the store version is unchanged
+MAX_CACHED_PAGES = 32
+
+
+class CaseSummary:
+    """
+    Metrics shown above the cases table (total, latest case ID, cases per
+    channel), kept up to date incrementally: refresh() checks the store
+    version and only reads the cases added since the last refresh.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.total = 0
+        self.latest_case_id = None
+        self.channels = Counter()
+        self._lock = threading.Lock()
+
+    def refresh(self, store):
+        with self._lock:
+            if self.version is None:
+                # First use: start from the store's maintained totals instead of a scan
+                version, channels, latest = store.snapshot()
+                self.channels = Counter(channels)
+                self.total = sum(self.channels.values())
+                self.latest_case_id = latest['case_id'] if latest else None
+                self.version = version
+                return self
+            version = store.version()
+            if version == self.version:
+                return self
+            # Only up to `version`: cases saved meanwhile are left for the next refresh
+            for case in store.iter_cases(after_id=self.version, through_id=version):
+                self.total += 1
+                self.channels[case.get('contact_channel')] += 1
+                self.latest_case_id = case['case_id']
+            self.version = version
+            return self
+
+    def most_common_channel(self):
+        common = self.channels.most_common(1)
+        return common[0][0] if common else None
+
+
+class CaseTableView:
+    """Pages of the cases table as DataFrames, memoized on (store version, page)."""
+
+    def __init__(self, page_size=case_store.DEFAULT_PAGE_SIZE, max_pages=MAX_CACHED_PAGES):
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.hits = 0
+        self.misses = 0
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def page_count(self, total):
+        return max(1, (total + self.page_size - 1) // self.page_size)
+
+    def page(self, store, page, version=None):
+        """DataFrame of one page (0-based, newest cases first)."""
+        import pandas as pd
+
+        version = store.version() if version is None else version
+        key = (store.path, version, page)
+        with self._lock:
+            df = self._pages.get(key)
+            if df is not None:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                return df
+        # Pinned to the version it is cached under, even if cases are saved meanwhile
+        rows = store.page(page, self.page_size, through_id=version)
+        df = pd.DataFrame(rows, columns=['id'] + case_store.COLUMNS if not rows else None)
+        df = df.drop(columns=['id'])
+        with self._lock:
+            self.misses += 1
+            self._pages[key] = df
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        return df
+
+
+_summaries = {}  # store path -> CaseSummary
+_summaries_lock = threading.Lock()
+_table = CaseTableView()
+
+def get_summary(store):
+    """Up-to-date metrics for the store, shared by all sessions in this process."""
+    with _summaries_lock:
+        summary = _summaries.setdefault(store.path, CaseSummary())
+    return summary.refresh(store)
+
+def get_table():
+    return _table
@@ -0,0 +1,168 @@
+import datetime
+import re
+import threading
+from collections import OrderedDict
+
+from dateutil import parser as dateutil_parser
+
+from utils import metrics
+
+DEFAULT_MAX_MEMO = 4096
+DEFAULT_MAX_SHAPES = 512
+
+# strptime formats tried when a new string shape is seen. No %y: for
+# two-digit years dateutil picks the century within 50 years of today,
+# while strptime uses a fixed 1969 cut-off, so those always go to dateutil.
+CANDIDATE_FORMATS = [
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y/%m/%d",
+    "%m/%d/%Y",
+    "%m-%d-%Y",
+    "%m.%d.%Y",
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %I:%M %p",
+    "%m/%d/%Y %I:%M:%S %p",
+    "%b %d, %Y",
+    "%B %d, %Y",
+    "%b %d %Y",
+    "%B %d %Y",
+    "%d %b %Y",
+    "%d %B %Y",
+    "%A, %B %d, %Y %I:%M %p",
+    "%a, %d %b %Y %H:%M:%S %z",
+    "%a, %d %b %Y %H:%M:%S",
+]
+
+_DIGIT_RE = re.compile(r"[0-9]")
+_LETTER_RE = re.compile(r"[A-Za-z]")
+
+# Marks a shape no candidate format reproduces; its strings go to dateutil
+_NO_FORMAT = ""
+
+
+def shape_of(text):
+    """'Feb 3, 2024' -> 'aaa 9, 9999'; strings of one shape share a format."""
+    return _LETTER_RE.sub("a", _DIGIT_RE.sub("9", text))
+
+
+class FormatLearningParser:
+    """
+    Date parsing that agrees with dateutil.parser.parse but rarely calls it.
+
+    The first string of each shape is parsed by dateutil, and the first
+    candidate strptime format giving the same datetime is remembered for
+    that shape. Later strings of the shape go through that format (a
+    C-level strptime, not dateutil's tokenizer). Exact strings are also
+    memoized in a bounded LRU. The memo is cleared when the day changes,
+    since dateutil fills missing parts ("Feb 3", "9:30 AM") from today.
+    """
+
+    def __init__(self, max_memo=DEFAULT_MAX_MEMO, max_shapes=DEFAULT_MAX_SHAPES,
+                 formats=CANDIDATE_FORMATS, today=datetime.date.today):
+        self.max_memo = max_memo
+        self.max_shapes = max_shapes
+        self.formats = list(formats)
+        self.today = today
+        self._memo = OrderedDict()
+        self._shapes = OrderedDict()
+        self._day = None
+        self._lock = threading.Lock()
+        self.memo_hits = 0
+        self.format_hits = 0
+        self.fallbacks = 0
+        self.failures = 0
+
+    def parse(self, text):
+        """A datetime, or None if dateutil can't parse the string either."""
+        text = text.strip()
+        with self._lock:
+            day = self.today()
+            if day != self._day:
+                self._memo.clear()
+                self._day = day
+            if text in self._memo:
+                self._memo.move_to_end(text)
+                self.memo_hits += 1
+                metrics.inc("date_parse", path="memo")
+                return self._memo[text]
+            shape = shape_of(text)
+            fmt = self._shapes.get(shape)
+            if fmt is not None:
+                self._shapes.move_to_end(shape)
+
+        result = None
+        if fmt:
+            try:
+                result = datetime.datetime.strptime(text, fmt)
+                path = "format"
+            except ValueError:
+                pass  # e.g. "13/02/2024" under %m/%d/%Y; dateutil may still read it
+        if result is None:
+            path = "dateutil"
+            try:
+                result = dateutil_parser.parse(text)
+            except (ValueError, OverflowError):
+                path = "failed"
+            if result is not None and fmt is None:
+                fmt = self._learn(text, result)
+                with self._lock:
+                    self._shapes[shape] = fmt
+                    if len(self._shapes) > self.max_shapes:
+                        self._shapes.popitem(last=False)
+
+        with self._lock:
+            if path == "format":
+                self.format_hits += 1
+            elif path == "dateutil":
+                self.fallbacks += 1
+            else:
+                self.failures += 1
+            self._memo[text] = result
+            if len(self._memo) > self.max_memo:
+                self._memo.popitem(last=False)
+        metrics.inc("date_parse", path=path)
+        return result
+
+    def _learn(self, text, expected):
+        """First candidate format that parses `text` exactly as dateutil did."""
+        for fmt in self.formats:
+            try:
+                parsed = datetime.datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+            if parsed == expected and parsed.utcoffset() == expected.utcoffset():
+                return fmt
+        return _NO_FORMAT
+
+    def learned_formats(self):
+        """{shape: format} for the shapes with a fast path."""
+        with self._lock:
+            return {shape: fmt for shape, fmt in self._shapes.items() if fmt}
+
+    def stats(self):
+        calls = self.memo_hits + self.format_hits + self.fallbacks + self.failures
+        return {
+            "calls": calls,
+            "memo_hits": self.memo_hits,
+            "format_hits": self.format_hits,
+            "fallbacks": self.fallbacks,
+            "failures": self.failures,
+            "fast_path_rate": (self.memo_hits + self.format_hits) / calls if calls else 0.0,
+            "fallback_rate": self.fallbacks / calls if calls else 0.0,
+            "shapes": len(self._shapes),
+            "memo_size": len(self._memo),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._memo.clear()
+            self._shapes.clear()
+            self.memo_hits = self.format_hits = self.fallbacks = self.failures = 0
+
+
+# Shared by standardize_date and everything that calls it
+DEFAULT_PARSER = FormatLearningParser()
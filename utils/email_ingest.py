@@ -0,0 +1,233 @@
+import base64
+import email
+import email.policy
+import email.utils
+import html
+import os
+import quopri
+import re
+from email.header import decode_header, make_header
+
+from utils import ocr, parsing, standardize
+
+EMAIL_EXTENSIONS = ('.eml',)
+MBOX_EXTENSIONS = ('.mbox', '.mbx')
+
+# Messages handed to a worker process at a time; parsing one message takes
+# well under a millisecond, so sending them singly would be mostly IPC.
+DEFAULT_CHUNK_SIZE = 256
+
+# Headers kept by the fast path. Outlook-style pasted emails say "Sent:"
+# where RFC 5322 messages have "Date:".
+WANTED_HEADERS = {'from', 'date', 'sent', 'subject', 'content-type', 'content-transfer-encoding'}
+# Names that make a "Name: value" line part of the header block. A pasted
+# email's first unknown "Label:" line ("Name:", "Phone:", "Address:")
+# already belongs to the body.
+HEADER_NAMES = WANTED_HEADERS | {
+    'to', 'cc', 'bcc', 'reply-to', 'sender', 'return-path', 'received', 'delivered-to',
+    'message-id', 'in-reply-to', 'references', 'mime-version', 'importance', 'priority',
+    'thread-topic', 'thread-index', 'accept-language', 'user-agent', 'comments', 'keywords',
+}
+HEADER_PREFIXES = ('x-', 'content-', 'resent-', 'list-', 'arc-', 'dkim-', 'authentication-')
+
+HEADER_LINE_RE = re.compile(r"([A-Za-z][A-Za-z0-9-]*)[ \t]*:[ \t]*(.*)")
+CHARSET_RE = re.compile(r'charset\s*=\s*"?([^";\s]+)', re.IGNORECASE)
+# Tags that end a line of text; labels like "Service Address:" are read per line
+BLOCK_TAG_RE = re.compile(r"<(?:br|/?(?:p|div|tr|li|h[1-6]))\b[^>]*>", re.IGNORECASE)
+TAG_RE = re.compile(r"<(script|style)\b.*?</\1\s*>|<[^>]+>", re.IGNORECASE | re.DOTALL)
+BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+
+def iter_mbox(path):
+    """
+    Raw bytes of each message in an mbox file, read line by line so the
+    archive is never held in memory. Messages start at "From " lines; the
+    ">From " escaping that mbox writers add to body lines is undone.
+    """
+    lines = []
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.startswith(b'From '):
+                if lines:
+                    yield b''.join(lines)
+                lines = []
+                continue
+            if line.startswith(b'>') and line.lstrip(b'>').startswith(b'From '):
+                line = line[1:]
+            lines.append(line)
+    if lines:
+        yield b''.join(lines)
+
+def iter_messages(paths):
+    """Raw message bytes from .eml files (one message each) and mbox archives."""
+    for path in paths:
+        ext = os.path.splitext(path)[1].lower()
+        if ext in MBOX_EXTENSIONS:
+            yield from iter_mbox(path)
+        else:
+            with open(path, 'rb') as f:
+                yield f.read()
+
+def _decode_header_value(value):
+    if '=?' not in value:
+        return value
+    try:
+        return str(make_header(decode_header(value)))
+    except Exception:
+        return value
+
+def split_headers(text):
+    """
+    (headers, body) for a message given as text. Only the headers in
+    WANTED_HEADERS are kept (lower-cased names, folded lines joined, RFC 2047
+    words decoded). The header block ends at the first blank line or at the
+    first line that is not a known header (see HEADER_NAMES), which starts
+    the body. Text that does not start with a header block is all body.
+    """
+    headers = {}
+    current = None
+    pos = 0
+    n = len(text)
+    while pos < n:
+        end = text.find('\n', pos)
+        if end == -1:
+            end = n
+        line = text[pos:end].rstrip('\r')
+        if not line.strip():
+            pos = end + 1
+            break
+        if line[0] in ' \t':
+            if current is not None:
+                headers[current] += ' ' + line.strip()
+            pos = end + 1
+            continue
+        match = HEADER_LINE_RE.match(line)
+        name = match.group(1).lower() if match else None
+        if name is None or not (name in HEADER_NAMES or name.startswith(HEADER_PREFIXES)):
+            if not headers:
+                return {}, text  # not a header block at all
+            break  # body starts without a blank line; keep this line in it
+        if name in WANTED_HEADERS and name not in headers:
+            headers[name] = match.group(2).strip()
+            current = name
+        else:
+            current = None  # unwanted or repeated header: keep the first one
+        pos = end + 1
+    if not headers:
+        return {}, text  # "Note: ..." on the first line is not a header block
+    for name, value in headers.items():
+        headers[name] = _decode_header_value(value)
+    return headers, text[pos:]
+
+def html_to_text(markup):
+    text = TAG_RE.sub(' ', BLOCK_TAG_RE.sub('\n', markup))
+    return BLANK_LINES_RE.sub('\n\n', html.unescape(text))
+
+def _decode_body(body, headers):
+    """
+    Undo a single-part body's transfer encoding and charset. `body` is the
+    latin-1 decoding of the raw bytes, so encoding it back is lossless.
+    """
+    cte = headers.get('content-transfer-encoding', '').lower()
+    charset = CHARSET_RE.search(headers.get('content-type', ''))
+    charset = charset.group(1) if charset else 'utf-8'
+    raw = body.encode('latin-1', errors='replace')
+    if cte == 'base64':
+        raw = base64.b64decode(raw)
+    elif cte == 'quoted-printable':
+        raw = quopri.decodestring(raw)
+    try:
+        return raw.decode(charset, errors='replace')
+    except LookupError:
+        return raw.decode('utf-8', errors='replace')
+
+def message_body(raw, headers, body):
+    """
+    Readable body text. Plain single-part messages (most customer emails)
+    are decoded directly; multipart and HTML messages go through the email
+    package to find the text part.
+    """
+    content_type = headers.get('content-type', 'text/plain').lower()
+    if content_type.startswith('text/plain'):
+        return _decode_body(body, headers)
+    if content_type.startswith('text/html'):
+        return html_to_text(_decode_body(body, headers))
+
+    message = email.message_from_bytes(raw, policy=email.policy.default)
+    part = message.get_body(preferencelist=('plain', 'html'))
+    if part is None:
+        return ""
+    try:
+        text = part.get_content()
+    except Exception:
+        text = part.get_payload(decode=True).decode('utf-8', errors='replace')
+    return html_to_text(text) if part.get_content_type() == 'text/html' else text
+
+def _header_date(value):
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).strftime('%Y-%m-%d %H:%M:%S')
+    except (TypeError, ValueError, IndexError):
+        # Not RFC 2822 ("Monday, February 15, 2026 9:12 AM" from Outlook)
+        return standardize.standardize_date(value)
+
+def parse_email(text, raw=None):
+    """
+    Case fields from one email. Sender, date and subject come straight from
+    the headers; only the body goes through parsing.parse_messy_text, and
+    labelled values in the body ("Name: ...") take precedence. A pasted
+    email is kept whole in raw_comments; for a raw message (`raw` given)
+    that is the decoded body, since the raw text may be transfer-encoded.
+    """
+    headers, body = split_headers(text)
+    if raw is not None and headers:
+        body = message_body(raw, headers, body)
+    body = body.strip()
+
+    case = parsing.parse_messy_text(body) if body else {}
+    name, address = email.utils.parseaddr(headers.get('from', ''))
+    if address and '@' in address:
+        case['email'] = address
+    if not case.get('customer_name') and name:
+        case['customer_name'] = name
+    if not case.get('initial_contact_datetime'):
+        case['initial_contact_datetime'] = _header_date(headers.get('date') or headers.get('sent'))
+    if headers.get('subject'):
+        case['work_order_summary'] = headers['subject']
+    case['raw_comments'] = (body if raw is not None else text.strip()) or text
+    case['contact_channel'] = 'Email'
+    return case
+
+def parse_message(raw):
+    """Case fields from the raw bytes of one RFC 5322 message."""
+    return parse_email(raw.decode('latin-1'), raw)
+
+def parse_messages(raws):
+    """Worker task: parse a chunk of raw messages."""
+    return [parse_message(raw) for raw in raws]
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def ingest(paths, max_workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Parsed cases for every message in the given .eml/mbox files, in archive
+    order. Messages are streamed from disk in chunks and parsed in a
+    process pool (max_workers=0 parses in this process instead), with only
+    a few chunks per worker in memory at once.
+    """
+    chunks = _chunks(iter_messages(paths), chunk_size)
+    if max_workers == 0:
+        for chunk in chunks:
+            yield from parse_messages(chunk)
+        return
+    for cases in ocr.ordered_pool_map(parse_messages, ((chunk,) for chunk in chunks), max_workers=max_workers):
+        yield from cases
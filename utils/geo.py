@@ -0,0 +1,36 @@
+import math
+
+EARTH_RADIUS_M = 6371008.8
+# Metres per degree of latitude (and of longitude at the equator)
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    """Great-circle distance in metres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+def meters_per_degree_lng(lat):
+    """Metres per degree of longitude at a latitude (never quite 0, even at the poles)."""
+    return max(METERS_PER_DEGREE * math.cos(math.radians(lat)), 1e-6)
+
+def bbox_around(lat, lng, radius_m):
+    """(min_lat, min_lng, max_lat, max_lng) of a box containing the circle."""
+    dlat = radius_m / METERS_PER_DEGREE
+    dlng = radius_m / meters_per_degree_lng(min(abs(lat) + dlat, 89.9))
+    return lat - dlat, lng - dlng, lat + dlat, lng + dlng
+
+def valid_point(lat, lng):
+    """True for a usable coordinate pair (not missing, not 0/0, in range)."""
+    if lat is None or lng is None:
+        return False
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        return False
+    if lat != lat or lng != lng or (lat == 0 and lng == 0):
+        return False
+    return -90 <= lat <= 90 and -180 <= lng <= 180
@@ -1,34 +1,159 @@
 from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut, GeocoderServiceError, GeocoderUnavailable
+import threading
 import time
 
-def get_lat_long(address):
+from utils import geocode_cache, local_geocoder, metrics, territory
+from utils.standardize import normalize_address
+
+USER_AGENT = "bloom_spatial_demo_prototype_v1"
+
+# Errors worth retrying; anything else from geopy is a hard failure
+TRANSIENT_ERRORS = (GeocoderTimedOut, GeocoderUnavailable)
+# Messages get_lat_long returns when a lookup failed (rather than found nothing)
+ERROR_PREFIXES = ("Geocoding service error", "Error:")
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. acquire() blocks until a token is available,
+    so callers sharing one bucket never exceed `rate` requests per second
+    (plus an initial burst of `capacity`).
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# Nominatim's usage policy allows at most 1 request per second. Every
+# request from this process goes through this one bucket.
+nominatim_limiter = TokenBucket(rate=1.0, capacity=1)
+
+_geolocator = None
+
+def get_geolocator():
+    """Shared Nominatim client (building one per call is wasted work)."""
+    global _geolocator
+    if _geolocator is None:
+        # Nominatim requires a user_agent
+        _geolocator = Nominatim(user_agent=USER_AGENT)
+    return _geolocator
+
+def nominatim_lookup(address, timeout=10, viewbox=None):
+    """
+    One Nominatim request. Callers must acquire nominatim_limiter first.
+    Returns (lat, lng, formatted_address) or None if the address is unknown.
+    With a viewbox ([(lat, lng), (lat, lng)] corners) only results inside
+    it are returned. Transient errors (TRANSIENT_ERRORS) are raised for the
+    caller to retry.
+    """
+    if viewbox is not None:
+        location = get_geolocator().geocode(address, timeout=timeout, viewbox=viewbox, bounded=True)
+    else:
+        location = get_geolocator().geocode(address, timeout=timeout)
+    if location:
+        return location.latitude, location.longitude, location.address
+    return None
+
+def check_territory(address, result, lookup=None, limiter=None):
+    """
+    If a service territory is configured (BLOOM_TERRITORY) and the
+    (lat, lng, formatted_address) result lies outside it, ask once more
+    with the viewbox bounded to the territory (ambiguous addresses often
+    match a same-named street in another state first). Returns the
+    in-territory answer if that finds one, else the original result.
+    `lookup` must accept a viewbox keyword, like nominatim_lookup.
+
+    Returns (result, settled). settled is False when the bounded query
+    failed (timeout or service error): the out-of-territory result is
+    returned, but must not be cached, so a later lookup asks again.
     """
-    Geocodes an address string using OpenStreetMap Nominatim.
+    area = territory.get_default_territory()
+    if area is None or result[0] is None or area.contains(result[0], result[1]):
+        return result, True
+    (limiter or nominatim_limiter).acquire()
+    try:
+        bounded = (lookup or nominatim_lookup)(address, viewbox=area.viewbox())
+    except TRANSIENT_ERRORS + (GeocoderServiceError,):
+        metrics.inc("territory_requery", result="error")
+        return result, False
+    if bounded and area.contains(bounded[0], bounded[1]):
+        metrics.inc("territory_requery", result="inside")
+        return tuple(bounded), True
+    metrics.inc("territory_requery", result="outside")
+    return result, True
+
+def _lookup_failed(result):
+    return result[0] is None and result[2].startswith(ERROR_PREFIXES)
+
+@metrics.traced("geocode", error=_lookup_failed)
+def get_lat_long(address, use_cache=True):
+    """
+    Geocodes an address string. The local address-point index (if
+    configured) is tried first, then OpenStreetMap Nominatim as a fallback.
+    Nominatim results (including "Address not found") are kept in the
+    persistent geocode cache so repeat lookups skip the network.
     Returns (lat, lng, formatted_address) or (None, None, error_message)
     """
-    if not address or not address.strip():
+    if not address or not address.strip() or not normalize_address(address):
         return None, None, "No address provided"
 
-    # Nominatim requires a user_agent
-    geolocator = Nominatim(user_agent="bloom_spatial_demo_prototype_v1")
+    local_index = local_geocoder.get_default_index()
+    if local_index is not None:
+        result = local_index.lookup(address)
+        if result is not None:
+            return result
+
+    cache = geocode_cache.get_default_cache() if use_cache else None
+    if cache is not None:
+        cached = cache.get(address)
+        if cached is not None:
+            return cached
 
     try:
         # Simple retry logic
-        location = None
+        result = None
+        timed_out = False
         for attempt in range(2):
             try:
-                location = geolocator.geocode(address, timeout=10)
-                if location:
+                nominatim_limiter.acquire()
+                result = nominatim_lookup(address)
+                timed_out = False
+                if result:
                     break
-            except (GeocoderTimedOut, GeocoderUnavailable):
+            except TRANSIENT_ERRORS:
+                timed_out = True
+                metrics.inc("retries", stage="geocode")
                 time.sleep(1) # Wait a bit before retrying
                 continue
-        
-        if location:
-            return location.latitude, location.longitude, location.address
+
+        if result:
+            # Only results checked against the territory are cached
+            result, settled = check_territory(address, result)
+            if cache is not None and settled:
+                cache.set(address, *result)
+            return result
         else:
-            return None, None, "Address not found"
+            # Only remember a miss if Nominatim actually answered
+            if cache is not None and not timed_out:
+                cache.set(address, None, None, geocode_cache.NOT_FOUND_MESSAGE)
+            return None, None, geocode_cache.NOT_FOUND_MESSAGE
 
     except GeocoderServiceError as e:
         return None, None, f"Geocoding service error: {str(e)}"
@@ -0,0 +1,167 @@
+import os
+import sqlite3
+import threading
+import time
+
+from utils import metrics
+from utils.standardize import normalize_address
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "geocode.sqlite")
+DEFAULT_TTL = 30 * 24 * 3600          # found addresses: 30 days
+DEFAULT_NEGATIVE_TTL = 24 * 3600      # "Address not found": 1 day
+DEFAULT_MAX_ENTRIES = 100000
+NOT_FOUND_MESSAGE = "Address not found"
+
+# Only bump the last-access time of a hit if it is older than this, so a
+# hot address does not turn every read into a write.
+ACCESS_UPDATE_INTERVAL = 3600
+
+
+class GeocodeCache:
+    """
+    Persistent SQLite cache of geocode results keyed on the normalized
+    address. Found and not-found results are stored with separate TTLs and
+    the least recently used entries are evicted past max_entries.
+    Safe to share between threads; several processes may use the same file.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL,
+                 negative_ttl=DEFAULT_NEGATIVE_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode_cache ("
+            " key TEXT PRIMARY KEY, lat REAL, lng REAL, formatted TEXT,"
+            " created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_geocode_cache_accessed ON geocode_cache (accessed)"
+        )
+
+    def get(self, address):
+        """
+        Returns the cached (lat, lng, formatted_address) for an address,
+        (None, None, "Address not found") for a cached miss, or None if
+        there is no fresh entry.
+        """
+        key = normalize_address(address)
+        if not key:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT lat, lng, formatted, created, accessed FROM geocode_cache WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                metrics.inc("cache_requests", cache="geocode", result="miss")
+                return None
+
+            lat, lng, formatted, created, accessed = row
+            ttl = self.ttl if lat is not None else self.negative_ttl
+            if now - created > ttl:
+                self._conn.execute("DELETE FROM geocode_cache WHERE key = ?", (key,))
+                self.misses += 1
+                metrics.inc("cache_requests", cache="geocode", result="expired")
+                return None
+
+            if now - accessed > ACCESS_UPDATE_INTERVAL:
+                self._conn.execute("UPDATE geocode_cache SET accessed = ? WHERE key = ?", (now, key))
+            if lat is None:
+                self.negative_hits += 1
+                metrics.inc("cache_requests", cache="geocode", result="negative_hit")
+                return None, None, formatted or NOT_FOUND_MESSAGE
+            self.hits += 1
+            metrics.inc("cache_requests", cache="geocode", result="hit")
+            return lat, lng, formatted
+
+    def set(self, address, lat, lng, formatted):
+        """Store a result. Pass lat=None to record a negative (not found) result."""
+        key = normalize_address(address)
+        if not key:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocode_cache (key, lat, lng, formatted, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, lat, lng, formatted, now, now)
+            )
+            self._writes_since_evict += 1
+            # Counting rows is cheap but not free; check every few writes.
+            if self._writes_since_evict >= max(1, self.max_entries // 100):
+                self._writes_since_evict = 0
+                self._evict()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM geocode_cache").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        # Trim to 90% so we are not evicting on every subsequent write
+        excess = count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM geocode_cache WHERE key IN ("
+            " SELECT key FROM geocode_cache ORDER BY accessed LIMIT ?)",
+            (excess,)
+        )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM geocode_cache").fetchone()[0]
+
+    def stats(self):
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+            "entries": len(self),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM geocode_cache")
+            self.hits = self.negative_hits = self.misses = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_default_cache():
+    """
+    Process-wide cache used by geocode.get_lat_long. The location comes from
+    BLOOM_GEOCODE_CACHE; set it to "off" to disable caching.
+    Returns None if caching is disabled or the cache file cannot be opened.
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                path = os.environ.get("BLOOM_GEOCODE_CACHE", DEFAULT_CACHE_PATH)
+                if path.lower() in ("", "off", "none", "0"):
+                    return None
+                try:
+                    _default_cache = GeocodeCache(path)
+                except sqlite3.Error:
+                    return None
+    return _default_cache
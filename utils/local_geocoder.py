@@ -0,0 +1,210 @@
+import csv
+import os
+import threading
+import warnings
+from array import array
+
+from utils import metrics
+from utils.standardize import normalize_address
+
+COLUMN_ALIASES = {
+    'street': ('street', 'address', 'street_address'),
+    'city': ('city',),
+    'state': ('state',),
+    'zip': ('zip', 'zipcode', 'postcode'),
+    'lat': ('lat', 'latitude'),
+    'lng': ('lng', 'lon', 'long', 'longitude'),
+}
+
+# Longest street line (in tokens) tried when matching a query by prefix
+MAX_STREET_TOKENS = 8
+# Query words that name no place (left in by "{city}, {state}" templates)
+NON_PLACE_TOKENS = {'none', 'nan', 'usa', 'us'}
+
+
+class AddressPointIndex:
+    """
+    In-memory index over an address-point file for offline geocoding.
+
+    Two lookups are kept:
+    - full key: normalized "street, city, state zip" -> row
+    - street key: normalized street line (house number + street) -> rows,
+      used when the query has a partial city/state/zip. A candidate must
+      then share the query's city or zip, and is rejected when the query
+      names another zip or another place.
+    Coordinates live in flat float arrays so a few million points stay small.
+    """
+
+    def __init__(self):
+        self.lats = array('d')
+        self.lngs = array('d')
+        self.labels = []
+        self.cities = []  # normalized city, state and zip of each row
+        self.states = []
+        self.zips = []
+        self.full_index = {}
+        self.street_index = {}
+
+    def __len__(self):
+        return len(self.labels)
+
+    def add(self, street, city, state, zip_code, lat, lng):
+        street_key = normalize_address(street)
+        if not street_key:
+            return
+        zip_code = str(zip_code or '').split('-')[0].split('.')[0]
+        region_key = normalize_address(f"{city or ''} {state or ''} {zip_code}")
+        row = len(self.labels)
+        self.lats.append(float(lat))
+        self.lngs.append(float(lng))
+        self.labels.append(f"{street}, {city}, {state} {zip_code}".strip())
+        self.cities.append(normalize_address(city or ''))
+        self.states.append(normalize_address(state or ''))
+        self.zips.append(zip_code)
+        self.full_index.setdefault(f"{street_key} {region_key}".strip(), row)
+
+        rows = self.street_index.get(street_key)
+        if rows is None:
+            self.street_index[street_key] = row
+        elif isinstance(rows, int):
+            # Most streets lines are unique; only allocate a list when not
+            self.street_index[street_key] = [rows, row]
+        else:
+            rows.append(row)
+
+    def lookup(self, address):
+        """
+        Returns (lat, lng, formatted_address) or None if there is no
+        unambiguous match.
+        """
+        key = normalize_address(address)
+        if not key:
+            return None
+        row = self.full_index.get(key)
+        if row is None:
+            row = self._lookup_by_street(key.split())
+        if row is None:
+            metrics.inc("cache_requests", cache="local_index", result="miss")
+            return None
+        metrics.inc("cache_requests", cache="local_index", result="hit")
+        return self.lats[row], self.lngs[row], self.labels[row]
+
+    def _region_score(self, row, rest):
+        """
+        How well the query's words after the street line fit a row's region:
+        2 for city and zip, 1 for either, None when neither matches or the
+        query names another zip or place.
+        """
+        city, zip_code = self.cities[row], self.zips[row]
+        zips = {t for t in rest if len(t) == 5 and t.isdigit()}
+        if zips and zip_code and zip_code not in zips:
+            return None
+        zip_ok = bool(zip_code) and zip_code in zips
+        city_ok = bool(city) and f" {city} " in f" {' '.join(rest)} "
+        if not city_ok:
+            # Words besides the state and zip are a city, and not this one
+            other = set(rest) - zips - set(self.states[row].split()) - NON_PLACE_TOKENS
+            if other or not zip_ok:
+                return None
+        return city_ok + zip_ok
+
+    def _lookup_by_street(self, tokens):
+        # Longest token prefix of the query that is a known street line
+        for n in range(min(len(tokens), MAX_STREET_TOKENS), 0, -1):
+            rows = self.street_index.get(' '.join(tokens[:n]))
+            if rows is None:
+                continue
+            if isinstance(rows, int):
+                rows = [rows]
+            rest = tokens[n:]
+            scored = []
+            for r in rows:
+                score = self._region_score(r, rest)
+                if score is not None:
+                    scored.append((score, r))
+            scored.sort(reverse=True)
+            if not scored:
+                return None
+            if len(scored) > 1 and scored[1][0] == scored[0][0]:
+                return None  # ambiguous, e.g. same street in two towns
+            return scored[0][1]
+        return None
+
+    @classmethod
+    def from_records(cls, records):
+        """Build from an iterable of dicts with street/city/state/zip/lat/lng keys."""
+        index = cls()
+        for rec in records:
+            try:
+                index.add(rec.get('street'), rec.get('city'), rec.get('state'),
+                          rec.get('zip'), rec['lat'], rec['lng'])
+            except (KeyError, TypeError, ValueError):
+                continue  # skip rows without usable coordinates
+        return index
+
+    @classmethod
+    def from_file(cls, path):
+        """Build from a CSV or Parquet address-point file."""
+        if path.lower().endswith(('.parquet', '.pq')):
+            return cls.from_records(_read_parquet(path))
+        return cls.from_records(_read_csv(path))
+
+
+def _column_map(columns):
+    lower = {c.lower().strip(): c for c in columns}
+    mapping = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in lower:
+                mapping[field] = lower[alias]
+                break
+    missing = {'street', 'lat', 'lng'} - set(mapping)
+    if missing:
+        raise ValueError(f"Address-point file is missing columns: {', '.join(sorted(missing))}")
+    return mapping
+
+def _read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        mapping = _column_map(reader.fieldnames or [])
+        for row in reader:
+            yield {field: row.get(col) for field, col in mapping.items()}
+
+def _read_parquet(path):
+    import pyarrow.parquet as pq
+    pf = pq.ParquetFile(path)
+    mapping = _column_map(pf.schema_arrow.names)
+    for batch in pf.iter_batches(columns=list(mapping.values())):
+        cols = {field: batch.column(col).to_pylist() for field, col in mapping.items()}
+        for i in range(batch.num_rows):
+            yield {field: values[i] for field, values in cols.items()}
+
+
+_default_index = None
+_default_index_loaded = False
+_default_index_lock = threading.Lock()
+
+def get_default_index():
+    """
+    Index loaded from the file named by BLOOM_ADDRESS_POINTS, or None if
+    unset or unreadable. Loaded once per process.
+    """
+    global _default_index, _default_index_loaded
+    if not _default_index_loaded:
+        with _default_index_lock:
+            if not _default_index_loaded:
+                path = os.environ.get("BLOOM_ADDRESS_POINTS")
+                if path:
+                    try:
+                        _default_index = AddressPointIndex.from_file(path)
+                    except Exception as e:
+                        warnings.warn(f"Could not load address points from {path}: {str(e)}")
+                _default_index_loaded = True
+    return _default_index
+
+def set_default_index(index):
+    """Install an index (or None to disable local lookups) for this process."""
+    global _default_index, _default_index_loaded
+    with _default_index_lock:
+        _default_index = index
+        _default_index_loaded = True
@@ -0,0 +1,251 @@
+import bisect
+import functools
+import os
+import threading
+import time
+
+# Upper bounds (seconds) of the stage latency histogram buckets; from
+# microsecond standardizers up to multi-second OCR and Nominatim calls.
+LATENCY_BUCKETS = (0.00001, 0.0001, 0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PREFIX = "bloom"
+
+# Checked on every instrumented call; while False, traced functions cost
+# one extra call and attribute read, and inc() returns immediately.
+_enabled = False
+
+
+class StageTimer:
+    """Call count, total time and latency histogram for one stage."""
+
+    __slots__ = ("count", "total", "errors", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # last one is +Inf
+
+
+class MetricsRegistry:
+    """
+    Stage spans and labelled counters for one process.
+
+    Work done in pool worker processes (PDF page OCR, the batch
+    pipeline's extract stage) is recorded in those processes, not here;
+    the callers in this process time those calls as a whole instead
+    ("ocr" for the OCR engine, "ocr_pdf" for a PDF).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+
+    def observe(self, stage, seconds, error=False):
+        with self._lock:
+            timer = self.stages.get(stage)
+            if timer is None:
+                timer = self.stages[stage] = StageTimer()
+            timer.count += 1
+            timer.total += seconds
+            timer.errors += bool(error)
+            timer.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def snapshot(self):
+        """Plain-dict copy: {"stages": {stage: {...}}, "counters": [(name, labels, value)]}."""
+        with self._lock:
+            stages = {
+                stage: {"count": t.count, "total_s": t.total, "errors": t.errors,
+                        "mean_ms": 1000 * t.total / t.count if t.count else 0.0,
+                        "buckets": list(t.buckets)}
+                for stage, t in self.stages.items()
+            }
+            counters = [(name, dict(labels), value) for (name, labels), value in sorted(self.counters.items())]
+        return {"stages": stages, "counters": counters}
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+
+    def render_prometheus(self):
+        """Everything recorded so far in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines = []
+        if snap["stages"]:
+            name = f"{PREFIX}_stage_seconds"
+            lines += [f"# HELP {name} Time spent in each instrumented stage.", f"# TYPE {name} histogram"]
+            for stage, s in sorted(snap["stages"].items()):
+                cumulative = 0
+                for bound, n in zip(LATENCY_BUCKETS + ("+Inf",), s["buckets"]):
+                    cumulative += n
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {s["total_s"]:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {s["count"]}')
+            name = f"{PREFIX}_stage_errors_total"
+            lines += [f"# HELP {name} Calls of each stage that returned or raised an error.",
+                      f"# TYPE {name} counter"]
+            for stage, s in sorted(snap["stages"].items()):
+                lines.append(f'{name}{{stage="{stage}"}} {s["errors"]}')
+        declared = set()
+        for counter, labels, value in snap["counters"]:
+            name = f"{PREFIX}_{counter}_total"
+            if name not in declared:
+                lines.append(f"# TYPE {name} counter")
+                declared.add(name)
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRY = MetricsRegistry()
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = bool(on)
+
+def enabled():
+    return _enabled
+
+def inc(name, amount=1, **labels):
+    """Add to a counter (e.g. inc("cache_requests", cache="geocode", result="hit"))."""
+    if _enabled:
+        REGISTRY.inc(name, amount, **labels)
+
+def traced(stage, error=None):
+    """
+    Decorator: time every call of the function as `stage`. `error`, if
+    given, is called with the return value and says whether the call
+    failed (for functions that return "LOG: ..." messages rather than
+    raise); exceptions always count as errors.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                REGISTRY.observe(stage, time.perf_counter() - start, error=True)
+                raise
+            REGISTRY.observe(stage, time.perf_counter() - start,
+                             error=bool(error and error(result)))
+            return result
+        return wrapper
+    return decorate
+
+
+class _Span:
+    __slots__ = ("stage", "start", "error")
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.error = False
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        REGISTRY.observe(self.stage, time.perf_counter() - self.start, self.error or exc_type is not None)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+    error = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+_NO_SPAN = _NoSpan()
+
+def span(stage):
+    """
+    Context manager timing a block as `stage`; set `.error = True` on it
+    to count the block as failed:
+
+        with metrics.span("geocode_batch") as s:
+            ...
+    """
+    return _Span(stage) if _enabled else _NO_SPAN
+
+def render_prometheus():
+    return REGISTRY.render_prometheus()
+
+def write_prometheus(path):
+    """Write the metrics to `path` atomically (for node_exporter's textfile collector)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp, path)
+
+def serve(port, host="127.0.0.1"):
+    """Serve GET /metrics on a daemon thread. Returns the HTTP server."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+_server = None
+_configure_lock = threading.Lock()
+
+def configure_from_env():
+    """
+    Apply BLOOM_METRICS (1 to enable), BLOOM_METRICS_PORT (serve /metrics)
+    and BLOOM_METRICS_FILE (export path, see export_file). Safe to call on
+    every Streamlit rerun; the endpoint is only started once.
+    """
+    global _server
+    port = os.environ.get("BLOOM_METRICS_PORT")
+    flag = os.environ.get("BLOOM_METRICS", "").lower() in ("1", "true", "yes", "on")
+    if flag or port or os.environ.get("BLOOM_METRICS_FILE"):
+        enable()
+    if port and _server is None:
+        with _configure_lock:
+            if _server is None:
+                _server = serve(int(port), os.environ.get("BLOOM_METRICS_HOST", "127.0.0.1"))
+    return _enabled
+
+def export_file():
+    """Write the metrics to BLOOM_METRICS_FILE, if set and metrics are enabled."""
+    path = os.environ.get("BLOOM_METRICS_FILE")
+    if path and _enabled:
+        write_prometheus(path)
@@ -1,16 +1,36 @@
+import os
 import shutil
+import tempfile
 import warnings
 import io
+import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from utils import metrics, ocr_cache, ocr_engine, preprocess
+
+# Options for preprocessing and pytesseract.image_to_string. They are part
+# of the OCR cache key, so changing them never returns text produced under
+# old ones. Preprocessing is opt-in (BLOOM_OCR_PREPROCESS=1) until its
+# effect on accuracy has been measured.
+PREPROCESS_ENABLED = os.environ.get("BLOOM_OCR_PREPROCESS", "").lower() in ("1", "true", "yes", "on")
+DEFAULT_OCR_SETTINGS = {"lang": "eng", "config": "",
+                        "preprocess": preprocess.DEFAULT_PREPROCESS if PREPROCESS_ENABLED else False}
 
 def is_tesseract_installed():
     """Check if tesseract is installed and available in PATH."""
     return shutil.which('tesseract') is not None
 
-def extract_text_from_image(image):
+def _is_log(text):
+    return text.startswith("LOG:")
+
+@metrics.traced("ocr", error=_is_log)
+def extract_text_from_image(image, settings=None):
     """
     Attempt to extract text from a PIL Image using pytesseract.
     Returns the extracted text or an error message if OCR is unavailable.
     """
+    settings = settings or DEFAULT_OCR_SETTINGS
     try:
         import pytesseract
         
@@ -20,7 +40,8 @@ def extract_text_from_image(image):
 
         # Simple configuration for English text + gracefully handle empty
         try:
-            text = pytesseract.image_to_string(image)
+            image = preprocess.preprocess_image(image, settings.get("preprocess", False))
+            text = pytesseract.image_to_string(image, lang=settings.get("lang"), config=settings.get("config", ""))
             if not text or not text.strip():
                 return "LOG: OCR ran but found no text. Image might be too blurry or empty."
             return text
@@ -32,9 +53,57 @@ def extract_text_from_image(image):
     except Exception as e:
         return f"LOG: OCR Error: {str(e)}"
 
+@lru_cache(maxsize=1)
+def _tesseract_version():
+    try:
+        import pytesseract
+        return str(pytesseract.get_tesseract_version())
+    except Exception:
+        return "unavailable"
+
+def _cache_key(data, settings, kind):
+    return ocr_cache.make_key(data, {"kind": kind, "tesseract": _tesseract_version(), **settings})
+
+def extract_text_from_bytes(data, settings=None, use_cache=True):
+    """
+    OCR an uploaded image given its raw bytes.
+    Identical bytes + settings are only OCR'd once per process (and across
+    restarts when the OCR disk cache is enabled); errors are never cached.
+    Returns the extracted text or an error message, as extract_text_from_image.
+    """
+    settings = settings or DEFAULT_OCR_SETTINGS
+    cache = ocr_cache.get_default_cache() if use_cache else None
+    key = _cache_key(data, settings, "image") if cache is not None else None
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    try:
+        from PIL import Image
+        image = Image.open(io.BytesIO(data))
+    except Exception as e:
+        return f"LOG: Could not open image: {str(e)}"
+
+    # The warm worker pool avoids a cold tesseract start per call; it is
+    # configured with the default settings only.
+    engine = ocr_engine.get_engine() if settings is DEFAULT_OCR_SETTINGS and is_tesseract_installed() else None
+    if engine is not None:
+        # The workers' own spans stay in their processes; time the call here
+        with metrics.span("ocr") as span:
+            text = engine.ocr(image)
+            span.error = _is_log(text)
+    else:
+        text = extract_text_from_image(image, settings)
+    if cache is not None and not text.startswith("LOG:"):
+        cache.set(key, text)
+    return text
+
+@metrics.traced("pdf_convert", error=lambda result: result[1] is not None)
 def convert_pdf_to_images(pdf_bytes):
     """
-    Convert first page of PDF to image using pdf2image.
+    Convert first page of PDF to image using pdf2image (used for previews;
+    see extract_text_from_pdf for OCR of every page).
     Returns (image, None) or (None, error_message).
     """
     try:
@@ -55,3 +124,125 @@ def convert_pdf_to_images(pdf_bytes):
         return None, "LOG: pdf2image library not installed."
     except Exception as e:
         return None, f"LOG: General PDF Error: {str(e)}"
+
+def _pdf_error_message(err):
+    if "poppler" in str(err).lower() or "pdfinfo" in str(err).lower():
+        return "LOG: Poppler not installed. PDF conversion unavailable."
+    return f"LOG: PDF conversion error: {str(err)}"
+
+def ordered_pool_map(fn, args_iter, max_workers=None, max_in_flight=None):
+    """
+    Run fn(*args) for each args tuple in a process pool and yield the
+    results in input order.
+
+    At most max_in_flight tasks (default: 2 per worker) are submitted at a
+    time and args_iter is only advanced when a slot frees up, so inputs are
+    produced lazily and memory stays bounded however long the input is.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max(max_in_flight or 2 * max_workers, 1)
+    args_iter = iter(args_iter)
+    pending = {}  # sequence number -> future
+    next_submit = 0
+    next_yield = 0
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        while True:
+            while len(pending) < max_in_flight:
+                args = next(args_iter, None)
+                if args is None:
+                    break
+                pending[next_submit] = pool.submit(fn, *args)
+                next_submit += 1
+            if next_yield not in pending:
+                return
+            # Waiting on the oldest task keeps output ordered; later tasks
+            # keep running (and their slots stay reserved) meanwhile.
+            yield pending.pop(next_yield).result()
+            next_yield += 1
+
+def get_pdf_page_count(pdf_bytes):
+    """
+    Number of pages in a PDF.
+    Returns (count, None) or (None, error_message).
+    """
+    try:
+        from pdf2image import pdfinfo_from_bytes
+        try:
+            return int(pdfinfo_from_bytes(pdf_bytes)["Pages"]), None
+        except Exception as pdf_err:
+            return None, _pdf_error_message(pdf_err)
+    except ImportError:
+        return None, "LOG: pdf2image library not installed."
+
+def ocr_pdf_page(pdf_path, page_number, dpi=200, settings=None):
+    """
+    Rasterize a single PDF page and OCR it. Runs inside pool workers, so
+    each worker holds at most one rasterized page.
+    Returns (page_number, text).
+    """
+    with metrics.span("pdf_convert") as span:
+        try:
+            from pdf2image import convert_from_path
+            images = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number)
+        except Exception as pdf_err:
+            span.error = True
+            return page_number, _pdf_error_message(pdf_err)
+    if not images:
+        return page_number, "LOG: PDF conversion resulted in no images."
+    return page_number, extract_text_from_image(images[0], settings)
+
+def iter_pdf_text(pdf_bytes, dpi=200, max_workers=None, max_in_flight=None, settings=None):
+    """
+    OCR every page of a PDF in parallel across CPU cores.
+    Yields (page_number, text) in page order as soon as each page (and
+    every page before it) is done. Failed pages yield a "LOG: ..." text.
+    """
+    page_count, err = get_pdf_page_count(pdf_bytes)
+    if err:
+        raise RuntimeError(err)
+
+    fd, pdf_path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf_bytes)
+        if page_count == 1:
+            # Not worth starting a pool for a single page
+            yield ocr_pdf_page(pdf_path, 1, dpi, settings)
+            return
+        tasks = ((pdf_path, page, dpi, settings) for page in range(1, page_count + 1))
+        yield from ordered_pool_map(ocr_pdf_page, tasks, max_workers=max_workers,
+                                    max_in_flight=max_in_flight)
+    finally:
+        os.remove(pdf_path)
+
+def extract_text_from_pdf(pdf_bytes, dpi=200, max_workers=None, max_in_flight=None,
+                          settings=None, use_cache=True):
+    """
+    OCR all pages of a PDF. Results are cached like extract_text_from_bytes
+    when every page OCR'd cleanly.
+    Returns (list_of_page_texts, None) or (None, error_message).
+    """
+    settings = settings or DEFAULT_OCR_SETTINGS
+    cache = ocr_cache.get_default_cache() if use_cache else None
+    key = _cache_key(pdf_bytes, dict(settings, dpi=dpi), "pdf") if cache is not None else None
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return json.loads(cached), None
+
+    try:
+        # Pages are OCR'd in pool workers, whose spans this process never sees
+        with metrics.span("ocr_pdf") as span:
+            pages = [text for _, text in iter_pdf_text(pdf_bytes, dpi=dpi, max_workers=max_workers,
+                                                       max_in_flight=max_in_flight, settings=settings)]
+            span.error = not pages or any(_is_log(t) for t in pages)
+        if not pages:
+            return None, "LOG: PDF conversion resulted in no images."
+        if cache is not None and not any(t.startswith("LOG:") for t in pages):
+            cache.set(key, json.dumps(pages))
+        return pages, None
+    except RuntimeError as e:
+        return None, str(e)
+    except Exception as e:
+        return None, f"LOG: General PDF Error: {str(e)}"
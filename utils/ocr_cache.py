@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from utils import metrics
+
+DEFAULT_MAX_ITEMS = 256
+
+
+def make_key(data, settings=None):
+    """Cache key for raw file bytes plus the OCR settings used on them."""
+    h = hashlib.sha256(data)
+    h.update(b"\0")
+    h.update(json.dumps(settings or {}, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+class OCRCache:
+    """
+    Two-tier cache of OCR text keyed on make_key().
+
+    The in-process LRU tier lives as long as the Python process, so it
+    survives Streamlit reruns and is shared by all sessions. The optional
+    disk tier (one small text file per key under disk_dir) survives
+    restarts and can be shared between app workers.
+    """
+
+    def __init__(self, max_items=DEFAULT_MAX_ITEMS, disk_dir=None):
+        self.max_items = max_items
+        self.disk_dir = disk_dir
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + ".txt")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.memory_hits += 1
+                metrics.inc("cache_requests", cache="ocr", result="memory_hit")
+                return self._items[key]
+
+        if self.disk_dir:
+            try:
+                with open(self._path(key), encoding="utf-8") as f:
+                    text = f.read()
+            except OSError:
+                text = None
+            if text is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                metrics.inc("cache_requests", cache="ocr", result="disk_hit")
+                self._remember(key, text)
+                return text
+
+        with self._lock:
+            self.misses += 1
+        metrics.inc("cache_requests", cache="ocr", result="miss")
+        return None
+
+    def set(self, key, text):
+        self._remember(key, text)
+        if self.disk_dir:
+            path = self._path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Write then rename so concurrent readers never see half a file
+                fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp, path)
+            except OSError:
+                pass  # the disk tier is best effort
+
+    def _remember(self, key, text):
+        with self._lock:
+            self._items[key] = text
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "entries": len(self._items),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.memory_hits = self.disk_hits = self.misses = 0
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_default_cache():
+    """
+    Process-wide OCR cache. Set BLOOM_OCR_CACHE_DIR to enable the disk tier.
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = OCRCache(disk_dir=os.environ.get("BLOOM_OCR_CACHE_DIR") or None)
+    return _default_cache
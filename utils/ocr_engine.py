@@ -0,0 +1,303 @@
+import os
+import queue
+import shlex
+import shutil
+import tempfile
+import threading
+import time
+import warnings
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+DEFAULT_BATCH_SIZE = 4
+DEFAULT_BATCH_WAIT = 0.01   # seconds to wait for a batch to fill up
+LATENCY_WINDOW = 1000       # latencies kept for percentile metrics
+
+# Per-worker state, set up once by _init_worker
+_worker_settings = None
+_worker_api = None
+
+
+def _init_worker(settings):
+    """
+    Runs once in each worker process. With tesserocr installed the worker
+    keeps one Tesseract API (language model loaded) for its lifetime;
+    otherwise it falls back to the tesseract CLI via pytesseract.
+    """
+    global _worker_settings, _worker_api
+    _worker_settings = settings
+    _worker_api = None
+    options = _tesserocr_options(settings)
+    if options is None:
+        return  # config the API can't express; the CLI gets it verbatim
+    try:
+        import tesserocr
+        _worker_api = tesserocr.PyTessBaseAPI(**options)
+    except Exception:
+        _worker_api = None
+
+def _tesserocr_options(settings):
+    """
+    PyTessBaseAPI keyword arguments equivalent to the lang and tesseract
+    command-line config in settings (--psm, --oem, --dpi, --tessdata-dir,
+    -l, -c name=value and config file names), so both paths OCR the same
+    way. Returns None if config holds anything else.
+    """
+    options = {"lang": settings.get("lang") or "eng"}
+    variables, configs = {}, []
+    try:
+        args = shlex.split(settings.get("config") or "")
+        i = 0
+        while i < len(args):
+            arg = args[i]
+            if not arg.startswith("-"):
+                configs.append(arg)
+                i += 1
+                continue
+            value = args[i + 1]
+            if arg == "--psm":
+                options["psm"] = int(value)
+            elif arg == "--oem":
+                options["oem"] = int(value)
+            elif arg == "--dpi":
+                variables["user_defined_dpi"] = str(int(value))
+            elif arg == "--tessdata-dir":
+                options["path"] = value
+            elif arg == "-l":
+                options["lang"] = value
+            elif arg == "-c" and "=" in value:
+                name, _, val = value.partition("=")
+                variables[name] = val
+            else:
+                return None
+            i += 2
+    except (IndexError, ValueError):
+        return None
+    if variables:
+        options["variables"] = variables
+    if configs:
+        options["configs"] = configs
+    return options
+
+def _ocr_with_cli_batch(images, settings):
+    """
+    OCR several images with a single tesseract invocation: tesseract accepts
+    a text file listing image paths and separates pages with a form feed.
+    Returns a list of texts, or None if the output could not be split.
+    """
+    import pytesseract
+
+    tmpdir = tempfile.mkdtemp(prefix="bloom_ocr_")
+    try:
+        paths = []
+        for i, image in enumerate(images):
+            path = os.path.join(tmpdir, f"{i}.png")
+            image.save(path)
+            paths.append(path)
+        list_path = os.path.join(tmpdir, "images.txt")
+        with open(list_path, "w") as f:
+            f.write("\n".join(paths) + "\n")
+        output = pytesseract.image_to_string(list_path, lang=settings.get("lang"),
+                                             config=settings.get("config", ""))
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    pages = output.split("\f")
+    if len(pages) < len(images):
+        return None
+    return pages[:len(images)]
+
+def _finish(text):
+    if not text or not text.strip():
+        return "LOG: OCR ran but found no text. Image might be too blurry or empty."
+    return text
+
+def ocr_batch(images):
+    """
+    Worker task: OCR a list of PIL images, returning one text per image
+    (same conventions as ocr.extract_text_from_image).
+    """
+    from utils import ocr, preprocess
+
+    settings = _worker_settings or ocr.DEFAULT_OCR_SETTINGS
+    if _worker_api is None and not ocr.is_tesseract_installed():
+        return ["LOG: Tesseract binary not found in PATH. OCR unavailable."] * len(images)
+
+    try:
+        prepared = [preprocess.preprocess_image(im, settings.get("preprocess", False)) for im in images]
+        if _worker_api is not None:
+            texts = []
+            for image in prepared:
+                _worker_api.SetImage(image)
+                texts.append(_finish(_worker_api.GetUTF8Text()))
+            return texts
+        if len(prepared) > 1:
+            texts = _ocr_with_cli_batch(prepared, settings)
+            if texts is not None:
+                return [_finish(t) for t in texts]
+        no_preprocess = dict(settings, preprocess=False)
+        return [ocr.extract_text_from_image(im, no_preprocess) for im in prepared]
+    except Exception as e:
+        return [f"LOG: OCR Error: {str(e)}"] * len(images)
+
+
+class OCREngine:
+    """
+    Long-lived pool of OCR worker processes fed through a queue.
+
+    submit() enqueues an image and returns a Future. A dispatcher thread
+    groups queued images into batches of up to batch_size (waiting at most
+    batch_wait for a batch to fill) and hands each batch to a warm worker,
+    so process start-up and model loading are paid once per worker rather
+    than once per image. metrics() reports queue depth and latencies.
+    """
+
+    def __init__(self, workers=None, batch_size=DEFAULT_BATCH_SIZE, batch_wait=DEFAULT_BATCH_WAIT,
+                 settings=None, batch_fn=ocr_batch):
+        from utils import ocr
+
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.batch_fn = batch_fn
+        self._queue = queue.Queue()
+        # At most two batches per worker handed to the pool at once, so the
+        # backlog stays in our queue where it is visible as queue depth
+        self._slots = threading.Semaphore(2 * self.workers)
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._in_flight = 0
+        self._completed = 0
+        self._batches = 0
+        self._closed = False
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                         initargs=(settings or ocr.DEFAULT_OCR_SETTINGS,))
+        self._dispatcher = threading.Thread(target=self._dispatch, name="ocr-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, image):
+        if self._closed:
+            raise RuntimeError("OCR engine is shut down")
+        future = Future()
+        self._queue.put((image, future, time.perf_counter()))
+        return future
+
+    def ocr(self, image, timeout=None):
+        """OCR one image and wait for the text."""
+        return self.submit(image).result(timeout)
+
+    def map(self, images, timeout=None):
+        """OCR several images; returns texts in input order."""
+        futures = [self.submit(image) for image in images]
+        return [f.result(timeout) for f in futures]
+
+    def _dispatch(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.perf_counter() + self.batch_wait
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # let the outer loop see it
+                    break
+                batch.append(item)
+
+            self._slots.acquire()
+            with self._lock:
+                self._in_flight += len(batch)
+                self._batches += 1
+            try:
+                pool_future = self._pool.submit(self.batch_fn, [image for image, _, _ in batch])
+            except Exception as e:
+                self._slots.release()
+                self._complete(batch, None, e)
+                continue
+            pool_future.add_done_callback(lambda f, batch=batch: self._on_done(batch, f))
+
+    def _on_done(self, batch, pool_future):
+        self._slots.release()
+        try:
+            texts, error = pool_future.result(), None
+        except Exception as e:
+            texts, error = None, e
+        self._complete(batch, texts, error)
+
+    def _complete(self, batch, texts, error):
+        now = time.perf_counter()
+        with self._lock:
+            self._in_flight -= len(batch)
+            self._completed += len(batch)
+            for _, _, enqueued in batch:
+                self._latencies.append(now - enqueued)
+        for i, (_, future, _) in enumerate(batch):
+            if error is not None:
+                future.set_result(f"LOG: OCR Error: {str(error)}")
+            else:
+                future.set_result(texts[i])
+
+    def metrics(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            completed, batches, in_flight = self._completed, self._batches, self._in_flight
+
+        def pct(p):
+            if not latencies:
+                return None
+            return round(1000 * latencies[min(len(latencies) - 1, int(p * len(latencies)))], 2)
+
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize(),
+            "in_flight": in_flight,
+            "completed": completed,
+            "batches": batches,
+            "avg_batch_size": round(completed / batches, 2) if batches else 0.0,
+            "latency_ms": {"p50": pct(0.5), "p95": pct(0.95), "max": pct(1.0)},
+        }
+
+    def shutdown(self, wait=True):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._dispatcher.join()
+        self._pool.shutdown(wait=wait)
+
+
+_default_engine = None
+_default_engine_lock = threading.Lock()
+
+def get_engine():
+    """
+    Shared engine for this process, or None if disabled with
+    BLOOM_OCR_WORKERS=0. BLOOM_OCR_WORKERS sets the worker count.
+    """
+    global _default_engine
+    workers = _env_workers()
+    if workers == 0:
+        return None
+    if _default_engine is None:
+        with _default_engine_lock:
+            if _default_engine is None:
+                _default_engine = OCREngine(workers=workers)
+    return _default_engine
+
+def _env_workers():
+    """BLOOM_OCR_WORKERS as a count; None (default size) if unset or not a count."""
+    workers = os.environ.get("BLOOM_OCR_WORKERS", "").strip()
+    if not workers:
+        return None
+    try:
+        count = int(workers)
+    except ValueError:
+        count = -1
+    if count < 0:
+        warnings.warn(f"Ignoring BLOOM_OCR_WORKERS={workers!r}: expected a worker count (0 disables)")
+        return None
+    return count
@@ -2,36 +2,71 @@ import re
 from datetime import datetime
 from dateutil import parser as date_parser
 
+from utils import metrics, risk_matcher
+
 email_regex = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
 phone_regex = r"(\+?1[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}"
 address_regex = r"\d+\s+[A-Za-z0-9\s]+(?:Street|St|Avenue|Ave|Drive|Dr|Road|Rd|Boulevard|Blvd|Lane|Ln|Trail|Trl|Circle|Cir|Court|Ct|Way|Place|Pl|Apartment|Apt|Unit|Suite|Ste)\s*(?:#?\w+)?(?:\s*,\s*[A-Za-z\s]+)?(?:\s*,\s*[A-Z]{2})?" # Relaxed zip
-risk_keywords = ["power lines", "line", "primary", "near wires", "high voltage", "pole", "electric", "spark"]
+risk_keywords = list(risk_matcher.DEFAULT_RISK_WEIGHTS)  # weights and hot-reload: utils/risk_matcher.py
+
+# Form field labels ("Label: value")
+name_label_regex = r"(?:property owner|customer name|name)\s*[:]\s*(.*?)(?:\n|$)"
+date_label_regex = r"(?:date)\s*[:]\s*(.*?)(?:\n|$)"
+address_label_regex = r"(?:service|site|location)\s*(?:address)?\s*[:]\s*(.*?)(?:\n|$)"
+
+# Same patterns, compiled once. The leading lookaheads only list the
+# characters a match can start with; they let the regex engine reject most
+# positions immediately instead of attempting the whole pattern there.
+EMAIL_RE = re.compile(email_regex)
+PHONE_RE = re.compile(r"(?=[+(\d])" + phone_regex)
+ADDRESS_RE = re.compile(r"(?=\d)" + address_regex, re.IGNORECASE)
+EMAIL_LOCAL_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._%+-")
+
+# Label words, matched backwards from each ":" by extract_labels
+NAME_LABELS = ("property owner", "customer name", "name")
+DATE_LABELS = ("date",)
+SITE_LABELS = ("service", "site", "location")
+LABEL_TAIL = 16  # longer than any single label word
 
 def extract_email(text):
-    match = re.search(email_regex, text)
-    return match.group(0) if match else None
+    # Every email contains '@', so start from each '@' and walk back over
+    # the local part rather than scanning the text with the full pattern.
+    at = text.find('@')
+    while at != -1:
+        start = at
+        while start > 0 and text[start - 1] in EMAIL_LOCAL_CHARS:
+            start -= 1
+        if start < at:
+            match = EMAIL_RE.match(text, start)
+            if match:
+                return match.group(0)
+        at = text.find('@', at + 1)
+    return None
 
 def extract_phone(text):
-    match = re.search(phone_regex, text)
+    match = PHONE_RE.search(text)
     return match.group(0) if match else None
 
 def extract_potential_address(text):
     # Try multiple heuristics:
     # 1. Look for explicit labels
-    match = re.search(r"(?:service|site|location)\s*(?:address)?\s*[:]\s*(.*?)(?:\n|$)", text, re.IGNORECASE)
+    match = re.search(address_label_regex, text, re.IGNORECASE)
     if match:
        # Basic cleanup
        val = match.group(1).strip()
        if len(val) > 5: return val
-       
+
     # 2. General regex fallback
     match = re.search(address_regex, text, re.IGNORECASE)
     return match.group(0) if match else None
 
 def extract_risk_warnings(text):
-    text_lower = text.lower()
-    flagged = [keyword for keyword in risk_keywords if keyword in text_lower]
-    return flagged
+    # Whole words/phrases only, so "deadline" no longer flags "line"
+    return risk_matcher.get_matcher().keywords_found(text)
+
+def extract_risk_score(text):
+    """Weighted risk score of the distinct risk keywords in text."""
+    return risk_matcher.get_matcher().score(text)
 
 def extract_label_value(text, label_pattern):
     match = re.search(label_pattern, text, re.IGNORECASE | re.DOTALL)
@@ -41,6 +76,55 @@ def extract_label_value(text, label_pattern):
         return possible.split('\n')[0].strip()
     return None
 
+def _skip_space_back(text, pos):
+    while pos > 0 and text[pos - 1].isspace():
+        pos -= 1
+    return pos
+
+def _labels_before(text, colon):
+    """Which form fields (if any) the ':' at index `colon` is the label of."""
+    end = _skip_space_back(text, colon)
+    tail = text[max(0, end - LABEL_TAIL):end].lower()
+    if tail.endswith(NAME_LABELS):
+        return ("customer_name",)
+    if tail.endswith(DATE_LABELS):
+        return ("initial_contact_datetime",)
+    if tail.endswith(SITE_LABELS):
+        return ("street_address",)
+    if tail.endswith("address"):
+        # "Service Address:", "site   address:" ...
+        end = _skip_space_back(text, end - len("address"))
+        if text[max(0, end - LABEL_TAIL):end].lower().endswith(SITE_LABELS):
+            return ("street_address",)
+    return ()
+
+def _value_after(text, pos):
+    """Rest of the line after a label; skips to the next line if it is blank."""
+    n = len(text)
+    while pos < n and text[pos].isspace():
+        pos += 1
+    end = text.find('\n', pos)
+    return text[pos:end if end != -1 else n].strip()
+
+def extract_labels(text):
+    """
+    Values of the name/date/service-address labels, found in one pass.
+
+    Every label ends in "label<spaces>:", so instead of running one
+    DOTALL regex per label over the whole text we jump from colon to colon
+    and check what word precedes each one. Gives the same values as
+    extract_label_value() with the *_label_regex patterns.
+    """
+    found = {}
+    colon = text.find(':')
+    while colon != -1 and len(found) < 3:
+        for field in _labels_before(text, colon):
+            if field not in found:
+                found[field] = _value_after(text, colon + 1)
+        colon = text.find(':', colon + 1)
+    return found
+
+@metrics.traced("parse")
 def parse_messy_text(text):
     """
     Attempts to extract structured data from unstructured text using heuristics.
@@ -48,21 +132,27 @@ def parse_messy_text(text):
     """
     if not text:
         return {}
-        
+
+    labels = extract_labels(text)
+    street_address = labels.get("street_address")
+    if not street_address or len(street_address) <= 5:
+        match = ADDRESS_RE.search(text)
+        street_address = match.group(0) if match else None
+
     extracted = {
         "email": extract_email(text),
         "phone": extract_phone(text),
-        "street_address": extract_potential_address(text),
+        "street_address": street_address,
         "risk_flags": extract_risk_warnings(text),
-        
+
         # Heuristics for form fields
-        "customer_name": extract_label_value(text, r"(?:property owner|customer name|name)\s*[:]\s*(.*?)(?:\n|$)"),
-        "initial_contact_datetime": extract_label_value(text, r"(?:date)\s*[:]\s*(.*?)(?:\n|$)"),
+        "customer_name": labels.get("customer_name"),
+        "initial_contact_datetime": labels.get("initial_contact_datetime"),
         "raw_comments": text
     }
 
     # If parsing failed but we have text, ensure raw_comments contains it all
     if not extracted['raw_comments']:
          extracted['raw_comments'] = text
-         
+
     return extracted
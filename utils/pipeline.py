@@ -0,0 +1,377 @@
+import csv
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from utils import case_ids, email_ingest, geocode, metrics, ocr, parsing, power_lines, schema, standardize
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff')
+PDF_EXTENSIONS = ('.pdf',)
+TEXT_EXTENSIONS = ('.txt',)
+EMAIL_EXTENSIONS = email_ingest.EMAIL_EXTENSIONS + email_ingest.MBOX_EXTENSIONS
+SUPPORTED_EXTENSIONS = IMAGE_EXTENSIONS + PDF_EXTENSIONS + TEXT_EXTENSIONS + EMAIL_EXTENSIONS
+
+# Channel recorded for each kind of input file
+CHANNEL_BY_KIND = {"image": "Form", "pdf": "Form", "text": "Text", "email": "Email"}
+
+OUTPUT_FIELDS = ['case_id'] + schema.SCHEMA_KEYS + [
+    'formatted_address', 'primary_line_m', 'secondary_line_m',
+    'recommended_filename', 'timestamp_added', 'source_file', 'error'
+]
+
+_DONE = object()  # end-of-stream marker passed between stages
+
+
+def input_kind(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in IMAGE_EXTENSIONS:
+        return "image"
+    if ext in PDF_EXTENSIONS:
+        return "pdf"
+    if ext in TEXT_EXTENSIONS:
+        return "text"
+    if ext in EMAIL_EXTENSIONS:
+        return "email"
+    return None
+
+def discover_inputs(paths=(), manifest=None):
+    """
+    Input files from directories (searched recursively), individual files
+    and/or a manifest listing one path per line. Unsupported files are
+    skipped. Returns paths in a stable order without duplicates.
+    """
+    found = []
+    candidates = list(paths)
+    if manifest:
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    candidates.append(line if os.path.isabs(line) else os.path.join(base, line))
+
+    for path in candidates:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if input_kind(name):
+                        found.append(os.path.join(root, name))
+        elif input_kind(path):
+            found.append(path)
+
+    seen = set()
+    return [p for p in found if not (p in seen or seen.add(p))]
+
+def extract_document(path):
+    """
+    Stage 1 (CPU bound, runs in a worker process): get the raw text of one
+    input file. PDFs are OCR'd page by page within the worker.
+    Returns (path, text, error).
+    """
+    kind = input_kind(path)
+    try:
+        if kind == "text":
+            with open(path, encoding='utf-8', errors='replace') as f:
+                return path, f.read(), None
+        if kind == "pdf":
+            with open(path, 'rb') as f:
+                pdf_bytes = f.read()
+            page_count, err = ocr.get_pdf_page_count(pdf_bytes)
+            if err:
+                return path, "", err
+            pages = [ocr.ocr_pdf_page(path, page)[1] for page in range(1, page_count + 1)]
+            text = "\n\n".join(t for t in pages if not t.startswith("LOG:"))
+            return path, text, None if text else pages[0]
+        if kind == "image":
+            from PIL import Image
+            with Image.open(path) as image:
+                text = ocr.extract_text_from_image(image)
+            if text.startswith("LOG:"):
+                return path, "", text
+            return path, text, None
+        return path, "", f"Unsupported file type: {path}"
+    except Exception as e:
+        return path, "", f"Error: {str(e)}"
+
+def standardize_case(path, text, error):
+    """
+    Stage 2: parse the raw text and standardize fields, as the Review and
+    Standardize tabs do for a single case. Coordinates are added later.
+    """
+    case = schema.empty_case()
+    case.update(parsing.parse_messy_text(text) if text else {})
+    case['contact_channel'] = CHANNEL_BY_KIND.get(input_kind(path), 'Form')
+    case['source_file'] = path
+    case['error'] = error
+    return standardize_fields(case)
+
+def standardize_fields(case):
+    """Stage 2 for cases that arrive already parsed (emails)."""
+    case['customer_name'] = standardize.normalize_text(case.get('customer_name'))
+    case['phone'] = standardize.standardize_phone(case.get('phone'))
+    case['initial_contact_datetime'] = standardize.standardize_date(case.get('initial_contact_datetime'))
+    if isinstance(case.get('risk_flags'), list):
+        case['risk_flags'] = ",".join(case['risk_flags'])
+    return case
+
+def geocode_case(case):
+    """Stage 3 (I/O bound, runs in threads): add gps_lat/gps_lng."""
+    if case.get('street_address'):
+        lat, lng, formatted = geocode.get_lat_long(standardize.format_full_address(case))
+    else:
+        lat, lng, formatted = None, None, "No address provided"
+    case['gps_lat'], case['gps_lng'], case['formatted_address'] = lat, lng, formatted
+    # Distance to the nearest primary/secondary line, if BLOOM_POWER_LINES is set
+    return power_lines.add_proximity_flags(case)
+
+
+def _failed_case(item, error):
+    """The case for an input whose standardization raised: as extracted, plus the error."""
+    if isinstance(item, dict):
+        case = item
+    else:
+        path = item[0]
+        case = schema.empty_case()
+        case['contact_channel'] = CHANNEL_BY_KIND.get(input_kind(path), 'Form')
+        case['source_file'] = path
+    case['error'] = error
+    return case
+
+
+class StageStats:
+    """Items processed and busy time for one pipeline stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds, error=False):
+        with self._lock:
+            self.items += 1
+            self.busy += seconds
+            self.errors += bool(error)
+        if metrics.enabled():
+            # Per-document totals; the OCR inside extract runs in worker processes
+            metrics.REGISTRY.observe(f"pipeline_{self.name}", seconds, error)
+
+    def as_dict(self, elapsed):
+        return {
+            "stage": self.name,
+            "items": self.items,
+            "errors": self.errors,
+            "busy_s": round(self.busy, 3),
+            "throughput_per_s": round(self.items / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+
+class RecordWriter:
+    """Streams case records to JSONL or CSV (chosen by file extension)."""
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.csv = path.lower().endswith('.csv')
+        exists = append and os.path.exists(path) and os.path.getsize(path) > 0
+        self._f = open(path, 'a' if append else 'w', newline='', encoding='utf-8')
+        if self.csv:
+            self._writer = csv.DictWriter(self._f, fieldnames=OUTPUT_FIELDS, extrasaction='ignore')
+            if not exists:
+                self._writer.writeheader()
+
+    def write(self, record):
+        if self.csv:
+            self._writer.writerow(record)
+        else:
+            self._f.write(json.dumps({k: record.get(k) for k in OUTPUT_FIELDS}, default=str) + "\n")
+        self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+
+def read_checkpoint(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding='utf-8') as f:
+        return {line.rstrip('\n') for line in f if line.strip()}
+
+
+class IntakePipeline:
+    """
+    OCR -> parse/standardize -> geocode -> write, run as a pipeline of
+    concurrent stages joined by bounded queues:
+
+    - extraction in a process pool (CPU-bound Tesseract work),
+    - parsing and standardization in one thread (fast, pure Python),
+    - geocoding in a thread pool (waits on the network / rate limiter),
+    - writing in the calling thread.
+
+    Each finished input is appended to a checkpoint file after its record
+    is written, so an interrupted run can be resumed without redoing work.
+    """
+
+    def __init__(self, output, checkpoint=None, resume=False, ocr_workers=None,
+                 geocode_workers=4, queue_size=64, do_geocode=True, progress=None, id_allocator=None):
+        self.output = output
+        self.checkpoint = checkpoint or output + ".checkpoint"
+        self.resume = resume
+        self.ocr_workers = ocr_workers or os.cpu_count() or 1
+        self.geocode_workers = geocode_workers
+        self.queue_size = queue_size
+        self.do_geocode = do_geocode
+        self.progress = progress
+        self.id_allocator = id_allocator or case_ids.get_default_allocator()
+        self.stats = {name: StageStats(name) for name in ("extract", "standardize", "geocode", "write")}
+        self.skipped = 0
+        self.started = None
+
+    def _extract_stage(self, paths, out_q, done=frozenset()):
+        # Bounded submission keeps at most 2 files per worker in flight
+        max_in_flight = 2 * self.ocr_workers
+        archives = [p for p in paths if input_kind(p) == "email"]
+        paths = [p for p in paths if input_kind(p) != "email"]
+        try:
+            with ProcessPoolExecutor(max_workers=self.ocr_workers) as pool:
+                in_flight = {}
+                paths = iter(paths)
+                while True:
+                    while len(in_flight) < max_in_flight:
+                        path = next(paths, None)
+                        if path is None:
+                            break
+                        in_flight[pool.submit(extract_document, path)] = (path, time.perf_counter())
+                    if not in_flight:
+                        break
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        path, started = in_flight.pop(future)
+                        try:
+                            path, text, error = future.result()
+                        except Exception as e:
+                            text, error = "", f"Error: {str(e)}"
+                        self.stats["extract"].record(time.perf_counter() - started, error)
+                        out_q.put((path, text, error))
+            # Email archives hold many cases each; they are read in their own
+            # pool once the documents are done, and checkpointed per message
+            for path in archives:
+                started = time.perf_counter()
+                for n, case in enumerate(email_ingest.ingest([path], max_workers=self.ocr_workers)):
+                    source = f"{path}#{n}"
+                    if source not in done:
+                        case = dict(schema.empty_case(), **case, source_file=source, error=None)
+                        self.stats["extract"].record(time.perf_counter() - started)
+                        out_q.put(case)
+                    started = time.perf_counter()
+        finally:
+            out_q.put(_DONE)
+
+    def _standardize_stage(self, in_q, out_q):
+        item = None
+        try:
+            while True:
+                item = in_q.get()
+                if item is _DONE:
+                    break
+                start = time.perf_counter()
+                failed = False
+                try:
+                    case = standardize_fields(item) if isinstance(item, dict) else standardize_case(*item)
+                except Exception as e:
+                    # Keep the case (unparsed) so it is still written and checkpointed
+                    case, failed = _failed_case(item, f"Error: {str(e)}"), True
+                self.stats["standardize"].record(time.perf_counter() - start, failed)
+                out_q.put(case)
+        finally:
+            # Never leave the extract stage blocked on a full queue
+            while item is not _DONE:
+                item = in_q.get()
+            out_q.put(_DONE)
+
+    def _geocode_stage(self, in_q, out_q):
+        def work(case):
+            start = time.perf_counter()
+            failed = False
+            if self.do_geocode:
+                try:
+                    geocode_case(case)
+                    failed = bool(case.get('street_address')) and case['gps_lat'] is None
+                except Exception as e:
+                    case['formatted_address'], failed = f"Error: {str(e)}", True
+            self.stats["geocode"].record(time.perf_counter() - start, failed)
+            out_q.put(case)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.geocode_workers) as pool:
+                # Don't pull more cases off the queue than we have room for
+                slots = threading.Semaphore(self.queue_size)
+                while True:
+                    case = in_q.get()
+                    if case is _DONE:
+                        break
+                    slots.acquire()
+                    future = pool.submit(work, case)
+                    future.add_done_callback(lambda f: slots.release())
+        finally:
+            out_q.put(_DONE)
+
+    def run(self, paths):
+        """Process input paths; returns the stats summary dict."""
+        done = read_checkpoint(self.checkpoint) if self.resume else set()
+        todo = [p for p in paths if p not in done]
+        self.skipped = len(paths) - len(todo)
+        # Archives are checkpointed per message, so their count is not known upfront
+        total = None if any(input_kind(p) == "email" for p in todo) else len(todo)
+        self.started = time.perf_counter()
+
+        q1 = queue.Queue(self.queue_size)
+        q2 = queue.Queue(self.queue_size)
+        q3 = queue.Queue(self.queue_size)
+        threads = [
+            threading.Thread(target=self._extract_stage, args=(todo, q1, done), daemon=True),
+            threading.Thread(target=self._standardize_stage, args=(q1, q2), daemon=True),
+            threading.Thread(target=self._geocode_stage, args=(q2, q3), daemon=True),
+        ]
+        for t in threads:
+            t.start()
+
+        writer = RecordWriter(self.output, append=self.resume)
+        try:
+            with open(self.checkpoint, 'a' if self.resume else 'w', encoding='utf-8') as ckpt:
+                while True:
+                    case = q3.get()
+                    if case is _DONE:
+                        break
+                    start = time.perf_counter()
+                    case['case_id'] = self.id_allocator.next_id()
+                    case['recommended_filename'] = standardize.generate_filename(
+                        case['case_id'], case.get('street_address'), case.get('city'), case.get('state'))
+                    case['timestamp_added'] = datetime.datetime.now().isoformat()
+                    writer.write(case)
+                    ckpt.write(case['source_file'] + "\n")
+                    ckpt.flush()
+                    self.stats["write"].record(time.perf_counter() - start)
+                    if self.progress:
+                        self.progress(self.summary(total=total))
+        finally:
+            writer.close()
+        for t in threads:
+            t.join()
+        return self.summary(total=total)
+
+    def summary(self, total=None):
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        return {
+            "total": total,
+            "written": self.stats["write"].items,
+            "skipped_from_checkpoint": self.skipped,
+            "elapsed_s": round(elapsed, 3),
+            "stages": [s.as_dict(elapsed) for s in self.stats.values()],
+        }
+
@@ -0,0 +1,258 @@
+import json
+import math
+import os
+import re
+import threading
+import warnings
+from array import array
+
+from utils import geo
+
+PRIMARY = "primary"
+SECONDARY = "secondary"
+LINE_CLASSES = (PRIMARY, SECONDARY)
+
+# Feature properties that may name a line's class; the first one present
+# whose value mentions "primary"/"secondary" (or "sec") wins
+CLASS_FIELDS = ('line_class', 'class', 'type', 'subtype', 'category', 'circuit', 'name')
+# Or a voltage property: above 1 kV is primary (distribution feeders),
+# below is secondary (service voltage)
+VOLTAGE_FIELDS = ('voltage', 'kv', 'nominal_voltage')
+PRIMARY_MIN_VOLTS = 1000
+
+# Grid cell size in degrees (~220 m north-south); segments are split so
+# no piece is longer than a cell
+DEFAULT_CELL_DEG = 0.002
+# Lines further than this from a case are not searched for (or flagged)
+DEFAULT_SEARCH_M = 500
+
+FLAG_RE = re.compile(r"^(primary|secondary) line \d+ m$")
+
+
+class LineNetwork:
+    """
+    Grid index over power-line segments for nearest-line distances.
+
+    Every segment (split into pieces no longer than a grid cell) is listed
+    in each cell its bounding box touches, with its endpoints in flat
+    float arrays. nearest() searches rings of cells around the case
+    outward and stops once no unseen segment can be closer. Distances are
+    measured in a local equirectangular projection, which over a few
+    hundred metres is well within a metre of the geodesic distance.
+    """
+
+    def __init__(self, cell_deg=DEFAULT_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.lat1 = array('d')
+        self.lng1 = array('d')
+        self.lat2 = array('d')
+        self.lng2 = array('d')
+        self.classes = array('b')  # index into LINE_CLASSES
+        self.cells = {}
+        self.lines = 0
+
+    def __len__(self):
+        return len(self.classes)
+
+    def _cell(self, lat, lng):
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def add_line(self, coords, line_class=PRIMARY):
+        """Index a polyline given as [(lng, lat), ...] (GeoJSON order)."""
+        cls = LINE_CLASSES.index(line_class)
+        points = [(float(p[1]), float(p[0])) for p in coords if len(p) >= 2]
+        if len(points) < 2:
+            return
+        self.lines += 1
+        for (a_lat, a_lng), (b_lat, b_lng) in zip(points, points[1:]):
+            pieces = max(1, math.ceil(max(abs(b_lat - a_lat), abs(b_lng - a_lng)) / self.cell_deg))
+            for n in range(pieces):
+                t0, t1 = n / pieces, (n + 1) / pieces
+                self._add_segment(a_lat + (b_lat - a_lat) * t0, a_lng + (b_lng - a_lng) * t0,
+                                  a_lat + (b_lat - a_lat) * t1, a_lng + (b_lng - a_lng) * t1, cls)
+
+    def _add_segment(self, lat1, lng1, lat2, lng2, cls):
+        row = len(self.classes)
+        self.lat1.append(lat1)
+        self.lng1.append(lng1)
+        self.lat2.append(lat2)
+        self.lng2.append(lng2)
+        self.classes.append(cls)
+        i0, j0 = self._cell(min(lat1, lat2), min(lng1, lng2))
+        i1, j1 = self._cell(max(lat1, lat2), max(lng1, lng2))
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                cell = self.cells.get((i, j))
+                if cell is None:
+                    cell = self.cells[(i, j)] = array('i')
+                cell.append(row)
+
+    def nearest(self, lat, lng, max_distance_m=DEFAULT_SEARCH_M):
+        """
+        {"primary": metres, "secondary": metres} to the nearest line of
+        each class; None for a class with no line within max_distance_m.
+        """
+        best = [math.inf] * len(LINE_CLASSES)
+        if not self.cells or not geo.valid_point(lat, lng):
+            return dict(zip(LINE_CLASSES, [None] * len(LINE_CLASSES)))
+        lat, lng = float(lat), float(lng)
+        ky = geo.METERS_PER_DEGREE
+        kx = geo.meters_per_degree_lng(lat)
+        lat1, lng1, lat2, lng2, classes, cells = \
+            self.lat1, self.lng1, self.lat2, self.lng2, self.classes, self.cells
+        cell_min = self.cell_deg * min(ky, geo.meters_per_degree_lng(min(abs(lat) + 1, 89.9)))
+        ci, cj = self._cell(lat, lng)
+        seen = set()
+        rings = math.ceil(max_distance_m / cell_min) + 1
+        for ring in range(rings + 1):
+            for key in _ring_cells(ci, cj, ring):
+                for row in cells.get(key, ()):
+                    if row in seen:
+                        continue
+                    seen.add(row)
+                    # Point-to-segment distance in local metres around the case
+                    ax, ay = (lng1[row] - lng) * kx, (lat1[row] - lat) * ky
+                    dx, dy = (lng2[row] - lng) * kx - ax, (lat2[row] - lat) * ky - ay
+                    length2 = dx * dx + dy * dy
+                    t = 0.0 if length2 == 0 else min(1.0, max(0.0, -(ax * dx + ay * dy) / length2))
+                    distance = math.hypot(ax + t * dx, ay + t * dy)
+                    cls = classes[row]
+                    if distance < best[cls]:
+                        best[cls] = distance
+            # Segments only listed in rings further out are at least `ring` cells away
+            reach = ring * cell_min
+            if max(best) <= reach or reach >= max_distance_m:
+                break
+        return {name: (d if d <= max_distance_m else None) for name, d in zip(LINE_CLASSES, best)}
+
+    def nearest_many(self, points, max_distance_m=DEFAULT_SEARCH_M):
+        """nearest() for an iterable of (lat, lng) pairs, as a list."""
+        return [self.nearest(lat, lng, max_distance_m) for lat, lng in points]
+
+    @classmethod
+    def from_features(cls, features, default_class=PRIMARY):
+        """Build from GeoJSON-style features (LineString/MultiLineString geometries)."""
+        network = cls()
+        for feature in features:
+            geometry = feature.get('geometry') or {}
+            line_class = classify(feature.get('properties') or {}, default_class)
+            if geometry.get('type') == 'LineString':
+                network.add_line(geometry.get('coordinates') or [], line_class)
+            elif geometry.get('type') == 'MultiLineString':
+                for part in geometry.get('coordinates') or []:
+                    network.add_line(part, line_class)
+        return network
+
+    @classmethod
+    def from_file(cls, path, default_class=PRIMARY):
+        """Build from a GeoJSON (.geojson/.json) or ESRI shapefile (.shp, needs pyshp) export."""
+        if path.lower().endswith('.shp'):
+            return cls.from_features(_read_shapefile(path), default_class)
+        return cls.from_features(_read_geojson(path), default_class)
+
+
+def classify(properties, default_class=PRIMARY):
+    """'primary' or 'secondary' from a feature's properties; default_class if they don't say."""
+    lower = {str(k).lower(): v for k, v in properties.items()}
+    for field in CLASS_FIELDS:
+        value = str(lower.get(field) or '').lower()
+        if 'primary' in value:
+            return PRIMARY
+        if 'secondary' in value or re.search(r'\bsec\b', value):
+            return SECONDARY
+    for field in VOLTAGE_FIELDS:
+        try:
+            volts = float(lower[field])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if field == 'kv':
+            volts *= 1000
+        return PRIMARY if volts > PRIMARY_MIN_VOLTS else SECONDARY
+    return default_class
+
+def _ring_cells(ci, cj, ring):
+    """Cells at Chebyshev distance `ring` from (ci, cj)."""
+    if ring == 0:
+        yield ci, cj
+        return
+    for j in range(cj - ring, cj + ring + 1):
+        yield ci - ring, j
+        yield ci + ring, j
+    for i in range(ci - ring + 1, ci + ring):
+        yield i, cj - ring
+        yield i, cj + ring
+
+def _read_geojson(path):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('type') == 'FeatureCollection':
+        return data.get('features') or []
+    if data.get('type') == 'Feature':
+        return [data]
+    return [{'geometry': data, 'properties': {}}]
+
+def _read_shapefile(path):
+    try:
+        import shapefile  # pyshp
+    except ImportError:
+        raise ImportError("Reading shapefiles needs the pyshp package (pip install pyshp); "
+                          "or export the lines as GeoJSON")
+    with shapefile.Reader(path) as reader:
+        for record in reader.iterShapeRecords():
+            yield {'geometry': record.shape.__geo_interface__, 'properties': record.record.as_dict()}
+
+
+def proximity_flags(distances):
+    """Risk flags ("primary line 35 m") for the classes with a line in range."""
+    return [f"{name} line {round(d)} m" for name, d in distances.items() if d is not None]
+
+def add_proximity_flags(case, network=None, max_distance_m=DEFAULT_SEARCH_M):
+    """
+    Add the nearest primary/secondary line distances of a geocoded case to
+    its risk flags (and as primary_line_m / secondary_line_m). Flags from
+    an earlier call are replaced, so re-running after a re-geocode is safe.
+    Does nothing without a network or coordinates. Returns the case.
+    """
+    network = network if network is not None else get_default_network()
+    if network is None or not geo.valid_point(case.get('gps_lat'), case.get('gps_lng')):
+        return case
+    distances = network.nearest(case['gps_lat'], case['gps_lng'], max_distance_m)
+    flags = case.get('risk_flags')
+    as_list = isinstance(flags, list)
+    if not as_list:
+        flags = [f.strip() for f in str(flags or '').split(',') if f.strip()]
+    flags = [f for f in flags if not FLAG_RE.match(f)] + proximity_flags(distances)
+    case['risk_flags'] = flags if as_list else ",".join(flags)
+    for name, d in distances.items():
+        case[f"{name}_line_m"] = round(d, 1) if d is not None else None
+    return case
+
+
+_default_network = None
+_default_network_loaded = False
+_default_network_lock = threading.Lock()
+
+def get_default_network():
+    """
+    Network loaded from the file named by BLOOM_POWER_LINES, or None if
+    unset or unreadable. Loaded once per process.
+    """
+    global _default_network, _default_network_loaded
+    if not _default_network_loaded:
+        with _default_network_lock:
+            if not _default_network_loaded:
+                path = os.environ.get("BLOOM_POWER_LINES")
+                if path:
+                    try:
+                        _default_network = LineNetwork.from_file(path)
+                    except Exception as e:
+                        warnings.warn(f"Could not load power lines from {path}: {str(e)}")
+                _default_network_loaded = True
+    return _default_network
+
+def set_default_network(network):
+    """Install a network (or None to disable proximity flags) for this process."""
+    global _default_network, _default_network_loaded
+    with _default_network_lock:
+        _default_network = network
+        _default_network_loaded = True
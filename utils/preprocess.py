@@ -0,0 +1,123 @@
+from PIL import Image, ImageOps
+
+# Options used when preprocessing is turned on (settings["preprocess"] = {}
+# or overrides). OCR runs without any preprocessing by default until
+# benchmarks/bench_preprocess.py has accuracy numbers for these on
+# tests/fixtures/labels.json; see BLOOM_OCR_PREPROCESS in utils/ocr.py.
+DEFAULT_PREPROCESS = {
+    "target_dpi": 300,        # downscale scans above this resolution
+    "max_pixels": 4000000,    # ...and anything (e.g. phone photos) above this size
+    "grayscale": True,
+    "autocrop": True,
+    "deskew": False,
+    "binarize": False,
+}
+
+# Pixels darker than this count as content when cropping margins
+CROP_THRESHOLD = 200
+CROP_PADDING = 20
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_STEP = 0.5
+
+
+def downscale(image, target_dpi=None, max_pixels=None):
+    """
+    Shrink an image to at most target_dpi (when the file records its DPI)
+    and at most max_pixels in total. Never upscales.
+    """
+    scale = 1.0
+    dpi = image.info.get("dpi")
+    if target_dpi and dpi and dpi[0] and dpi[0] > target_dpi:
+        scale = min(scale, target_dpi / float(dpi[0]))
+    pixels = image.width * image.height
+    if max_pixels and pixels * scale * scale > max_pixels:
+        scale = min(scale, (max_pixels / float(pixels)) ** 0.5)
+    if scale >= 1.0:
+        return image
+    size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+    return image.resize(size, Image.LANCZOS)
+
+def autocrop(image, threshold=CROP_THRESHOLD, padding=CROP_PADDING):
+    """Trim blank margins around the content of a grayscale image."""
+    mask = image.point(lambda p: 255 if p < threshold else 0)
+    bbox = mask.getbbox()
+    if not bbox:
+        return image  # blank page, nothing to crop to
+    left, top, right, bottom = bbox
+    return image.crop((max(0, left - padding), max(0, top - padding),
+                       min(image.width, right + padding), min(image.height, bottom + padding)))
+
+def otsu_threshold(image):
+    """Otsu's threshold computed from a grayscale image's histogram."""
+    hist = image.histogram()[:256]
+    total = sum(hist)
+    sum_all = sum(i * h for i, h in enumerate(hist))
+    sum_bg = weight_bg = 0
+    best, best_var = 127, -1.0
+    for t in range(256):
+        weight_bg += hist[t]
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        sum_bg += t * hist[t]
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        var = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if var > best_var:
+            best, best_var = t, var
+    return best
+
+def binarize(image):
+    """Black and white version of a grayscale image (Otsu threshold)."""
+    threshold = otsu_threshold(image)
+    return image.point(lambda p: 255 if p > threshold else 0)
+
+def estimate_skew(image, max_angle=DESKEW_MAX_ANGLE, step=DESKEW_STEP):
+    """
+    Angle (degrees) that makes text lines horizontal, found by maximizing
+    the variance of the row-darkness profile over candidate rotations.
+    """
+    import numpy as np
+
+    small = image.copy()
+    small.thumbnail((800, 800))
+    ink = small.point(lambda p: 255 if p < 128 else 0)
+    best_angle, best_score = 0.0, -1.0
+    n = int(round(max_angle / step))
+    for i in range(-n, n + 1):
+        angle = i * step
+        rows = np.asarray(ink.rotate(angle, fillcolor=0), dtype=np.float32).sum(axis=1)
+        score = float(np.var(rows))
+        if score > best_score:
+            best_angle, best_score = angle, score
+    return best_angle
+
+def deskew(image):
+    angle = estimate_skew(image)
+    if not angle:
+        return image
+    return image.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+def preprocess_image(image, options=None):
+    """
+    Prepare a PIL image for OCR. `options` overrides DEFAULT_PREPROCESS;
+    pass {} to get the defaults or False to skip preprocessing entirely.
+    """
+    if options is False:
+        return image
+    opts = dict(DEFAULT_PREPROCESS, **(options or {}))
+
+    # Phone photos are often stored sideways with an EXIF rotation tag
+    image = ImageOps.exif_transpose(image)
+    if opts["grayscale"] or opts["autocrop"] or opts["deskew"] or opts["binarize"]:
+        image = image.convert("L")
+    image = downscale(image, opts["target_dpi"], opts["max_pixels"])
+    if opts["autocrop"]:
+        image = autocrop(image)
+    if opts["deskew"]:
+        image = deskew(image)
+    if opts["binarize"]:
+        image = binarize(image)
+    return image
@@ -0,0 +1,229 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import deque, namedtuple
+
+# keyword/phrase -> weight used for the risk score
+DEFAULT_RISK_WEIGHTS = {
+    "power lines": 3,
+    "line": 1,
+    "primary": 2,
+    "near wires": 3,
+    "high voltage": 3,
+    "pole": 1,
+    "electric": 2,
+    "spark": 3,
+}
+
+# How often get_matcher() looks at the keyword file's mtime
+RELOAD_CHECK_INTERVAL = 2.0
+
+WORD_RE = re.compile(r"\w+")
+# Words of a phrase may be separated by spaces or hyphens ("high-voltage"),
+# but not by other punctuation ("...the power. Lines were...")
+PHRASE_GAP_RE = re.compile(r"[\s\-]*")
+# Endings a text word may add to a keyword word and still match it
+# ("poles", "sparking", "electrical", "electricity")
+INFLECTIONS = ("s", "es", "ed", "ing", "al", "ally", "ity")
+
+RiskMatch = namedtuple("RiskMatch", ["keyword", "start", "end", "weight"])
+
+
+class RiskMatcher:
+    """
+    Aho-Corasick automaton over words, built once from a weighted keyword
+    list. Matching walks the text's words in a single pass, so cost does
+    not grow with the number of keywords, and every hit is a whole word or
+    whole phrase ("line" does not match inside "deadline" or "online").
+    A word also matches with one of the INFLECTIONS added ("pole" matches
+    "poles", "electric" matches "electrical").
+    """
+
+    def __init__(self, weights):
+        if not isinstance(weights, dict):
+            weights = {k: 1 for k in weights}
+        self.keywords = []
+        self.weights = []
+        self._lengths = []  # words per keyword
+        # Trie over words: node -> {word: child}; node 0 is the root
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]  # node -> keyword indexes ending here
+
+        for keyword, weight in weights.items():
+            words = WORD_RE.findall(keyword.lower())
+            if not words:
+                continue
+            node = 0
+            for word in words:
+                nxt = self._goto[node].get(word)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[node][word] = nxt
+                node = nxt
+            self._out[node].append(len(self.keywords))
+            self.keywords.append(keyword)
+            self.weights.append(weight)
+            self._lengths.append(len(words))
+        self._max_words = max(self._lengths, default=1)
+        self._vocabulary = {w for node in self._goto for w in node}
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        # Breadth-first, so a node's failure target is always finished first.
+        # Children of the root keep the failure link 0.
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for word, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and word not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[child] = self._goto[f].get(word, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def _keyword_words(self, token):
+        """
+        Keyword words a lowercased text word can stand for: itself and its
+        stems without an inflection ("lines" is both "lines" and "line").
+        """
+        vocabulary = self._vocabulary
+        words = [token] if token in vocabulary else []
+        for suffix in INFLECTIONS:
+            if token.endswith(suffix) and token[:-len(suffix)] in vocabulary:
+                words.append(token[:-len(suffix)])
+        return words
+
+    def finditer(self, text):
+        """Yields a RiskMatch for every keyword occurrence, in text order of their ends."""
+        if not text:
+            return
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few characters change length when lowercased; keep offsets aligned
+            lowered = ''.join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+        goto, fail, out = self._goto, self._fail, self._out
+        keywords, weights, lengths = self.keywords, self.weights, self._lengths
+        # A word can have several readings ("lines" is "lines" and "line"),
+        # so the automaton may be in several states at once, one per reading
+        states = ()
+        starts = deque(maxlen=self._max_words)  # start offsets of the most recent words
+        prev_end = 0
+        for m in WORD_RE.finditer(lowered):
+            words = self._keyword_words(m.group())
+            if not words:
+                # Not part of any keyword: back to the root
+                states = ()
+                continue
+            start, end = m.span()
+            # Anything but spaces/hyphens since the previous keyword word
+            # (punctuation) breaks a phrase
+            if states and PHRASE_GAP_RE.match(lowered, prev_end).end() != start:
+                states = ()
+            following = set()
+            for state in states or (0,):
+                for w in words:
+                    node = state
+                    while node and w not in goto[node]:
+                        node = fail[node]
+                    nxt = goto[node].get(w, 0)
+                    if nxt:
+                        following.add(nxt)
+            states = following
+            starts.append(start)
+            prev_end = end
+            found = sorted({k for node in states for k in out[node]}, key=lambda k: -lengths[k])
+            for k in found:
+                yield RiskMatch(keywords[k], starts[-lengths[k]], end, weights[k])
+
+    def match(self, text):
+        return list(self.finditer(text))
+
+    def keywords_found(self, text):
+        """Distinct keywords present in text, in keyword-list order."""
+        found = {m.keyword for m in self.finditer(text)}
+        return [k for k in self.keywords if k in found]
+
+    def score(self, text):
+        """Sum of the weights of the distinct keywords present."""
+        seen = {}
+        for m in self.finditer(text):
+            seen[m.keyword] = m.weight
+        return sum(seen.values())
+
+
+def load_weights(path):
+    """Keyword weights from a JSON file: {"phrase": weight, ...} or ["phrase", ...]."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return {k: 1 for k in data}
+    return {str(k): float(v) for k, v in data.items()}
+
+
+_matcher = None
+_matcher_source = None   # (path, mtime) the current matcher was built from
+_last_check = 0.0
+_matcher_lock = threading.Lock()
+
+def _keyword_file():
+    """(path, (path, mtime)) of the BLOOM_RISK_KEYWORDS file; the source is None if unset or missing."""
+    path = os.environ.get("BLOOM_RISK_KEYWORDS")
+    if path:
+        try:
+            return path, (path, os.path.getmtime(path))
+        except OSError:
+            pass
+    return path, None
+
+def get_matcher():
+    """
+    Shared matcher. If BLOOM_RISK_KEYWORDS names a JSON keyword file it is
+    used instead of DEFAULT_RISK_WEIGHTS and rebuilt when the file changes
+    (checked at most every RELOAD_CHECK_INTERVAL seconds), so edits take
+    effect without restarting and without a rebuild per request.
+    """
+    global _matcher, _matcher_source, _last_check
+    now = time.monotonic()
+    if _matcher is not None and now - _last_check < RELOAD_CHECK_INTERVAL:
+        return _matcher
+
+    with _matcher_lock:
+        _last_check = now
+        path, source = _keyword_file()
+        if _matcher is not None and source == _matcher_source:
+            return _matcher
+
+        weights = DEFAULT_RISK_WEIGHTS
+        if source is not None:
+            try:
+                weights = load_weights(path)
+            except (OSError, ValueError):
+                # Keep serving the last good list while the file is broken
+                if _matcher is not None:
+                    return _matcher
+        # Build fully, then swap: readers never see a half-built automaton
+        _matcher = RiskMatcher(weights)
+        _matcher_source = source
+        return _matcher
+
+def set_weights(weights):
+    """
+    Replace the shared matcher's keyword list (e.g. from an admin page).
+    It stays in effect until the keyword file (BLOOM_RISK_KEYWORDS)
+    changes, which is picked up as usual.
+    """
+    global _matcher, _matcher_source, _last_check
+    matcher = RiskMatcher(weights)
+    with _matcher_lock:
+        _matcher = matcher
+        # The file as it is now counts as already applied
+        _matcher_source = _keyword_file()[1]
+        _last_check = time.monotonic()
@@ -0,0 +1,14 @@
+# Fields of an intake case, as collected in the Review & Edit tab
+SCHEMA_KEYS = [
+    'customer_name', 'phone', 'email', 'street_address', 'city', 'state', 'zip',
+    'initial_contact_datetime', 'contact_channel', 'work_order_summary',
+    'raw_comments', 'risk_flags', 'gps_lat', 'gps_lng'
+]
+
+# Added when a case is standardized and saved
+SAVED_KEYS = ['case_id', 'formatted_address', 'recommended_filename', 'timestamp_added']
+
+CHANNELS = ["Form", "Text", "Email", "Phone Call"]
+
+def empty_case():
+    return {k: None for k in SCHEMA_KEYS}
@@ -1,21 +1,26 @@
 import re
 import datetime
 
+from utils import date_parser, metrics
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+@metrics.traced("standardize_date")
 def standardize_date(date_val):
     if not date_val:
-        return datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        return datetime.datetime.now().strftime(DATETIME_FORMAT)
     
     if isinstance(date_val, str):
-        try:
-            from dateutil import parser
-            dt = parser.parse(date_val)
-            return dt.strftime('%Y-%m-%d %H:%M:%S')
-        except:
-            return datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S') # Default if parse fails
+        # Learned strptime formats first, dateutil for new shapes
+        dt = date_parser.DEFAULT_PARSER.parse(date_val)
+        if dt is None:
+            return datetime.datetime.now().strftime(DATETIME_FORMAT) # Default if parse fails
+        return dt.strftime(DATETIME_FORMAT)
     if isinstance(date_val, (datetime.datetime, datetime.date)):
-        return date_val.strftime('%Y-%m-%d %H:%M:%S')
+        return date_val.strftime(DATETIME_FORMAT)
     return str(date_val)
 
+@metrics.traced("standardize_phone")
 def standardize_phone(phone_str):
     if not phone_str:
         return ""
@@ -28,9 +33,10 @@ def standardize_phone(phone_str):
         return f"{digits[1:4]}-{digits[4:7]}-{digits[7:]}" # Remove country code 1
     return phone_str # Return as is if format unclear
 
-def generate_case_id(counter):
-    today = datetime.datetime.now().strftime('%Y%m%d')
-    return f"RPC-{today}-{counter:03d}"
+def generate_case_id(counter, width=3, day=None):
+    # day: 'YYYYMMDD', defaults to today
+    today = day or datetime.datetime.now().strftime('%Y%m%d')
+    return f"RPC-{today}-{counter:0{width}d}"
 
 def generate_filename(case_id, street_address, city, state):
     # Sanitize inputs
@@ -43,7 +49,174 @@ def generate_filename(case_id, street_address, city, state):
     
     return f"{case_id}_{s_clean}_{c_clean}_{st_clean}.pdf"
 
+def format_full_address(case):
+    """One-line address for geocoding, built from a case's address fields."""
+    return f"{case.get('street_address')}, {case.get('city')}, {case.get('state')} {case.get('zip')}"
+
+@metrics.traced("normalize_text")
 def normalize_text(text):
     if not text:
         return ""
     return ' '.join(text.split()).title() # Title Case and single spacing
+
+# Common street suffixes/directionals folded to one spelling so that
+# "123 North Main Street" and "123 N Main St" produce the same key.
+ADDRESS_ABBREVIATIONS = {
+    'street': 'st', 'avenue': 'ave', 'drive': 'dr', 'road': 'rd',
+    'boulevard': 'blvd', 'lane': 'ln', 'trail': 'trl', 'circle': 'cir',
+    'court': 'ct', 'place': 'pl', 'highway': 'hwy', 'county': 'co',
+    'parkway': 'pkwy', 'apartment': 'apt', 'suite': 'ste',
+    'north': 'n', 'south': 's', 'east': 'e', 'west': 'w',
+}
+
+def normalize_address(address):
+    """
+    Canonical form of an address string, used as a lookup key.
+    Lowercases, strips punctuation and placeholder 'None' parts, and
+    abbreviates common street suffixes. Returns "" if nothing is left.
+    """
+    if not address:
+        return ""
+    text = re.sub(r'[^a-z0-9\s]', ' ', str(address).lower())
+    tokens = [ADDRESS_ABBREVIATIONS.get(t, t) for t in text.split() if t != 'none']
+    return ' '.join(tokens)
+
+
+# --- Series versions for bulk records ---
+#
+# Same results as the scalar functions above, element by element, for
+# whole pandas columns. Missing values (None/NaN) are treated like None.
+
+# String shapes pandas can parse with an explicit format exactly as
+# dateutil would. Two-digit years are left to dateutil: its century pivot
+# (within 50 years of today) differs from strptime's fixed 1969 cut-off.
+DATE_SHAPES = [
+    (r"[12][0-9]{3}-[0-9]{1,2}-[0-9]{1,2}", "%Y-%m-%d"),
+    (r"[12][0-9]{3}-[0-9]{1,2}-[0-9]{1,2} [0-9]{1,2}:[0-9]{2}:[0-9]{2}", "%Y-%m-%d %H:%M:%S"),
+    (r"[12][0-9]{3}-[0-9]{1,2}-[0-9]{1,2}T[0-9]{1,2}:[0-9]{2}:[0-9]{2}", "%Y-%m-%dT%H:%M:%S"),
+    (r"[12][0-9]{3}-[0-9]{1,2}-[0-9]{1,2} [0-9]{1,2}:[0-9]{2}", "%Y-%m-%d %H:%M"),
+    (r"[12][0-9]{3}/[0-9]{1,2}/[0-9]{1,2}", "%Y/%m/%d"),
+    (r"[0-9]{1,2}/[0-9]{1,2}/[12][0-9]{3}", "%m/%d/%Y"),
+    (r"[0-9]{1,2}-[0-9]{1,2}-[12][0-9]{3}", "%m-%d-%Y"),
+    (r"[A-Za-z]{3} [0-9]{1,2}, [12][0-9]{3}", "%b %d, %Y"),
+    (r"[A-Za-z]{3,9} [0-9]{1,2}, [12][0-9]{3}", "%B %d, %Y"),
+]
+
+# Phone layouts rewritten in one regex pass by standardize_phone_series:
+# 10 digits, optionally after a +1 / 1 country code, grouped 3-3-4 with
+# spaces, dots, dashes or parentheses. Such a string has exactly the
+# digits standardize_phone formats, so both give the same result.
+PHONE_SERIES_RE = r"^(?:\+?1[ .-]?)?\(?([0-9]{3})\)?[ .-]?([0-9]{3})[ .-]?([0-9]{4})$"
+
+def _strings(series):
+    """
+    The series as a str Series with missing values as "", or None if it
+    holds values other than strings and missing ones. (Before pandas 3,
+    astype("str") alone turns None/NaN into "None"/"nan".)
+    """
+    import pandas as pd
+    if pd.api.types.infer_dtype(series, skipna=True) not in ("string", "empty"):
+        return None
+    return series.fillna("").astype("str")
+
+def _to_series(values, index):
+    import pandas as pd
+    return pd.Series(values, index=index, dtype="str")
+
+@metrics.traced("standardize_phone_series")
+def standardize_phone_series(series):
+    """
+    standardize_phone for every value of a pandas Series (missing values give "").
+
+    Values in a PHONE_SERIES_RE layout are rewritten by the str accessor;
+    anything else (extensions, Unicode digits, junk) goes through
+    standardize_phone. About 3-4x faster than calling the scalar function
+    per row on 1M synthetic phones (benchmarks/bench_standardize.py).
+    """
+    import pandas as pd
+
+    series = pd.Series(series)
+    strings = _strings(series)
+    if strings is None:
+        return _to_series([standardize_phone(v) if not _missing(v) else "" for v in series.tolist()], series.index)
+    result = strings.str.replace(PHONE_SERIES_RE, r"\1-\2-\3", regex=True).fillna("")
+    matched = strings.str.fullmatch(PHONE_SERIES_RE).to_numpy(dtype=bool, na_value=False)
+    scalar = ~matched & (result != "").to_numpy(dtype=bool)
+    if scalar.any():
+        result[scalar] = [standardize_phone(v) for v in strings[scalar].tolist()]
+    return result
+
+@metrics.traced("normalize_text_series")
+def normalize_text_series(series):
+    """
+    normalize_text for every value of a pandas Series (missing values give "").
+
+    pyarrow's ASCII kernels match str.split/str.title on ASCII text;
+    Unicode title case differs (ligatures, "ß", ...), so non-ASCII rows,
+    and rows with the ASCII separators (0x1c-0x1f) str.split also splits
+    on, go through normalize_text. About 2.5x faster than calling the
+    scalar function per row on 1M synthetic names; without pyarrow every
+    row takes the scalar path.
+    """
+    import pandas as pd
+
+    series = pd.Series(series)
+    strings = _strings(series)
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        strings = None
+    if strings is None:
+        return _to_series([normalize_text(v) if not _missing(v) else "" for v in series.tolist()], series.index)
+
+    array = pa.array(strings, from_pandas=True)
+    words = pc.ascii_split_whitespace(pc.ascii_trim_whitespace(array))
+    result = pc.ascii_title(pc.binary_join(words, pa.scalar(" ", array.type)))
+    scalar = pc.or_(pc.invert(pc.string_is_ascii(array)), pc.match_substring_regex(array, "[\x1c-\x1f]"))
+    result = _to_series(result.fill_null(""), series.index)
+    scalar = scalar.fill_null(False).to_numpy(zero_copy_only=False)
+    if scalar.any():
+        result[scalar] = [normalize_text(v) for v in strings[scalar].tolist()]
+    return result
+
+@metrics.traced("standardize_date_series")
+def standardize_date_series(series):
+    """
+    standardize_date for every value of a pandas Series.
+
+    Each distinct value is parsed once. Strings in one of the DATE_SHAPES
+    go through pd.to_datetime with that format; the rest through
+    standardize_date. Missing or unparseable values get the current time.
+    """
+    import numpy as np
+    import pandas as pd
+
+    series = pd.Series(series)
+    now = datetime.datetime.now().strftime(DATETIME_FORMAT)
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return series.dt.strftime(DATETIME_FORMAT).fillna(now).astype("str")
+
+    codes, uniques = pd.factorize(series)
+    results = np.empty(len(uniques) + 1, dtype=object)
+    results[-1] = now  # code -1: missing
+    pending = np.array([isinstance(v, str) for v in uniques], dtype=bool)
+    strings = pd.Series(uniques, dtype=object).where(pending, "").astype("str")
+    for pattern, fmt in DATE_SHAPES:
+        if not pending.any():
+            break
+        match = pending & strings.str.fullmatch(pattern).to_numpy(dtype=bool)
+        if not match.any():
+            continue
+        parsed = pd.to_datetime(strings[match], format=fmt, errors="coerce")
+        valid = parsed.notna().to_numpy()
+        rows = np.flatnonzero(match)[valid]
+        results[rows] = parsed[valid].dt.strftime(DATETIME_FORMAT).to_numpy(dtype=object)
+        pending[rows] = False
+    for row, value in enumerate(uniques):
+        if results[row] is None:
+            results[row] = standardize_date(value)
+    return _to_series(results[codes], series.index)
+
+def _missing(value):
+    return value is None or (isinstance(value, float) and value != value)
@@ -0,0 +1,248 @@
+import datetime
+import email.utils
+import gzip
+import json
+import random
+
+# Building blocks for synthetic intake records. Values are written in the
+# shapes utils/parsing.py looks for (labelled form fields, US phone
+# formats, "<number> <street> <suffix>" addresses, risk phrases).
+FIRST_NAMES = ["Jane", "John", "Maria", "Robert", "Linda", "James", "Patricia", "Michael", "Susan",
+               "David", "Karen", "Daniel", "Nancy", "Paul", "Lisa", "Mark", "Betty", "Kevin", "Ruth", "Jose"]
+LAST_NAMES = ["Doe", "Johnson", "Smith", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez", "Wilson",
+              "Anderson", "Taylor", "Thomas", "Moore", "Jackson", "Martin", "Lee", "Thompson", "White"]
+STREET_NAMES = ["Main", "Oak", "Maple", "Cedar", "Elm", "Washington", "Lake", "Hill", "Walnut", "Sunset",
+                "Railroad", "Church", "Mill", "Pine", "Ridge", "Meadow", "County Road 215", "Old State"]
+STREET_SUFFIXES = ["Street", "St", "Avenue", "Ave", "Drive", "Dr", "Road", "Rd", "Lane", "Ln",
+                   "Trail", "Court", "Ct", "Way", "Boulevard", "Circle"]
+DIRECTIONS = ["", "", "", "N ", "S ", "E ", "W "]
+CITIES = [("Baileyville", "IN", "47501"), ("Jasper", "IN", "47546"), ("Springfield", "IL", "62701"),
+          ("Evansville", "IN", "47708"), ("Owensboro", "KY", "42301"), ("Vincennes", "IN", "47591"),
+          ("Carmi", "IL", "62821"), ("Henderson", "KY", "42420")]
+EMAIL_DOMAINS = ["gmail.com", "yahoo.com", "outlook.com", "icloud.com", "hotmail.com"]
+
+PHONE_FORMATS = ["({a}) {b}-{c}", "{a}-{b}-{c}", "{a}.{b}.{c}", "{a} {b} {c}", "+1 {a}-{b}-{c}", "{a}{b}{c}"]
+DATE_FORMATS = ["{m}-{d}-{yy}", "{m}/{d}/{yyyy}", "{mm}/{dd}/{yyyy}", "{yyyy}-{mm}-{dd}", "{mon} {d}, {yyyy}"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+# (sentence, risk keywords it contains)
+RISK_SENTENCES = [
+    ("The branches are touching the power lines.", ["line", "power lines"]),
+    ("A limb is hanging near wires by the driveway.", ["near wires"]),
+    ("There is a tree leaning on the primary line.", ["line", "primary"]),
+    ("I saw a spark when the wind blew.", ["spark"]),
+    ("The tree is right next to the pole.", ["pole"]),
+    ("There's a high voltage sign on the box under the tree.", ["high voltage"]),
+    ("Worried about the electric service to the house.", ["electric"]),
+]
+# Sentences with no risk keywords, including near misses ("deadline", "online")
+FILLER_SENTENCES = [
+    "I have a large dead oak across the road from my property.",
+    "It drops branches everywhere. Can someone take a look at it?",
+    "I filled out the form online last week.",
+    "Please call before the deadline for the HOA inspection.",
+    "The gate code is 4410.",
+    "Thanks for your help!",
+    "The neighbor's dog is friendly.",
+    "Best time to reach me is after 5pm.",
+]
+
+KINDS = ("form", "text", "email")
+CHANNEL_BY_KIND = {"form": "Form", "text": "Text", "email": "Email"}
+
+
+class CorpusGenerator:
+    """
+    Reproducible synthetic intake records (forms, text-message transcripts,
+    emails) with ground-truth labels.
+
+    Record i depends only on (seed, i), so a corpus can be generated in
+    any order, split across processes, or resumed part way through, and
+    record(i) always returns the same record.
+    """
+
+    def __init__(self, seed=0, kinds=KINDS, risk_rate=0.6):
+        self.seed = seed
+        self.kinds = tuple(kinds)
+        self.risk_rate = risk_rate
+
+    def _rng(self, i):
+        # A string seed is hashed (SHA-512), so no two (seed, i) pairs share a stream
+        return random.Random(f"{self.seed}:{i}")
+
+    # --- field values ---
+
+    def _name(self, rnd):
+        return f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}"
+
+    def _phone(self, rnd):
+        a, b, c = rnd.randint(201, 989), rnd.randint(200, 999), rnd.randint(0, 9999)
+        raw = rnd.choice(PHONE_FORMATS).format(a=a, b=b, c=f"{c:04d}")
+        return raw, f"{a}-{b}-{c:04d}"
+
+    def _email_address(self, rnd, name):
+        first, last = name.lower().split()
+        user = rnd.choice([f"{first}.{last}", f"{first}{last}{rnd.randint(1, 999)}", f"{first[0]}{last}"])
+        return f"{user}@{rnd.choice(EMAIL_DOMAINS)}"
+
+    def _address(self, rnd):
+        city, state, zip_code = rnd.choice(CITIES)
+        street = f"{rnd.randint(1, 9999)} {rnd.choice(DIRECTIONS)}{rnd.choice(STREET_NAMES)} {rnd.choice(STREET_SUFFIXES)}"
+        return street, city, state, zip_code
+
+    def _date(self, rnd):
+        day = datetime.date(2024, 1, 1) + datetime.timedelta(days=rnd.randrange(3 * 365))
+        raw = rnd.choice(DATE_FORMATS).format(
+            m=day.month, d=day.day, mm=f"{day.month:02d}", dd=f"{day.day:02d}",
+            yy=f"{day.year % 100:02d}", yyyy=day.year, mon=MONTHS[day.month - 1])
+        return raw, day
+
+    def _sentences(self, rnd):
+        """Filler plus (with probability risk_rate) one or two risk sentences."""
+        sentences = rnd.sample(FILLER_SENTENCES, rnd.randint(1, 3))
+        risk = []
+        if rnd.random() < self.risk_rate:
+            for sentence, keywords in rnd.sample(RISK_SENTENCES, rnd.randint(1, 2)):
+                sentences.insert(rnd.randint(0, len(sentences)), sentence)
+                risk.extend(keywords)
+        return sentences, risk
+
+    # --- records ---
+
+    def record(self, i):
+        """Record number i: {"id", "kind", "text", "labels"}."""
+        rnd = self._rng(i)
+        kind = self.kinds[rnd.randrange(len(self.kinds))]
+        name = self._name(rnd)
+        phone, phone_normalized = self._phone(rnd)
+        street, city, state, zip_code = self._address(rnd)
+        date_raw, day = self._date(rnd)
+        sentences, risk = self._sentences(rnd)
+        labels = {
+            "customer_name": None,
+            "phone": phone,
+            "phone_normalized": phone_normalized,
+            "email": None,
+            "street_address": street,
+            "city": city,
+            "state": state,
+            "zip": zip_code,
+            "initial_contact_datetime": None,
+            "contact_date": day.isoformat(),
+            "risk_flags": sorted(set(risk)),
+            "contact_channel": CHANNEL_BY_KIND[kind],
+        }
+        # street_address is the street line only; documents may add city/state/zip after it
+        render = {"form": self._form, "text": self._text, "email": self._email}[kind]
+        text = render(rnd, labels, name, date_raw, day, sentences)
+        return {"id": f"syn-{self.seed}-{i}", "kind": kind, "text": text, "labels": labels}
+
+    def _form(self, rnd, labels, name, date_raw, day, sentences):
+        email_addr = self._email_address(rnd, name) if rnd.random() < 0.7 else None
+        service = f"{labels['street_address']}, {labels['city']}, {labels['state']} {labels['zip']}"
+        labels.update(customer_name=name, email=email_addr, initial_contact_datetime=date_raw)
+        lines = [
+            "TREE TRIMMING REQUEST FORM",
+            f"{rnd.choice(['Property Owner', 'Customer Name', 'Name'])}: {name}",
+            f"Date: {date_raw}",
+            f"Service Address: {service}",
+            f"Phone: {labels['phone']}",
+        ]
+        if email_addr:
+            lines.append(f"Email: {email_addr}")
+        lines.append("Comments: " + " ".join(sentences))
+        return "\n".join(lines)
+
+    def _text(self, rnd, labels, name, date_raw, day, sentences):
+        hour = rnd.randint(7, 20)
+        stamp = f"{MONTHS[day.month - 1]} {day.day}, {hour % 12 or 12}:{rnd.randint(0, 59):02d} {'AM' if hour < 12 else 'PM'}"
+        messages = [
+            f"Hi this is {name.split()[0]}, I need someone to look at a tree",
+            f"It's at {labels['street_address']} in {labels['city']}",
+        ] + sentences + [f"You can reach me at {labels['phone']}"]
+        return stamp + "\n" + "\n".join(messages)
+
+    def _email(self, rnd, labels, name, date_raw, day, sentences):
+        sender = self._email_address(rnd, name)
+        sent = datetime.datetime(day.year, day.month, day.day, rnd.randint(7, 20), rnd.randint(0, 59))
+        labels.update(customer_name=name, email=sender,
+                      initial_contact_datetime=sent.strftime('%Y-%m-%d %H:%M:%S'))
+        body = [
+            "Hello,",
+            "",
+            f"I'd like to request tree trimming at {labels['street_address']}, {labels['city']}, {labels['state']}.",
+        ] + sentences + ["", f"My number is {labels['phone']}.", "", "Thanks,", name]
+        headers = [
+            f"From: {name} <{sender}>",
+            "To: intake@bloomspatial.example",
+            f"Date: {email.utils.format_datetime(sent)}",
+            f"Subject: Tree trimming request - {labels['street_address']}",
+        ]
+        return "\n".join(headers) + "\n\n" + "\n".join(body)
+
+    def __iter__(self):
+        return self.iter_records()
+
+    def iter_records(self, count=None, start=0):
+        """Records start, start+1, ... (forever if count is None), generated lazily."""
+        i = start
+        while count is None or i < start + count:
+            yield self.record(i)
+            i += 1
+
+
+def open_output(path):
+    """Text file for writing; gzip-compressed if the name ends in .gz."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+def write_jsonl(records, path):
+    """Stream records to a JSON-lines file (.jsonl or .jsonl.gz). Returns the count."""
+    count = 0
+    with open_output(path) as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+            count += 1
+    return count
+
+def mbox_message(record):
+    """An email record as an mbox entry ("From " line, body lines escaped)."""
+    sender = record["labels"]["email"] or "unknown@example.com"
+    lines = [f"From {sender} Mon Jan  1 00:00:00 2024"]
+    for line in record["text"].split("\n"):
+        lines.append(">" + line if line.lstrip(">").startswith("From ") else line)
+    return "\n".join(lines) + "\n\n"
+
+def render_image(record, width=1200, line_height=44, seed=None):
+    """
+    The record's text drawn as a scanned-looking page (PIL image): slight
+    rotation, uneven ink and speckle noise, so OCR has realistic work to do.
+    """
+    from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+    rnd = random.Random(record["id"] if seed is None else seed)
+    lines = []
+    for line in record["text"].split("\n"):
+        while len(line) > 60:  # wrap long lines
+            cut = line.rfind(" ", 0, 60)
+            cut = cut if cut > 0 else 60
+            lines.append(line[:cut])
+            line = line[cut:].lstrip()
+        lines.append(line)
+
+    height = 120 + line_height * len(lines)
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.load_default(size=int(line_height * 0.7))
+    except TypeError:
+        font = ImageFont.load_default()  # Pillow < 10.1: fixed-size bitmap font
+    for n, line in enumerate(lines):
+        x = 60 + rnd.randint(-4, 4)
+        draw.text((x, 60 + n * line_height), line, fill=rnd.randint(0, 70), font=font)
+    for _ in range(width * height // 4000):
+        x, y = rnd.randrange(width), rnd.randrange(height)
+        draw.point((x, y), fill=rnd.randint(0, 160))
+    image = image.filter(ImageFilter.GaussianBlur(rnd.uniform(0.2, 0.8)))
+    return image.rotate(rnd.uniform(-1.5, 1.5), resample=Image.BICUBIC, expand=True, fillcolor=255)
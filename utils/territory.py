@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+import warnings
+
+from utils import geo
+
+# Edges per latitude band the index aims for; a point is only tested
+# against the edges of its own band
+EDGES_PER_BAND = 8
+MAX_BANDS = 4096
+# Points tested at once in contains_many (bounds the points x edges arrays)
+CHUNK_CELLS = 4_000_000
+
+
+class ServiceTerritory:
+    """
+    Point-in-polygon test against the service-territory polygons.
+
+    Every ring (outer boundaries and holes of all polygons) is broken into
+    edges, and edges are bucketed into horizontal latitude bands. A point
+    outside the overall bounding box is rejected at once; otherwise only
+    the edges of its band are ray-cast (even-odd rule, so holes work and
+    polygons are assumed not to overlap). contains_many() does the same
+    for whole columns of points with numpy, band by band.
+    """
+
+    def __init__(self, polygons):
+        # polygons: [[ring, ...], ...], each ring a list of (lng, lat)
+        edges = []
+        for rings in polygons:
+            for ring in rings:
+                points = [(float(p[0]), float(p[1])) for p in ring]
+                if len(points) < 3:
+                    continue
+                if points[0] != points[-1]:
+                    points.append(points[0])
+                for (x1, y1), (x2, y2) in zip(points, points[1:]):
+                    if y1 != y2:  # a horizontal edge never crosses a horizontal ray
+                        edges.append((x1, y1, x2, y2))
+        if not edges:
+            raise ValueError("No polygon rings in the service territory")
+        self.edges = edges
+        self.polygons = len(polygons)
+        self.min_lng = min(min(e[0], e[2]) for e in edges)
+        self.max_lng = max(max(e[0], e[2]) for e in edges)
+        self.min_lat = min(min(e[1], e[3]) for e in edges)
+        self.max_lat = max(max(e[1], e[3]) for e in edges)
+
+        self.band_count = max(1, min(MAX_BANDS, len(edges) // EDGES_PER_BAND))
+        self.band_height = (self.max_lat - self.min_lat) / self.band_count or 1.0
+        self.bands = [[] for _ in range(self.band_count)]
+        for edge in edges:
+            first = self._band(min(edge[1], edge[3]))
+            last = self._band(max(edge[1], edge[3]))
+            for band in range(first, last + 1):
+                self.bands[band].append(edge)
+        self._arrays = None
+
+    def _band(self, lat):
+        return min(self.band_count - 1, max(0, int((lat - self.min_lat) / self.band_height)))
+
+    @property
+    def bbox(self):
+        """(min_lat, min_lng, max_lat, max_lng) of the whole territory."""
+        return self.min_lat, self.min_lng, self.max_lat, self.max_lng
+
+    def viewbox(self):
+        """The bounding box as the two (lat, lng) corners Nominatim's viewbox takes."""
+        return [(self.min_lat, self.min_lng), (self.max_lat, self.max_lng)]
+
+    def contains(self, lat, lng):
+        """True if the point is inside the territory (False for missing coordinates)."""
+        if not geo.valid_point(lat, lng):
+            return False
+        lat, lng = float(lat), float(lng)
+        if not (self.min_lat <= lat <= self.max_lat and self.min_lng <= lng <= self.max_lng):
+            return False
+        inside = False
+        for x1, y1, x2, y2 in self.bands[self._band(lat)]:
+            if (y1 > lat) != (y2 > lat) and lng < x1 + (lat - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+        return inside
+
+    def _band_arrays(self):
+        import numpy as np
+
+        if self._arrays is None:
+            self._arrays = [np.array(edges, dtype=float).reshape(-1, 4) for edges in self.bands]
+        return self._arrays
+
+    def contains_many(self, lats, lngs):
+        """contains() for arrays of latitudes and longitudes; returns a numpy bool array."""
+        import numpy as np
+
+        lats = np.asarray(lats, dtype=float)
+        lngs = np.asarray(lngs, dtype=float)
+        inside = np.zeros(len(lats), dtype=bool)
+        candidates = np.flatnonzero(
+            (lats >= self.min_lat) & (lats <= self.max_lat) & (lngs >= self.min_lng) & (lngs <= self.max_lng)
+            & ~((lats == 0) & (lngs == 0)))
+        if not len(candidates):
+            return inside
+        bands = np.clip(((lats[candidates] - self.min_lat) / self.band_height).astype(np.int64),
+                        0, self.band_count - 1)
+        order = np.argsort(bands, kind="stable")
+        candidates, bands = candidates[order], bands[order]
+        starts = np.searchsorted(bands, np.arange(self.band_count + 1))
+        arrays = self._band_arrays()
+        for band in np.unique(bands):
+            edges = arrays[band]
+            rows = candidates[starts[band]:starts[band + 1]]
+            if not len(edges):
+                continue
+            x1, y1, x2, y2 = edges[:, 0], edges[:, 1], edges[:, 2], edges[:, 3]
+            step = max(1, CHUNK_CELLS // len(edges))
+            for at in range(0, len(rows), step):
+                chunk = rows[at:at + step]
+                y = lats[chunk][:, None]
+                x = lngs[chunk][:, None]
+                crosses = (y1 > y) != (y2 > y)
+                hits = crosses & (x < x1 + (y - y1) * (x2 - x1) / (y2 - y1))
+                inside[chunk] = hits.sum(axis=1) % 2 == 1
+        return inside
+
+    @classmethod
+    def from_geojson(cls, data):
+        """Build from a GeoJSON FeatureCollection, Feature or geometry (Polygon/MultiPolygon)."""
+        if data.get('type') == 'FeatureCollection':
+            geometries = [f.get('geometry') or {} for f in data.get('features') or []]
+        elif data.get('type') == 'Feature':
+            geometries = [data.get('geometry') or {}]
+        else:
+            geometries = [data]
+        polygons = []
+        for geometry in geometries:
+            if geometry.get('type') == 'Polygon':
+                polygons.append(geometry.get('coordinates') or [])
+            elif geometry.get('type') == 'MultiPolygon':
+                polygons.extend(geometry.get('coordinates') or [])
+        return cls(polygons)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls.from_geojson(json.load(f))
+
+
+def validate_store(store, territory=None, chunk_size=100000):
+    """
+    Check every geocoded case in the store against the territory.
+    Returns {"checked": n, "outside": [case_id, ...]}; outside is empty
+    (and nothing is read) when no territory is configured.
+    """
+    territory = territory if territory is not None else get_default_territory()
+    result = {"checked": 0, "outside": []}
+    if territory is None:
+        return result
+
+    def flush(ids, lats, lngs):
+        inside = territory.contains_many(lats, lngs)
+        result["checked"] += len(ids)
+        result["outside"].extend(case_id for case_id, ok in zip(ids, inside) if not ok)
+
+    ids, lats, lngs = [], [], []
+    for _, case_id, lat, lng in store.iter_points(chunk_size=chunk_size):
+        ids.append(case_id)
+        lats.append(lat)
+        lngs.append(lng)
+        if len(ids) >= chunk_size:
+            flush(ids, lats, lngs)
+            ids, lats, lngs = [], [], []
+    if ids:
+        flush(ids, lats, lngs)
+    return result
+
+
+_default_territory = None
+_default_territory_loaded = False
+_default_territory_lock = threading.Lock()
+
+def get_default_territory():
+    """
+    Territory loaded from the GeoJSON file named by BLOOM_TERRITORY, or
+    None if unset or unreadable. Loaded once per process.
+    """
+    global _default_territory, _default_territory_loaded
+    if not _default_territory_loaded:
+        with _default_territory_lock:
+            if not _default_territory_loaded:
+                path = os.environ.get("BLOOM_TERRITORY")
+                if path:
+                    try:
+                        _default_territory = ServiceTerritory.from_file(path)
+                    except Exception as e:
+                        warnings.warn(f"Could not load the service territory from {path}: {str(e)}")
+                _default_territory_loaded = True
+    return _default_territory
+
+def set_default_territory(territory):
+    """Install a territory (or None to disable territory checks) for this process."""
+    global _default_territory, _default_territory_loaded
+    with _default_territory_lock:
+        _default_territory = territory
+        _default_territory_loaded = True